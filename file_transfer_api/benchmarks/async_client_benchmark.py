@@ -0,0 +1,91 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.benchmark_utils import run_api_server
+from src.client.async_client import AsyncAPIClient
+from src.client.client import APIClient
+
+
+def upload_one_at_a_time(base_url: str, file_paths: List[Path], error_logger_path: str) -> float:
+    """Upload files one after the other with the blocking client.
+
+    Args:
+        base_url: Base URL of the API.
+        file_paths: Paths of the files to upload.
+        error_logger_path: Path of the error log file.
+
+    Returns:
+        Time taken in seconds.
+    """
+    start = time.perf_counter()
+    with APIClient(base_url=base_url, error_logger_path=error_logger_path) as client:
+        for file_path in file_paths:
+            client.upload_file(file_path)
+    return time.perf_counter() - start
+
+
+def upload_concurrently(base_url: str, file_paths: List[Path], error_logger_path: str, concurrency: int) -> float:
+    """Upload files with the async client's upload_many.
+
+    Args:
+        base_url: Base URL of the API.
+        file_paths: Paths of the files to upload.
+        error_logger_path: Path of the error log file.
+        concurrency: Most uploads in flight at once.
+
+    Returns:
+        Time taken in seconds.
+    """
+    async def upload():
+        async with AsyncAPIClient(base_url=base_url, error_logger_path=error_logger_path,
+                                  pool_size=concurrency) as client:
+            results = await client.upload_many(file_paths, concurrency=concurrency)
+        assert all(hasattr(result, "file_id") for result in results)
+
+    start = time.perf_counter()
+    asyncio.run(upload())
+    return time.perf_counter() - start
+
+
+def main(file_count: int, file_size: int, concurrencies: List[int]):
+    """Compare uploading files one at a time with uploading them concurrently.
+
+    The API runs on localhost, so the round trip time each concurrent upload hides is the smallest it gets.
+
+    Args:
+        file_count: Number of files to upload with each method.
+        file_size: Size of each file in bytes.
+        concurrencies: Numbers of uploads in flight at once to compare.
+    """
+    with run_api_server() as base_url, tempfile.TemporaryDirectory() as temp_dir:
+        error_logger_path = str(Path(temp_dir) / "errors.log")
+        # Distinct contents, so that deduplication does not flatter either method
+        file_paths = []
+        for index in range(file_count):
+            file_paths.append(Path(temp_dir) / f"{index}.txt")
+            file_paths[-1].write_bytes(str(index).encode().ljust(file_size, b"x"))
+
+        results = [("one at a time", upload_one_at_a_time(base_url, file_paths, error_logger_path))]
+        for concurrency in concurrencies:
+            results.append((f"upload_many x{concurrency}",
+                            upload_concurrently(base_url, file_paths, error_logger_path, concurrency)))
+
+    print(f"{'method':>18} | {'time (s)':>8} | {'files/s':>8}")
+    for method, seconds in results:
+        print(f"{method:>18} | {seconds:>8.2f} | {file_count / seconds:>8.0f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark sequential uploads against the async client's "
+                                                 "upload_many.")
+    parser.add_argument("--files", type=int, default=1000, help="Number of files to upload with each method.")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Size of each file in bytes.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16], help="Uploads in flight at once.")
+    args = parser.parse_args()
+
+    main(file_count=args.files, file_size=args.size, concurrencies=args.concurrency)
@@ -0,0 +1,75 @@
+import time
+
+import requests
+
+from benchmarks.benchmark_utils import run_api_server
+
+
+def upload_one_by_one(base_url: str, payloads: list) -> float:
+    """Upload small files with one request each.
+
+    Args:
+        base_url: Base URL of the API.
+        payloads: Contents of the files.
+
+    Returns:
+        Time taken in seconds.
+    """
+    start = time.perf_counter()
+    with requests.Session() as session:
+        for index, payload in enumerate(payloads):
+            session.post(f"{base_url}/files", files={"file": (f"{index}.txt", payload)}).raise_for_status()
+    return time.perf_counter() - start
+
+
+def upload_in_batches(base_url: str, payloads: list, batch_size: int) -> float:
+    """Upload small files in batch requests, whose records are each created in a single transaction.
+
+    Args:
+        base_url: Base URL of the API.
+        payloads: Contents of the files.
+        batch_size: Number of files sent in each request.
+
+    Returns:
+        Time taken in seconds.
+    """
+    start = time.perf_counter()
+    with requests.Session() as session:
+        for offset in range(0, len(payloads), batch_size):
+            files = [("files", (f"{index}.txt", payload))
+                     for index, payload in enumerate(payloads[offset:offset + batch_size], start=offset)]
+            response = session.post(f"{base_url}/files/batch", files=files)
+            response.raise_for_status()
+            assert response.json()["failed"] == 0
+    return time.perf_counter() - start
+
+
+def main(file_count: int, file_size: int, batch_size: int):
+    """Compare uploading many small files one by one with uploading them in batches.
+
+    Args:
+        file_count: Number of files to upload.
+        file_size: Size of each file in bytes.
+        batch_size: Number of files sent in each batch request.
+    """
+    # Distinct contents, so that deduplication does not flatter either method
+    payloads = [str(index).encode().ljust(file_size, b"x") for index in range(file_count)]
+    with run_api_server() as base_url:
+        one_by_one = upload_one_by_one(base_url, payloads)
+        batched = upload_in_batches(base_url, payloads, batch_size)
+
+    print(f"{'method':>24} | {'time (s)':>8} | {'files/s':>8}")
+    for method, seconds in [("one request per file", one_by_one), (f"batches of {batch_size}", batched)]:
+        print(f"{method:>24} | {seconds:>8.2f} | {file_count / seconds:>8.0f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark batch uploads against one request per file.")
+    parser.add_argument("--files", type=int, default=10000, help="Number of files to upload.")
+    parser.add_argument("--size", type=int, default=1024, help="Size of each file in bytes.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Number of files in each batch request.")
+    args = parser.parse_args()
+
+    main(file_count=args.files, file_size=args.size, batch_size=args.batch_size)
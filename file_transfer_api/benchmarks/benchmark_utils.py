@@ -0,0 +1,103 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+def find_free_port() -> int:
+    """Find a free TCP port on localhost.
+
+    Returns:
+        A port number that is currently free.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get a percentile of a list of values using the nearest-rank method.
+
+    Args:
+        values: Values to get the percentile of.
+        pct: Percentile to get, between 0 and 100.
+
+    Returns:
+        The value at the percentile.
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@contextmanager
+def run_api_server(port: Optional[int] = None, app=None) -> Iterator[str]:
+    """Run the API with uvicorn in a background thread against temporary storage and a temporary SQLite database.
+
+    Args:
+        port: Port to run the API on. Defaults to a free port.
+        app: ASGI app to serve. Defaults to the API app.
+
+    Yields:
+        The base URL of the running API.
+    """
+    import uvicorn
+
+    port = port or find_free_port()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        for directory in ["uploads", "downloads"]:
+            (temp_dir / directory).mkdir()
+
+        # The database URL is read when the database modules are first imported, so it must be set beforehand
+        os.environ.setdefault("LOCAL_DATABASE_URL", f"sqlite:///{temp_dir / 'benchmark.db'}")
+        from src.database_manager.database_connection.local_database import Base, engine
+        from src.file_manager import local_file_manager
+
+        if app is None:
+            from src.api.api import app
+
+        Base.metadata.create_all(engine)
+        local_file_manager.upload_path = temp_dir / "uploads"
+        local_file_manager.download_path = temp_dir / "downloads"
+        local_file_manager.multipart_path = temp_dir / "multipart"
+        local_file_manager.blob_path = temp_dir / "blobs"
+
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        try:
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            server.should_exit = True
+            thread.join()
+
+
+def measure_transfer(transfer: Callable[[], object]) -> Tuple[float, float]:
+    """Measure the peak memory allocated by Python and the time taken while running an upload or a download.
+
+    An API run with run_api_server is in the same process, so its allocations are counted too. It streams files to and
+    from disk, so they add little to the peak.
+
+    Args:
+        transfer: Transfer function to run.
+
+    Returns:
+        Peak allocated memory in MiB and time taken in seconds.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        transfer()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
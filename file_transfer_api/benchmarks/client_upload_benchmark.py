@@ -0,0 +1,43 @@
+import tempfile
+from pathlib import Path
+from typing import List
+
+from benchmarks.benchmark_utils import measure_transfer, run_api_server
+from src.client.client import APIClient
+
+
+def main(sizes_mb: List[int]):
+    """Compare peak memory and throughput of uploads through upload_file, which encodes the whole file into the request
+    body, and the streaming upload_file_streamed, both as a resumable upload and as a single streamed request.
+
+    Args:
+        sizes_mb: Upload sizes to benchmark in MiB.
+    """
+    with run_api_server() as base_url, tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        file_path = temp_dir / "upload.bin"
+        with APIClient(base_url=base_url, error_logger_path=str(temp_dir / "errors.log")) as client:
+            methods = {
+                "upload_file": lambda: client.upload_file(file_path),
+                "resumable": lambda: client.upload_file_streamed(file_path),
+                "streamed form": lambda: client.upload_file_streamed(file_path, part_size=2 ** 62),
+            }
+            print(f"{'size (MiB)':>10} | {'method':>13} | {'peak (MiB)':>10} | {'MiB/s':>6}")
+            for size_mb in sizes_mb:
+                with open(file_path, "wb") as f:
+                    for _ in range(size_mb):
+                        f.write(b"x" * (1024 * 1024))
+                for method, upload in methods.items():
+                    # Each upload is stored under its own ID, so the same file can be uploaded every time
+                    peak, elapsed = measure_transfer(upload)
+                    print(f"{size_mb:>10} | {method:>13} | {peak:>10.2f} | {size_mb / elapsed:>6.0f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark peak client memory of buffered and streaming uploads.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256], help="Upload sizes in MiB.")
+    args = parser.parse_args()
+
+    main(sizes_mb=args.sizes)
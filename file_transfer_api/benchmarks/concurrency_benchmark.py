@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import List
+
+import requests
+
+from benchmarks.benchmark_utils import percentile, run_api_server
+
+
+def time_small_requests(base_url: str, file_id: str, count: int) -> List[float]:
+    """Time a series of small downloads.
+
+    Args:
+        base_url: Base URL of the API.
+        file_id: ID of a small file to download.
+        count: Number of requests to time.
+
+    Returns:
+        Latency of each request in milliseconds.
+    """
+    latencies = []
+    with requests.Session() as session:
+        for _ in range(count):
+            start = time.perf_counter()
+            session.get(f"{base_url}/files/{file_id}").raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def upload_until_stopped(base_url: str, payload: bytes, stop: threading.Event):
+    """Keep uploading a large file until told to stop.
+
+    Args:
+        base_url: Base URL of the API.
+        payload: Contents of the large file.
+        stop: Event that is set when uploads should stop.
+    """
+    with requests.Session() as session:
+        while not stop.is_set():
+            session.post(f"{base_url}/files", files={"file": ("large.bin", payload)}).raise_for_status()
+
+
+def main(large_uploads: int, large_size_mb: int, requests_count: int):
+    """Measure small request latency while the API is idle and while large uploads are running.
+
+    Args:
+        large_uploads: Number of concurrent large uploads.
+        large_size_mb: Size of each large upload in MiB.
+        requests_count: Number of small requests to time in each phase.
+    """
+    with run_api_server() as base_url:
+        response = requests.post(f"{base_url}/files", files={"file": ("small.txt", b"test data")})
+        small_file_id = response.json()["file_id"]
+
+        idle = time_small_requests(base_url, small_file_id, requests_count)
+
+        stop = threading.Event()
+        payload = b"x" * (large_size_mb * 1024 * 1024)
+        uploaders = [threading.Thread(target=upload_until_stopped, args=(base_url, payload, stop))
+                     for _ in range(large_uploads)]
+        for uploader in uploaders:
+            uploader.start()
+        time.sleep(0.5)  # Let the large uploads get going
+        try:
+            loaded = time_small_requests(base_url, small_file_id, requests_count)
+        finally:
+            stop.set()
+            for uploader in uploaders:
+                uploader.join()
+
+    print(f"{'phase':>24} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'max (ms)':>8}")
+    for phase, latencies in [("idle", idle), (f"{large_uploads} x {large_size_mb} MiB uploads", loaded)]:
+        print(f"{phase:>24} | {percentile(latencies, 50):>8.2f} | {percentile(latencies, 99):>8.2f} | "
+              f"{max(latencies):>8.2f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark small request latency while large uploads are running.")
+    parser.add_argument("--large-uploads", type=int, default=4, help="Number of concurrent large uploads.")
+    parser.add_argument("--large-size", type=int, default=64, help="Size of each large upload in MiB.")
+    parser.add_argument("--requests", type=int, default=200, help="Number of small requests per phase.")
+    args = parser.parse_args()
+
+    main(large_uploads=args.large_uploads, large_size_mb=args.large_size, requests_count=args.requests)
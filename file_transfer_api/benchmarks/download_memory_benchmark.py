@@ -0,0 +1,49 @@
+import tempfile
+from pathlib import Path
+from typing import List
+
+from benchmarks.benchmark_utils import measure_transfer, run_api_server
+from src.client.client import APIClient
+
+
+def buffered_download(client: APIClient, file_id: str, file_path: Path):
+    """Download the way callers of download_file have to, holding the whole file in memory before writing it."""
+    file_path.write_bytes(client.download_file(file_id))
+
+
+def main(sizes_mb: List[int]):
+    """Compare peak memory and throughput of downloads through download_file and the streaming download_file_to.
+
+    Args:
+        sizes_mb: Download sizes to benchmark in MiB.
+    """
+    with run_api_server() as base_url, tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        with APIClient(base_url=base_url, error_logger_path=str(temp_dir / "errors.log")) as client:
+            print(f"{'size (MiB)':>10} | {'buffered peak (MiB)':>19} | {'streaming peak (MiB)':>20} | "
+                  f"{'buffered MiB/s':>14} | {'streaming MiB/s':>15}")
+            for size_mb in sizes_mb:
+                file_path = temp_dir / "upload.bin"
+                with open(file_path, "wb") as f:
+                    for _ in range(size_mb):
+                        f.write(b"x" * (1024 * 1024))
+                file_id = client.upload_file(file_path).file_id
+                file_path.unlink()
+
+                buffered_peak, buffered_time = measure_transfer(
+                    lambda: buffered_download(client, file_id, temp_dir / "buffered.bin"))
+                streaming_peak, streaming_time = measure_transfer(
+                    lambda: client.download_file_to(file_id, temp_dir / "streamed.bin"))
+                print(f"{size_mb:>10} | {buffered_peak:>19.2f} | {streaming_peak:>20.2f} | "
+                      f"{size_mb / buffered_time:>14.0f} | {size_mb / streaming_time:>15.0f}")
+                client.delete_file(file_id)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark peak client memory of buffered and streaming downloads.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256], help="Download sizes in MiB.")
+    args = parser.parse_args()
+
+    main(sizes_mb=args.sizes)
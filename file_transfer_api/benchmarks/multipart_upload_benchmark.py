@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.benchmark_utils import run_api_server
+
+
+def upload_single_stream(base_url: str, payload: bytes) -> float:
+    """Upload a file in a single multipart/form-data request.
+
+    Args:
+        base_url: Base URL of the API.
+        payload: Contents of the file.
+
+    Returns:
+        Time taken in seconds.
+    """
+    start = time.perf_counter()
+    requests.post(f"{base_url}/files", files={"file": ("large.bin", payload)}).raise_for_status()
+    return time.perf_counter() - start
+
+
+def upload_in_parts(base_url: str, payload: bytes, part_size: int, workers: int) -> float:
+    """Upload a file as a multipart upload, sending its parts in parallel.
+
+    Args:
+        base_url: Base URL of the API.
+        payload: Contents of the file.
+        part_size: Size of each part in bytes.
+        workers: Number of parts to upload at once.
+
+    Returns:
+        Time taken in seconds.
+    """
+    sessions = threading.local()
+
+    def upload_part(upload_id: str, part_number: int):
+        # Each worker keeps its own connection open between parts
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        offset = (part_number - 1) * part_size
+        sessions.session.put(f"{base_url}/files/uploads/{upload_id}/parts/{part_number}",
+                             data=payload[offset:offset + part_size]).raise_for_status()
+
+    start = time.perf_counter()
+    upload_id = requests.post(f"{base_url}/files/uploads", params={"file_name": "large.bin"}).json()["upload_id"]
+    part_count = max(1, -(-len(payload) // part_size))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(upload_part, upload_id, part_number)
+                       for part_number in range(1, part_count + 1)]:
+            future.result()
+    requests.post(f"{base_url}/files/uploads/{upload_id}/complete").raise_for_status()
+    return time.perf_counter() - start
+
+
+def main(size_mb: int, part_size_mb: int, workers: int, repeats: int):
+    """Compare single-stream uploads with parallel multipart uploads of the same file.
+
+    Args:
+        size_mb: Size of the file in MiB.
+        part_size_mb: Size of each part in MiB.
+        workers: Number of parts to upload at once.
+        repeats: Number of uploads to time for each method. The fastest is reported.
+    """
+    payload = b"x" * (size_mb * 1024 * 1024)
+    with run_api_server() as base_url:
+        single = min(upload_single_stream(base_url, payload) for _ in range(repeats))
+        parts = min(upload_in_parts(base_url, payload, part_size_mb * 1024 * 1024, workers) for _ in range(repeats))
+
+    print(f"{'method':>32} | {'time (s)':>8} | {'MiB/s':>8}")
+    for method, seconds in [("single stream", single),
+                            (f"{workers} x {part_size_mb} MiB parts", parts)]:
+        print(f"{method:>32} | {seconds:>8.2f} | {size_mb / seconds:>8.1f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel multipart uploads against single-stream uploads.")
+    parser.add_argument("--size", type=int, default=256, help="Size of the file in MiB.")
+    parser.add_argument("--part-size", type=int, default=16, help="Size of each part in MiB.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parts to upload at once.")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of uploads to time for each method.")
+    args = parser.parse_args()
+
+    main(size_mb=args.size, part_size_mb=args.part_size, workers=args.workers, repeats=args.repeats)
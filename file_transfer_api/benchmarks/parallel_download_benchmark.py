@@ -0,0 +1,127 @@
+import asyncio
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+from benchmarks.benchmark_utils import find_free_port, run_api_server
+from src.client.client import APIClient
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float, window: int):
+    """Forward data from one side of a connection to the other, waiting before sending each window of it.
+
+    Args:
+        reader: Side to read from.
+        writer: Side to write to.
+        delay: Seconds to wait before sending each window.
+        window: Most bytes sent per wait.
+    """
+    try:
+        while data := await reader.read(window):
+            await asyncio.sleep(delay)
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+@contextmanager
+def run_latency_proxy(target_port: int, rtt: float, window: int) -> Iterator[int]:
+    """Run a TCP proxy in a background thread that makes each connection behave like one over a high latency link.
+
+    Each connection sends at most a window of data per round trip, as a TCP connection whose window does not grow past
+    that size does, so a single connection's throughput is about window / rtt however fast the link is.
+
+    Args:
+        target_port: Port of the local server to forward connections to.
+        rtt: Round trip time to emulate in seconds.
+        window: Bytes each connection may send per round trip.
+
+    Yields:
+        The port the proxy listens on.
+    """
+    port = find_free_port()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    stop = asyncio.Event()
+    connections = set()
+
+    async def handle(client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        connections.add(asyncio.current_task())
+        server_reader, server_writer = await asyncio.open_connection("127.0.0.1", target_port)
+        try:
+            await asyncio.gather(pipe(client_reader, server_writer, rtt / 2, window),
+                                 pipe(server_reader, client_writer, rtt, window))
+        except asyncio.CancelledError:
+            # Connections still open when the proxy stops
+            client_writer.close()
+            server_writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", port)
+        started.set()
+        await stop.wait()
+        server.close()
+        for connection in connections:
+            connection.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait()
+    try:
+        yield port
+    finally:
+        loop.call_soon_threadsafe(stop.set)
+        thread.join()
+        loop.close()
+
+def main(connection_counts: List[int], size_mb: int, rtt_ms: float, window_kb: int):
+    """Compare the throughput of a large download over a high latency link fetched over different numbers of
+    connections with download_file_parallel.
+
+    Args:
+        connection_counts: Numbers of connections to benchmark.
+        size_mb: Size of the downloaded file in MiB.
+        rtt_ms: Round trip time added by the proxy in milliseconds.
+        window_kb: Bytes each connection may send per round trip in KiB.
+    """
+    with run_api_server() as base_url, tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        file_path = temp_dir / "upload.bin"
+        with open(file_path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(b"x" * (1024 * 1024))
+        with APIClient(base_url=base_url, error_logger_path=str(temp_dir / "errors.log")) as client:
+            file_id = client.upload_file(file_path).file_id
+
+        api_port = int(base_url.rsplit(":", 1)[1])
+        with run_latency_proxy(api_port, rtt_ms / 1000, window_kb * 1024) as proxy_port:
+            print(f"{'connections':>11} | {'time (s)':>8} | {'MiB/s':>7}")
+            for connections in connection_counts:
+                with APIClient(base_url=f"http://127.0.0.1:{proxy_port}", pool_size=max(connections, 1),
+                               error_logger_path=str(temp_dir / "errors.log")) as client:
+                    start = time.perf_counter()
+                    result = client.download_file_parallel(file_id, temp_dir / "download.bin", connections=connections)
+                    elapsed = time.perf_counter() - start
+                assert result.verified, result
+                print(f"{connections:>11} | {elapsed:>8.2f} | {size_mb / elapsed:>7.1f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel ranged downloads over an emulated high latency "
+                                                 "link.")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 4, 8, 16], help="Connections to benchmark.")
+    parser.add_argument("--size", type=int, default=32, help="Size of the downloaded file in MiB.")
+    parser.add_argument("--rtt", type=float, default=50, help="Round trip time to emulate in milliseconds.")
+    parser.add_argument("--window", type=int, default=256, help="Bytes each connection sends per round trip in KiB.")
+    args = parser.parse_args()
+
+    main(connection_counts=args.connections, size_mb=args.size, rtt_ms=args.rtt, window_kb=args.window)
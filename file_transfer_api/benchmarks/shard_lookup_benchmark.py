@@ -0,0 +1,93 @@
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from uuid import uuid4
+
+from benchmarks.benchmark_utils import percentile
+from src.file_manager import local_file_manager
+from src.file_manager.local_file_manager import LocalFileManager, get_shard_path
+
+
+def populate(directory: Path, file_count: int, depth: int, width: int) -> List[str]:
+    """Fill an upload directory with empty files in a sharded layout.
+
+    Args:
+        directory: Upload directory to fill.
+        file_count: Number of files to create.
+        depth: Number of shard directory levels.
+        width: Number of hex characters naming each level.
+
+    Returns:
+        IDs of the files created.
+    """
+    file_ids = [str(uuid4()) for _ in range(file_count)]
+    for file_id in file_ids:
+        file_location = directory / get_shard_path(file_id, depth, width)
+        file_location.parent.mkdir(parents=True, exist_ok=True)
+        file_location.touch()
+    return file_ids
+
+
+def time_lookups(file_manager: LocalFileManager, file_ids: List[str], lookups: int) -> List[float]:
+    """Time looking up random files the way a direct download does.
+
+    Args:
+        file_manager: File manager to look the files up with.
+        file_ids: IDs of the stored files.
+        lookups: Number of lookups to time.
+
+    Returns:
+        Time taken by each lookup in microseconds.
+    """
+    latencies = []
+    for file_id in random.choices(file_ids, k=lookups):
+        start = time.perf_counter()
+        file_manager.download_file(file_id)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def main(file_counts: List[int], depths: List[int], width: int, lookups: int):
+    """Compare file lookup latency and directory listing time for flat and sharded upload directories.
+
+    Results are for a warm page cache. Flat directories degrade most when their entries no longer fit in the dentry
+    cache, so run with file counts large enough for the host to see the full effect.
+
+    Args:
+        file_counts: Numbers of files to benchmark.
+        depths: Shard depths to benchmark, 0 being a flat directory.
+        width: Number of hex characters naming each shard directory level.
+        lookups: Number of lookups to time for each file count and depth.
+    """
+    print(f"{'files':>9} | {'depth':>5} | {'p50 (us)':>8} | {'p99 (us)':>8} | {'top-level listing (ms)':>22}")
+    for file_count in file_counts:
+        for depth in depths:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                local_file_manager.upload_path = Path(temp_dir)
+                file_ids = populate(Path(temp_dir), file_count, depth, width)
+                file_manager = LocalFileManager(shard_depth=depth, shard_width=width)
+
+                latencies = time_lookups(file_manager, file_ids, lookups)
+                start = time.perf_counter()
+                os.listdir(temp_dir)
+                listing = (time.perf_counter() - start) * 1e3
+
+            print(f"{file_count:>9} | {depth:>5} | {percentile(latencies, 50):>8.1f} | "
+                  f"{percentile(latencies, 99):>8.1f} | {listing:>22.2f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark file lookups in flat and sharded upload directories.")
+    parser.add_argument("--file-counts", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Numbers of files to store.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1, 2], help="Shard depths to compare.")
+    parser.add_argument("--width", type=int, default=2, help="Number of hex characters naming each level.")
+    parser.add_argument("--lookups", type=int, default=10000, help="Number of lookups to time.")
+    args = parser.parse_args()
+
+    main(file_counts=args.file_counts, depths=args.depths, width=args.width, lookups=args.lookups)
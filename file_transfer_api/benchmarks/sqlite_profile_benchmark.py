@@ -0,0 +1,87 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from src.database_manager.database_connection.local_database import SQLITE_PROFILES, Base, apply_sqlite_profile, \
+    get_pool_options
+from src.database_manager.local_database_manager import LocalDatabaseManager
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.exceptions.database_exceptions import DatabaseWriteError
+
+
+def write_records(profile: str, writers: int, records_per_writer: int) -> Tuple[float, int]:
+    """Create file records from several threads at once, each committing every record on its own.
+
+    Args:
+        profile: Name of the SQLite profile to apply.
+        writers: Number of threads writing at once.
+        records_per_writer: Number of records each thread creates.
+
+    Returns:
+        Time taken in seconds and the number of writes that failed, which with SQLite means the database was locked.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_url = f"sqlite:///{Path(temp_dir) / 'benchmark.db'}"
+        engine = create_engine(database_url, **get_pool_options(database_url))
+        apply_sqlite_profile(engine, profile)
+        Base.metadata.create_all(engine)
+        session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        failures: List[int] = []
+
+        def write():
+            failed = 0
+            with session_local() as session:
+                database_manager = LocalDatabaseManager(session)
+                for index in range(records_per_writer):
+                    try:
+                        database_manager.create_file_record(name=f"{index}.txt", file_id=str(uuid4()),
+                                                            content_type=ContentEnum.TEXT, size=1024)
+                    except (SQLAlchemyError, DatabaseWriteError):
+                        session.rollback()
+                        failed += 1
+            failures.append(failed)
+
+        threads = [threading.Thread(target=write) for _ in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        engine.dispose()
+    return seconds, sum(failures)
+
+
+def main(profiles: List[str], writers: int, records_per_writer: int):
+    """Compare commit throughput of the SQLite profiles with concurrent writers.
+
+    Args:
+        profiles: Names of the SQLite profiles to compare.
+        writers: Number of threads writing at once.
+        records_per_writer: Number of records each thread creates.
+    """
+    print(f"{'profile':>8} | {'time (s)':>8} | {'commits/s':>9} | {'locked errors':>13}")
+    for profile in profiles:
+        seconds, failed = write_records(profile, writers, records_per_writer)
+        commits = writers * records_per_writer - failed
+        print(f"{profile:>8} | {seconds:>8.2f} | {commits / seconds:>9.0f} | {failed:>13}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark concurrent SQLite writes with each SQLite profile.")
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES), choices=list(SQLITE_PROFILES),
+                        help="SQLite profiles to compare.")
+    parser.add_argument("--writers", type=int, default=8, help="Number of threads writing at once.")
+    parser.add_argument("--records", type=int, default=500, help="Number of records each thread creates.")
+    args = parser.parse_args()
+
+    main(profiles=args.profiles, writers=args.writers, records_per_writer=args.records)
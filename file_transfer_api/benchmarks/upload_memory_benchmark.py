@@ -0,0 +1,86 @@
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import IO, Callable, List
+
+from src.file_manager import local_file_manager
+from src.file_manager.local_file_manager import LocalFileManager
+
+
+def make_spooled_upload(size_mb: int, directory: Path) -> IO:
+    """Create an upload spool the same way Starlette does for an UploadFile.
+
+    Args:
+        size_mb: Size of the upload in MiB.
+        directory: Directory to spool the upload to once it outgrows memory.
+
+    Returns:
+        Spooled temporary file positioned at the start of the upload.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, dir=directory)
+    block = b"x" * (1024 * 1024)
+    for _ in range(size_mb):
+        spool.write(block)
+    spool.seek(0)
+    return spool
+
+
+def legacy_upload(file: IO) -> None:
+    """Upload the way LocalFileManager used to, holding the whole file in memory."""
+    with open(local_file_manager.upload_path / "legacy", "wb") as f:
+        f.write(file.read())
+
+
+def measure_peak_memory(upload: Callable[[IO], object], file: IO) -> float:
+    """Measure the peak memory allocated by Python while running an upload.
+
+    Args:
+        upload: Upload function to run.
+        file: File to upload.
+
+    Returns:
+        Peak allocated memory in MiB.
+    """
+    tracemalloc.start()
+    try:
+        upload(file)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main(sizes_mb: List[int], chunk_size: int):
+    """Compare peak memory per upload for the legacy and streaming upload paths.
+
+    Args:
+        sizes_mb: Upload sizes to benchmark in MiB.
+        chunk_size: Chunk size to use for the streaming upload in bytes.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        local_file_manager.upload_path = temp_dir
+        file_manager = LocalFileManager(chunk_size=chunk_size)
+
+        print(f"{'size (MiB)':>10} | {'legacy peak (MiB)':>17} | {'streaming peak (MiB)':>20}")
+        for size_mb in sizes_mb:
+            with make_spooled_upload(size_mb, temp_dir) as spool:
+                legacy_peak = measure_peak_memory(legacy_upload, spool)
+                spool.seek(0)
+                streaming_peak = measure_peak_memory(file_manager.upload_file, spool)
+            print(f"{size_mb:>10} | {legacy_peak:>17.2f} | {streaming_peak:>20.2f}")
+
+            for file in temp_dir.iterdir():
+                if file.is_file():
+                    file.unlink()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark peak memory used per upload.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256], help="Upload sizes in MiB.")
+    parser.add_argument("--chunk-size", type=int, default=1024 * 1024, help="Streaming chunk size in bytes.")
+    args = parser.parse_args()
+
+    main(sizes_mb=args.sizes, chunk_size=args.chunk_size)
@@ -0,0 +1,114 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database_manager.database_connection.local_database import Base, apply_sqlite_profile, get_pool_options
+from src.database_manager.local_database_manager import LocalDatabaseManager
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.utils.record_utils import get_bulk_insert_rows
+from src.database_manager.write_behind_queue import WriteBehindQueue
+
+
+def get_record() -> dict:
+    """Get the fields of a new file record with a unique file id"""
+    return {"name": "benchmark.txt", "file_id": str(uuid4()), "content_type": ContentEnum.TEXT, "size": 1024}
+
+
+def run_writers(writers: int, write: Callable[[], None], records_per_writer: int) -> float:
+    """Run a write function from several threads at once.
+
+    Args:
+        writers: Number of threads writing at once.
+        write: Function each thread calls once per record.
+        records_per_writer: Number of records each thread writes.
+
+    Returns:
+        Time taken in seconds.
+    """
+    def write_records():
+        for _ in range(records_per_writer):
+            write()
+
+    threads = [threading.Thread(target=write_records) for _ in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def time_commit_per_write(session_local: sessionmaker, writers: int, records_per_writer: int) -> float:
+    """Time creating records with create_file_record, which commits every record on its own"""
+    local = threading.local()
+
+    def write():
+        if not hasattr(local, "database_manager"):
+            local.database_manager = LocalDatabaseManager(session_local())
+        local.database_manager.create_file_record(**get_record())
+
+    return run_writers(writers, write, records_per_writer)
+
+
+def time_write_behind(session_local: sessionmaker, writers: int, records_per_writer: int, durable: bool) -> float:
+    """Time creating records through a write-behind queue, waiting for each commit if durable"""
+    write_queue = WriteBehindQueue(session_factory=session_local)
+
+    def write():
+        record = get_record()
+        future = write_queue.submit("create", [record["file_id"]], rows=get_bulk_insert_rows([record]))
+        if durable:
+            write_queue.flush()
+            future.result()
+
+    start = time.perf_counter()
+    run_writers(writers, write, records_per_writer)
+    # Queued writes only count once they are committed
+    write_queue.stop()
+    return time.perf_counter() - start
+
+
+def main(profile: str, writers: int, records_per_writer: int):
+    """Compare metadata write throughput of committing every write with committing them through the write-behind queue.
+
+    Args:
+        profile: SQLite profile to open the database with.
+        writers: Number of threads writing at once.
+        records_per_writer: Number of records each thread creates.
+    """
+    methods = {
+        "commit per write": lambda session_local: time_commit_per_write(session_local, writers, records_per_writer),
+        "write-behind, durable": lambda session_local: time_write_behind(session_local, writers, records_per_writer,
+                                                                         durable=True),
+        "write-behind": lambda session_local: time_write_behind(session_local, writers, records_per_writer,
+                                                                durable=False),
+    }
+    record_count = writers * records_per_writer
+    print(f"{'method':>22} | {'time (s)':>8} | {'records/s':>9}")
+    for method, time_method in methods.items():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database_url = f"sqlite:///{Path(temp_dir) / 'benchmark.db'}"
+            engine = create_engine(database_url, **get_pool_options(database_url))
+            apply_sqlite_profile(engine, profile)
+            Base.metadata.create_all(engine)
+            seconds = time_method(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+            engine.dispose()
+        print(f"{method:>22} | {seconds:>8.2f} | {record_count / seconds:>9.0f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark metadata writes with and without the write-behind queue.")
+    parser.add_argument("--profile", default="durable", help="SQLite profile to open the database with.")
+    parser.add_argument("--writers", type=int, default=8, help="Number of threads writing at once.")
+    parser.add_argument("--records", type=int, default=500, help="Number of records each thread creates.")
+    args = parser.parse_args()
+
+    main(profile=args.profile, writers=args.writers, records_per_writer=args.records)
@@ -23,3 +23,6 @@ response4 = client.delete_file(response1.file_id)
 
 # Delete the test file
 os.remove("test.txt")
+
+# Close the client's connections to the server
+client.close()
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+from typing import Dict
+
+from src.file_manager import local_file_manager
+from src.file_manager.local_file_manager import get_shard_path
+
+
+def reshard_uploads(directory: Path, depth: int, width: int, dry_run: bool = False) -> Dict[str, int]:
+    """Move every file in an upload directory to its path in a sharded layout.
+
+    Each file is renamed to its new path, which is atomic, so a file is always at exactly one of its paths and the API
+    can keep serving files while they are moved. A delete that looked the file up at its old path just before it was
+    moved fails as if the file did not exist and keeps its record, so it can be retried, rather than leaving the moved
+    file behind without one. The API only looks for files at their sharded path and at their flat path, so moving from
+    one sharded layout to another should be done with the API stopped.
+
+    Args:
+        directory: Upload directory to reshard.
+        depth: Number of directory levels to fan files out over, or 0 to move them back to a flat layout.
+        width: Number of hex characters naming each directory level.
+        dry_run: Whether to only count the files that would be moved. Defaults to False.
+
+    Returns:
+        The number of files moved, already in place and skipped because a different file is at their new path.
+    """
+    counts = {"moved": 0, "in_place": 0, "skipped": 0}
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            # Skip files that are still being written
+            if file_name.endswith(".tmp"):
+                continue
+            file_location = Path(root) / file_name
+            new_file_location = directory / get_shard_path(file_name, depth, width)
+            if file_location == new_file_location:
+                counts["in_place"] += 1
+                continue
+            if dry_run:
+                counts["moved"] += 1
+                continue
+
+            try:
+                new_file_location.parent.mkdir(parents=True, exist_ok=True)
+                if new_file_location.exists():
+                    if not os.path.samefile(file_location, new_file_location):
+                        counts["skipped"] += 1
+                        continue
+                    # Linked at both paths by an earlier version of this script that was interrupted
+                    file_location.unlink()
+                else:
+                    os.replace(file_location, new_file_location)
+            except FileNotFoundError:
+                # Deleted by the API since the directory was listed
+                continue
+            except OSError:
+                # A file is in the way of a shard directory
+                counts["skipped"] += 1
+                continue
+            counts["moved"] += 1
+    return counts
+
+
+def main(depth: int, width: int, dry_run: bool):
+    """Script to move the files in the upload directory to a sharded layout.
+
+    Args:
+        depth: Number of directory levels to fan files out over.
+        width: Number of hex characters naming each directory level.
+        dry_run: Whether to only count the files that would be moved.
+    """
+    print(f'Resharding {local_file_manager.upload_path} to depth {depth} and width {width}...')
+    counts = reshard_uploads(local_file_manager.upload_path, depth, width, dry_run=dry_run)
+    print(f'Files moved: {counts["moved"]}, already in place: {counts["in_place"]}, skipped: {counts["skipped"]}')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move the files in the upload directory to a sharded layout.")
+    parser.add_argument("--depth", type=int, default=local_file_manager.upload_shard_depth,
+                        help="Number of directory levels. Defaults to UPLOAD_SHARD_DEPTH.")
+    parser.add_argument("--width", type=int, default=local_file_manager.upload_shard_width,
+                        help="Number of hex characters naming each level. Defaults to UPLOAD_SHARD_WIDTH.")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the files that would be moved.")
+    args = parser.parse_args()
+
+    main(depth=args.depth, width=args.width, dry_run=args.dry_run)
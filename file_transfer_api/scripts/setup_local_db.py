@@ -2,7 +2,9 @@
 import os
 from dotenv import load_dotenv
 from src.database_manager.utils.database_utils import create_database_if_not_exists, create_tables
+from src.database_manager.utils.schema_utils import create_indexes, upgrade_table
 from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.file_manager.local_file_manager import LocalFileManager
 
 
 # TODO: Remove dependency on dotenv throughout the project
@@ -20,6 +22,21 @@ def main():
     outcome2 = create_tables(os.getenv("LOCAL_DATABASE_URL"), DatabaseEntry)
     print(f'Table Creation Outcome: {outcome2}')
 
+    # Add the columns tables from earlier versions lack, converting their sizes from kilobytes to bytes and filling in
+    # missing sizes from the stored files
+    file_manager = LocalFileManager()
+
+    def get_file_size(file_id):
+        file_location = file_manager.get_file_location(file_id)
+        return file_location.stat().st_size if file_location.exists() else None
+
+    added_columns = upgrade_table(os.getenv("LOCAL_DATABASE_URL"), DatabaseEntry.__table__, get_file_size)
+    print(f'Columns Added: {added_columns}')
+
+    # Create the listing indexes, which create_all only creates with new tables
+    indexes = create_indexes(os.getenv("LOCAL_DATABASE_URL"), DatabaseEntry.__table__)
+    print(f'Indexes Present: {indexes}')
+
 
 if __name__ == '__main__':
     # Run the script
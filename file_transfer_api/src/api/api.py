@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from src.api.routers.fastapi_router import router as fastapi_router
+from src.api.routers.metrics_router import router as metrics_router
 
 app = FastAPI()
 app.include_router(fastapi_router, prefix="/files")
+app.include_router(metrics_router, prefix="/metrics")
 
 
 @app.get("/")
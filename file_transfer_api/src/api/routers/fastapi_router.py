@@ -1,80 +1,504 @@
-from fastapi import APIRouter, File, UploadFile
-from fastapi.responses import FileResponse
+import asyncio
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Union
 
+from fastapi import APIRouter, Depends, File, Header, Query, Request, Response, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.file_manager.async_file_manager import AsyncFileManager
+from src.file_manager.blob_cache import blob_cache
+from src.file_manager.ingest_pipeline import IngestResult
 from src.file_manager.local_file_manager import LocalFileManager
+from src.file_manager.upload_session import upload_session_sweep_interval, upload_session_ttl
+from src.database_manager.abstract_database_manager import AbstractDatabaseManager
+from src.database_manager.async_local_database_manager import AsyncLocalDatabaseManager
+from src.database_manager.cached_database_manager import CachedDatabaseManager
+from src.database_manager.database_connection.local_database import (USE_ASYNC_DATABASE, SessionLocal,
+                                                                      get_async_db_session, get_async_session_local,
+                                                                      get_db_session)
 from src.database_manager.local_database_manager import LocalDatabaseManager
+from src.database_manager.metadata_cache import metadata_cache
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from src.database_manager.write_behind_database_manager import WriteBehindDatabaseManager
+from src.database_manager.write_behind_queue import WRITE_BEHIND, write_behind_queue
+from src.utils.concurrency_utils import database_executor, run_database_operation, run_in_executor
 
-from src.schemas.custom_responses import FileIdAndPath, CustomMessage
-from src.api.utils.api_utils import get_file_details
+from src.schemas.custom_requests import FileIds, NewFileNames
+from src.schemas.custom_responses import (BatchUploadFileResult, BatchUploadResult, BulkOperationResult, FileIdAndPath,
+                                         FileRecordPage, FileRecords, CustomMessage, UploadId, UploadPartDetails,
+                                         UploadStatus)
+from src.api.utils.api_utils import (accepts_content_encoding, batch_upload_max_files, get_file_details,
+                                     get_file_record_details, resolve_media_type)
+from src.api.utils.cache_utils import get_cache_headers
+from src.api.utils.file_responses import DecompressedFileResponse, ZeroCopyFileResponse
+from src.api.utils.pagination_utils import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
 
 from src.exceptions.custom_exception import BaseCustomException
 from src.exceptions.database_exceptions import DatabaseConnectionError
+from src.exceptions.file_exceptions import FileDoesNotExistError, InvalidBatchUploadError
 
 router = APIRouter()
-file_manager = LocalFileManager()
-database_manager = LocalDatabaseManager()
+file_manager = AsyncFileManager(LocalFileManager(blob_cache=blob_cache))
+upload_session_sweeper: Optional[asyncio.Task] = None
+
+# Form field the files of a batch upload are sent in
+BATCH_UPLOAD_FIELD = "files"
+
+# The batch upload form is parsed by the route itself, so its request body is described here for the API docs
+BATCH_UPLOAD_OPENAPI = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": [BATCH_UPLOAD_FIELD],
+    "properties": {BATCH_UPLOAD_FIELD: {"type": "array", "items": {"type": "string", "format": "binary"}}}}}}}}
+
+
+def get_local_database_manager(db: Session = Depends(get_db_session)) -> AbstractDatabaseManager:
+    """Dependency that provides a database manager with its own session for each request"""
+    return LocalDatabaseManager(db=db)
+
+
+def get_async_local_database_manager(db: AsyncSession = Depends(get_async_db_session)) -> AbstractDatabaseManager:
+    """Dependency that provides an async database manager with its own session for each request"""
+    return AsyncLocalDatabaseManager(db=db)
+
+
+get_uncached_database_manager = get_async_local_database_manager if USE_ASYNC_DATABASE else get_local_database_manager
+
+
+def get_database_manager(database_manager: AbstractDatabaseManager = Depends(get_uncached_database_manager),
+                         durable_write: bool = Header(default=False, alias="X-Durable-Write")
+                         ) -> AbstractDatabaseManager:
+    """Dependency that puts the shared metadata cache in front of the request's database manager.
+
+    The manager's session only checks out a connection on a cache miss or a write, so lookups answered from the cache
+    never touch the database, not even to pre-ping a pooled connection.
+
+    With WRITE_BEHIND set, metadata writes go through the shared write-behind queue, and only wait until they are
+    committed if the request sends an X-Durable-Write: true header.
+    """
+    if WRITE_BEHIND:
+        database_manager = WriteBehindDatabaseManager(database_manager, write_behind_queue, durable=durable_write,
+                                                      on_create_failure=discard_unrecorded_file)
+    return CachedDatabaseManager(database_manager)
+
+
+def discard_unrecorded_file(file_record: Dict[str, Any]):
+    """Delete a stored file whose record the write-behind queue could not create, and its cached record.
+
+    It runs on the queue's writer thread, which logs any error, so the blocking file manager is used.
+
+    Args:
+        file_record: Keyword arguments of create_file_record for the file.
+    """
+    metadata_cache.invalidate(file_record["file_id"])
+    file_manager.file_manager.delete_file(file_record["file_id"], file_record["checksum"],
+                                          file_record["content_encoding"])
 
 
 @router.on_event('startup')  # Only runs on startup
 async def on_start():
     # Test the database connection
-    if not database_manager.check_database_connection():
+    if USE_ASYNC_DATABASE:
+        async with get_async_session_local()() as db:
+            connected = await AsyncLocalDatabaseManager(db=db).check_database_connection()
+    else:
+        with SessionLocal() as db:
+            connected = await run_database_operation(LocalDatabaseManager(db=db).check_database_connection)
+    if not connected:
         print("Database connection failed")
         # Raise an exception if the database connection fails
         DatabaseConnectionError("Database connection failed").raise_as_http()
     else:
         print("Database connection successful")
 
+    # Discard multipart uploads that clients have abandoned
+    global upload_session_sweeper
+    upload_session_sweeper = asyncio.create_task(expire_upload_sessions_periodically())
+
+
+@router.on_event('shutdown')
+async def on_shutdown():
+    if upload_session_sweeper is not None:
+        upload_session_sweeper.cancel()
+
+    # Commit the metadata writes still queued, so that no upload is left without its record
+    await run_in_executor(database_executor, write_behind_queue.stop)
+
+
+async def expire_upload_sessions_periodically():
+    """Discard multipart uploads that have not received a part within UPLOAD_SESSION_TTL, every sweep interval"""
+    while True:
+        await asyncio.sleep(upload_session_sweep_interval)
+        try:
+            expired = await file_manager.expire_upload_sessions(upload_session_ttl)
+        except OSError as e:
+            print(f"Failed to expire upload sessions: {e}")
+            continue
+        if expired:
+            print(f"Expired {expired} upload sessions")
+
 
 @router.get("/")
-async def root() -> CustomMessage:
-    return CustomMessage(message="Welcome to the API")
+async def list_files(sort_by: Literal["created_timestamp", "name", "size"] = "created_timestamp",
+                     order: Literal["asc", "desc"] = "asc",
+                     limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                     cursor: Optional[str] = None,
+                     content_type: Optional[ContentEnum] = None,
+                     min_size: Optional[int] = Query(default=None, ge=0),
+                     max_size: Optional[int] = Query(default=None, ge=0),
+                     created_after: Optional[datetime] = None,
+                     created_before: Optional[datetime] = None,
+                     database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> FileRecordPage:
+    try:
+        # One more record than the page holds is read to tell whether there is a next page
+        query = FileRecordQuery(sort_by=sort_by, descending=order == "desc", limit=limit + 1,
+                                after=decode_cursor(cursor, sort_by) if cursor else None,
+                                content_type=content_type, min_size=min_size, max_size=max_size,
+                                created_after=created_after, created_before=created_before)
+        file_records = await run_database_operation(database_manager.list_file_records, query)
+
+        next_cursor = encode_cursor(file_records[limit - 1], sort_by) if len(file_records) > limit else None
+        return FileRecordPage(files=[get_file_record_details(file_record) for file_record in file_records[:limit]],
+                              next_cursor=next_cursor)
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+async def prepare_file_record(ingest_result: IngestResult, file_name: Optional[str],
+                              declared_content_type: Optional[str]) -> Dict[str, Any]:
+    """Compress a newly stored file if the compression policy calls for it and get the fields of its database record.
+
+    Args:
+        ingest_result: Details gathered while the file was written to storage.
+        file_name: Name of the file given by the client.
+        declared_content_type: Content type declared by the client.
+
+    Returns:
+        Keyword arguments of create_file_record for the file.
+    """
+    file_details = get_file_details(file_name, declared_content_type, ingest_result)
+    file_id = ingest_result.file_path.name
+
+    media_type = resolve_media_type(file_name, declared_content_type, ingest_result.sniffed_content_type)
+
+    # The content type decides whether the file is compressed at rest, so it can only be done once it is resolved
+    try:
+        compression_result = await file_manager.compress_file(file_id, ingest_result.checksum,
+                                                              file_details["content_type"], ingest_result.size,
+                                                              media_type)
+    except Exception:
+        # The file is still stored as it was uploaded, and without a record it could never be downloaded
+        await discard_file({"file_id": file_id, **file_details, "content_encoding": None})
+        raise
+    return {"file_id": file_id, **file_details, **asdict(compression_result)}
+
+
+async def record_file(ingest_result: IngestResult, file_name: Optional[str], declared_content_type: Optional[str],
+                      database_manager: AbstractDatabaseManager) -> FileIdAndPath:
+    """Compress a newly stored file if the compression policy calls for it and create its database record.
+
+    Args:
+        ingest_result: Details gathered while the file was written to storage.
+        file_name: Name of the file given by the client.
+        declared_content_type: Content type declared by the client.
+        database_manager: Database manager to create the record with.
+
+    Returns:
+        The file's id and path.
+    """
+    file_record = await prepare_file_record(ingest_result, file_name, declared_content_type)
+
+    # Create a database record, discarding the stored file if it cannot be, as it could never be downloaded
+    try:
+        await run_database_operation(database_manager.create_file_record, **file_record)
+    except Exception:
+        await discard_file(file_record)
+        raise
+    return FileIdAndPath(file_id=file_record["file_id"], file_path=ingest_result.file_path)
+
+
+async def store_batch_file(file: UploadFile) -> Union[Dict[str, Any], BatchUploadFileResult]:
+    """Write one file of a batch upload to storage and get the fields of its database record.
+
+    Args:
+        file: File to store.
+
+    Returns:
+        Keyword arguments of create_file_record for the file, or a failed result if it could not be stored.
+    """
+    try:
+        ingest_result = await file_manager.ingest_file(file.file)
+        return await prepare_file_record(ingest_result, file.filename, file.content_type)
+    except BaseCustomException as e:
+        return get_failed_batch_result(file.filename, e)
+
+
+def get_failed_batch_result(file_name: Optional[str], exception: BaseCustomException) -> BatchUploadFileResult:
+    """Get the result of a file of a batch upload that failed.
+
+    Args:
+        file_name: Name of the file.
+        exception: Error the file failed with.
+
+    Returns:
+        The file's result, with the error's status code and message.
+    """
+    return BatchUploadFileResult(file_name=file_name, status_code=exception.status_code,
+                                 message=f'{exception.__class__.__name__}: {exception.description}')
 
 
 @router.post("/")
-async def upload_file(file: UploadFile = File(...)) -> FileIdAndPath:
+async def upload_file(file: UploadFile = File(...),
+                      database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> FileIdAndPath:
     try:
-        file_path = file_manager.upload_file(file.file)
-        file_details = get_file_details(file)
+        # Write the file and gather its size, checksum and content type in a single pass
+        ingest_result = await file_manager.ingest_file(file.file)
+        return await record_file(ingest_result, file.filename, file.content_type, database_manager)
+    except BaseCustomException as e:
+        e.raise_as_http()
 
-        file_id = file_path.name
 
-        # Create a database record
-        database_manager.create_file_record(file_id=file_id, **file_details)
+@router.post("/batch", openapi_extra=BATCH_UPLOAD_OPENAPI)
+async def upload_files(request: Request,
+                       database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> BatchUploadResult:
+    try:
+        # The form is parsed here rather than with File(...) so that batches can exceed Starlette's limit of 1000 files
+        async with request.form(max_files=batch_upload_max_files) as form:
+            files = [file for file in form.getlist(BATCH_UPLOAD_FIELD) if not isinstance(file, str)]
+            if not files:
+                raise InvalidBatchUploadError(f'A batch upload must send at least one file in the '
+                                              f'"{BATCH_UPLOAD_FIELD}" field')
 
-        return FileIdAndPath(file_id=file_id, file_path=file_path)
+            # Files are written to storage concurrently, as far as the IO thread pool allows
+            results = await asyncio.gather(*[store_batch_file(file) for file in files])
+
+        # The records of every stored file are created in a single transaction
+        file_records = [result for result in results if isinstance(result, dict)]
+        try:
+            await run_database_operation(database_manager.bulk_create_file_records, file_records)
+        except BaseCustomException as e:
+            # None of the records were created, so the stored files could never be downloaded
+            for file_record in file_records:
+                await discard_file(file_record)
+            results = [get_failed_batch_result(result["name"], e) if isinstance(result, dict) else result
+                       for result in results]
+
+        files = [BatchUploadFileResult(file_name=result["name"], status_code=200, file_id=result["file_id"])
+                 if isinstance(result, dict) else result for result in results]
+        uploaded = sum(result.status_code == 200 for result in files)
+        return BatchUploadResult(uploaded=uploaded, failed=len(files) - uploaded, files=files)
     except BaseCustomException as e:
         e.raise_as_http()
 
 
-@router.get("/{file_id}")
-async def download_file(file_id: str) -> FileResponse:
+async def discard_file(file_record: Dict[str, Any]):
+    """Delete a stored file whose database record could not be created.
+
+    Args:
+        file_record: Keyword arguments of create_file_record for the file.
+    """
+    try:
+        await file_manager.delete_file(file_record["file_id"], file_record["checksum"],
+                                       file_record["content_encoding"])
+    except BaseCustomException as e:
+        print(f"Failed to discard file {file_record['file_id']}: {e.description}")
+
+
+@router.post("/bulk/get")
+async def get_file_records(request_body: FileIds,
+                           database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> FileRecords:
     try:
-        file_str = file_manager.download_file(file_id)
-        # No database operation required
-        return FileResponse(file_str)
+        file_records = await run_database_operation(database_manager.bulk_get_file_records, request_body.file_ids)
+        return FileRecords(files=[get_file_record_details(file_record) for file_record in file_records],
+                           missing=get_missing_file_ids(request_body.file_ids, file_records))
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.post("/bulk/rename")
+async def rename_files(request_body: NewFileNames,
+                       database_manager: AbstractDatabaseManager = Depends(get_database_manager)
+                       ) -> BulkOperationResult:
+    try:
+        # No file manager operation required
+        file_records = await run_database_operation(database_manager.bulk_get_file_records,
+                                                    list(request_body.new_names))
+        new_names = {file_record.file_id: request_body.new_names[file_record.file_id] for file_record in file_records}
+        missing_file_ids = get_missing_file_ids(list(request_body.new_names), file_records)
+
+        renamed_count = await run_database_operation(database_manager.bulk_rename_file_records, new_names)
+        return BulkOperationResult(succeeded=renamed_count, missing=missing_file_ids, failed=[])
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.post("/bulk/delete")
+async def delete_files(request_body: FileIds,
+                       database_manager: AbstractDatabaseManager = Depends(get_database_manager)
+                       ) -> BulkOperationResult:
+    try:
+        file_records = await run_database_operation(database_manager.bulk_get_file_records, request_body.file_ids)
+
+        # As for a single delete, the stored content goes first and only the records of files that are gone are deleted
+        deleted = await asyncio.gather(*[delete_stored_file(file_record) for file_record in file_records])
+        deleted_file_ids = [file_record.file_id for file_record, is_deleted in zip(file_records, deleted) if is_deleted]
+        failed_file_ids = [file_record.file_id for file_record, is_deleted in zip(file_records, deleted)
+                           if not is_deleted]
+        missing_file_ids = get_missing_file_ids(request_body.file_ids, file_records)
+
+        deleted_count = await run_database_operation(database_manager.bulk_delete_file_records, deleted_file_ids)
+        return BulkOperationResult(succeeded=deleted_count, missing=missing_file_ids, failed=failed_file_ids)
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+def get_missing_file_ids(file_ids: List[str], file_records: List[DatabaseEntry]) -> List[str]:
+    """Get the requested file ids that have no file record.
+
+    Args:
+        file_ids: File ids requested.
+        file_records: File records found.
+
+    Returns:
+        The file ids without a record, in the order they were requested.
+    """
+    found_file_ids = {file_record.file_id for file_record in file_records}
+    return [file_id for file_id in dict.fromkeys(file_ids) if file_id not in found_file_ids]
+
+
+async def delete_stored_file(file_record: DatabaseEntry) -> bool:
+    """Delete the stored content of a file, as part of a bulk delete.
+
+    Args:
+        file_record: Record of the file to delete.
+
+    Returns:
+        True if the file is no longer stored, or False if it could not be deleted.
+    """
+    try:
+        await file_manager.delete_file(file_record.file_id, file_record.checksum, file_record.content_encoding)
+    except FileDoesNotExistError:
+        # Already gone, so only its record is left to delete
+        pass
+    except BaseCustomException as e:
+        print(f"Failed to delete file {file_record.file_id}: {e.description}")
+        return False
+    return True
+
+
+@router.post("/uploads")
+async def create_upload(file_name: Optional[str] = None, content_type: Optional[str] = None) -> UploadId:
+    try:
+        upload_id = await file_manager.create_upload_session(file_name, content_type)
+        return UploadId(upload_id=upload_id)
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.put("/uploads/{upload_id}/parts/{part_number}")
+async def upload_part(upload_id: str, part_number: int, request: Request) -> UploadPartDetails:
+    try:
+        # The part is the raw request body, so clients can send parts in parallel and retry only the ones that fail.
+        # It is streamed straight into the upload session rather than spooled first, so it is only written once.
+        part = await file_manager.upload_part_stream(upload_id, part_number, request.stream())
+        return UploadPartDetails(**asdict(part))
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str) -> UploadStatus:
+    try:
+        session = await file_manager.get_upload_session(upload_id)
+        return UploadStatus(upload_id=upload_id, parts=[UploadPartDetails(**asdict(part)) for part in session.parts])
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str,
+                          database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> FileIdAndPath:
+    try:
+        session = await file_manager.get_upload_session(upload_id)
+
+        # Assemble the parts in order, gathering the size, checksum and content type of the whole file
+        ingest_result = await file_manager.complete_upload(upload_id)
+        file_id_and_path = await record_file(ingest_result, session.file_name, session.content_type, database_manager)
+
+        # The parts are only deleted once the file is recorded, so that a failed completion can be retried
+        await file_manager.end_upload(upload_id)
+        return file_id_and_path
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str) -> CustomMessage:
+    try:
+        await file_manager.abort_upload(upload_id)
+        return CustomMessage(message=f"Upload {upload_id} aborted")
+    except BaseCustomException as e:
+        e.raise_as_http()
+
+
+@router.api_route("/{file_id}", methods=["GET", "HEAD"])
+async def download_file(file_id: str, request: Request,
+                        database_manager: AbstractDatabaseManager = Depends(get_database_manager)
+                        ) -> Response:
+    try:
+        # The record provides the checksum and timestamp used to validate cached copies
+        file_record = await run_database_operation(database_manager.get_file_record, file_id)
+        # The session is only closed after the body is sent, so its connection is returned to the pool before streaming
+        await run_database_operation(database_manager.close)
+
+        # Files stored compressed are sent as they are to clients that accept the encoding and decompressed otherwise
+        content_encoding = file_record.content_encoding
+        if content_encoding and not accepts_content_encoding(request.headers.get("accept-encoding"), content_encoding):
+            file_str = await file_manager.download_file(file_id)
+            return DecompressedFileResponse(file_str, content_encoding, file_record.size, method=request.method,
+                                            headers=get_cache_headers(file_record))
+        headers = get_cache_headers(file_record, content_encoding)
+
+        # Hot small files are served from memory, and files too large to cache are not opened to check
+        stored_size = file_record.stored_size if file_record.stored_size is not None else file_record.size
+        cached_blob = await file_manager.read_cached_file(file_id, stored_size)
+        if cached_blob is not None:
+            return ZeroCopyFileResponse(file_id, method=request.method, headers=headers, cached_blob=cached_blob)
+
+        file_str = await file_manager.download_file(file_id)
+
+        # Conditional, Range and If-Range headers are handled by the response
+        return ZeroCopyFileResponse(file_str, method=request.method, headers=headers)
     except BaseCustomException as e:
         e.raise_as_http()
 
 
 @router.put("/{file_id}")
-async def rename_file(file_id: str, new_file_name: str) -> FileIdAndPath:
+async def rename_file(file_id: str, new_file_name: str,
+                      database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> FileIdAndPath:
     try:
         # No file manager operation required
         # Update the database record
-        database_manager.rename_file_record(file_id, new_file_name)
+        await run_database_operation(database_manager.rename_file_record, file_id, new_file_name)
         return FileIdAndPath(file_id=file_id)
     except BaseCustomException as e:
         e.raise_as_http()
 
 
 @router.delete("/{file_id}")
-async def delete_file(file_id: str) -> FileIdAndPath:
+async def delete_file(file_id: str,
+                      database_manager: AbstractDatabaseManager = Depends(get_database_manager)) -> FileIdAndPath:
     try:
-        file_manager.delete_file(file_id)
+        # The checksum identifies the stored content, which is only deleted with the last file that shares it
+        file_record = await run_database_operation(database_manager.get_file_record, file_id)
+        # The session is only closed after the body is sent, so its connection is returned to the pool before streaming
+        await run_database_operation(database_manager.close)
+        await file_manager.delete_file(file_id, file_record.checksum, file_record.content_encoding)
 
         # Delete the database record
-        database_manager.delete_file_record(file_id)
+        await run_database_operation(database_manager.delete_file_record, file_id)
         return FileIdAndPath(file_id=file_id)
     except BaseCustomException as e:
         e.raise_as_http()
@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+
+from src.database_manager.database_connection.local_database import get_pool_status
+from src.database_manager.metadata_cache import metadata_cache
+from src.file_manager.blob_cache import blob_cache
+from src.file_manager.local_file_manager import get_storage_stats
+from src.schemas.custom_responses import BlobCacheStatus, MetadataCacheStatus, PoolStatus, StorageStatus
+from src.utils.concurrency_utils import io_executor, run_in_executor
+
+router = APIRouter()
+
+
+@router.get("/database-pool")
+async def database_pool() -> PoolStatus:
+    return PoolStatus(**get_pool_status())
+
+
+@router.get("/blob-cache")
+async def blob_cache_status() -> BlobCacheStatus:
+    return BlobCacheStatus(**blob_cache.get_stats())
+
+
+@router.get("/metadata-cache")
+async def metadata_cache_status() -> MetadataCacheStatus:
+    return MetadataCacheStatus(**metadata_cache.get_stats())
+
+
+@router.get("/storage")
+async def storage_status() -> StorageStatus:
+    # Counting the blobs stats every file in the blob store, so it runs off the event loop
+    return StorageStatus(**await run_in_executor(io_executor, get_storage_stats))
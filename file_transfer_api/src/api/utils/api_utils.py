@@ -1,45 +1,94 @@
 import mimetypes
-from typing import IO, Union, Dict, Any
+import os
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
 from fastapi import UploadFile, File
 
 from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.file_manager.ingest_pipeline import IngestResult
+from src.schemas.custom_responses import FileRecordDetails
 
+load_dotenv()
+batch_upload_max_files = int(os.getenv("BATCH_UPLOAD_MAX_FILES", default=10000))  # Most files in one batch upload
 
-def get_file_details(file: UploadFile = File(...)) -> Dict[str, Any]:
+# Content type sent by clients that do not know what they are uploading
+GENERIC_CONTENT_TYPE = "application/octet-stream"
+
+
+def get_file_details(file_name: Optional[str], declared_content_type: Optional[str],
+                     ingest_result: IngestResult) -> Dict[str, Any]:
     """Get metadata from a file.
 
     Args:
-        file: File to get metadata from. Defaults to File(...) but will largely be images.
+        file_name: Name of the file given by the client.
+        declared_content_type: Content type declared by the client.
+        ingest_result: Details gathered while the file was written to storage.
 
     Returns:
         Details from the file.
     """
-    file_details = {
-        "name": file.filename,
-        "content_type": ContentEnum.from_str(file.content_type) if file.content_type else None,
-        "size": get_file_size(file.file),
+    return {
+        "name": file_name,
+        "content_type": resolve_content_type(file_name, declared_content_type, ingest_result.sniffed_content_type),
+        "size": ingest_result.size,
+        "checksum": ingest_result.checksum,
     }
-    if file_details["content_type"] is None:
-        print(f'Guessing content type for {file_details["name"]}')
-        file_details["content_type"] = ContentEnum.from_str(mimetypes.guess_type(file_details["name"])[0])
 
-    return file_details
 
+def get_file_record_details(file_record: DatabaseEntry) -> FileRecordDetails:
+    """Get the metadata of a file to send to clients.
+
+    Args:
+        file_record: File record to get the metadata from.
+
+    Returns:
+        The file's metadata.
+    """
+    return FileRecordDetails(file_id=file_record.file_id, name=file_record.name,
+                             content_type=file_record.content_type.value, size=file_record.size,
+                             checksum=file_record.checksum, created_timestamp=file_record.created_timestamp,
+                             last_modified_timestamp=file_record.last_modified_timestamp)
+
+
+def resolve_media_type(file_name: Optional[str], declared_content_type: Optional[str],
+                       sniffed_content_type: Optional[str]) -> Optional[str]:
+    """Resolve the media type of a file, e.g. "application/zip".
 
-def get_file_size(file: IO) -> Union[int, float]:
-    """Get the size of a file.
+    The media type sniffed from the file's magic number is preferred, followed by the media type declared by the
+    client and finally a guess from the file name.
 
     Args:
-        file: File to get size of.
+        file_name: Name of the file.
+        declared_content_type: Content type declared by the client.
+        sniffed_content_type: Content type sniffed from the start of the file.
 
     Returns:
-        Size of the file in KB.
+        Media type, or None if nothing is known about the file.
     """
-    file.seek(0, 2)  # Seek to the end of the file
-    file_size = round(file.tell() / 1024.0, 2)  # Get the file size in KB
-    file.seek(0)  # Seek back to the start of the file
+    if sniffed_content_type:
+        return sniffed_content_type
+    if declared_content_type and declared_content_type != GENERIC_CONTENT_TYPE:
+        return declared_content_type
+
+    guessed_content_type = mimetypes.guess_type(file_name)[0] if file_name else None
+    return guessed_content_type or declared_content_type
+
+
+def resolve_content_type(file_name: Optional[str], declared_content_type: Optional[str],
+                         sniffed_content_type: Optional[str]) -> ContentEnum:
+    """Resolve the content type of a file from its media type.
 
-    return file_size
+    Args:
+        file_name: Name of the file.
+        declared_content_type: Content type declared by the client.
+        sniffed_content_type: Content type sniffed from the start of the file.
+
+    Returns:
+        Content type enum.
+    """
+    media_type = resolve_media_type(file_name, declared_content_type, sniffed_content_type)
+    return ContentEnum.from_str(media_type) if media_type else ContentEnum.OTHER
 
 
 def guess_file_extension(file: UploadFile = File(...)) -> str:
@@ -52,3 +101,37 @@ def guess_file_extension(file: UploadFile = File(...)) -> str:
         File extension.
     """
     return mimetypes.guess_extension(file.content_type)
+
+
+def accepts_content_encoding(accept_encoding: Optional[str], content_encoding: str) -> bool:
+    """Check whether a client accepts a content encoding.
+
+    Clients that send no Accept-Encoding header are taken to want the original content, as most clients that do not
+    send one cannot decompress a response.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding header, e.g. "gzip, deflate;q=0.5".
+        content_encoding: Content encoding to check, e.g. "gzip".
+
+    Returns:
+        True if the client accepts the encoding.
+    """
+    if not accept_encoding:
+        return False
+    wildcard_accepted = False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == content_encoding:
+            return quality > 0
+        if name == "*":
+            wildcard_accepted = quality > 0
+    return wildcard_accepted
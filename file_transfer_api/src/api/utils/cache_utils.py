@@ -0,0 +1,85 @@
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from src.database_manager.schemas.database_entry import DatabaseEntry
+
+load_dotenv()
+cache_max_age = int(os.getenv("DOWNLOAD_CACHE_MAX_AGE", default=365 * 24 * 60 * 60))  # Seconds, defaults to a year
+
+
+def get_cache_headers(file_record: DatabaseEntry, content_encoding: Optional[str] = None) -> Dict[str, str]:
+    """Get the caching headers for a download.
+
+    A stored file never changes for a given file id, so it can be cached indefinitely. The entity tag is the checksum
+    of the contents, which makes it a strong validator. Files stored compressed have two representations, so the
+    response varies on Accept-Encoding and the compressed one gets its own entity tag. Last-Modified is the time the
+    file was uploaded, as renaming a file changes its record but not its content.
+
+    Args:
+        file_record: Database record of the file.
+        content_encoding: Encoding the file is sent with. Defaults to None, i.e. the original content is sent.
+
+    Returns:
+        Cache-Control, Last-Modified and, if the checksum is known, ETag headers, along with Content-Encoding and Vary
+        headers as needed.
+    """
+    headers = {
+        "cache-control": f"public, max-age={cache_max_age}, immutable",
+        "last-modified": format_http_date(file_record.created_timestamp),
+    }
+    if file_record.checksum:
+        headers["etag"] = f'"{file_record.checksum}-{content_encoding}"' if content_encoding \
+            else f'"{file_record.checksum}"'
+    if file_record.content_encoding:
+        headers["vary"] = "Accept-Encoding"
+    if content_encoding:
+        headers["content-encoding"] = content_encoding
+    return headers
+
+
+def format_http_date(timestamp: datetime) -> str:
+    """Format a timestamp as an HTTP date.
+
+    Args:
+        timestamp: Timestamp to format. Naive timestamps are taken to be in local time, as they are recorded.
+
+    Returns:
+        The timestamp as an HTTP date, e.g. "Fri, 01 Jan 2021 00:00:00 GMT".
+    """
+    return format_datetime(timestamp.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(if_none_match: Optional[str], if_modified_since: Optional[str], etag: Optional[str],
+                    last_modified: Optional[str]) -> bool:
+    """Check whether a conditional GET can be answered with 304 Not Modified.
+
+    If-None-Match takes precedence over If-Modified-Since, as RFC 9110 requires.
+
+    Args:
+        if_none_match: Value of the If-None-Match header.
+        if_modified_since: Value of the If-Modified-Since header.
+        etag: Current entity tag of the file.
+        last_modified: Current Last-Modified HTTP date of the file.
+
+    Returns:
+        True if the client's cached copy is still current.
+    """
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        if etag is None:
+            return False
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        client_etags = {client_etag.strip().removeprefix("W/") for client_etag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in client_etags
+
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
@@ -0,0 +1,306 @@
+import os
+import stat
+from contextlib import asynccontextmanager
+from mimetypes import guess_type
+from secrets import token_hex
+from typing import AsyncIterator, List, Mapping, Optional, Tuple, Union
+
+import anyio
+from fastapi.responses import FileResponse, Response
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+from src.file_manager.blob_cache import CachedBlob
+from src.file_manager.compression import iter_decompressed
+
+from src.api.utils.cache_utils import is_not_modified
+from src.api.utils.range_utils import if_range_matches, parse_range_header
+from src.exceptions.file_exceptions import FileRangeNotSatisfiableError
+
+# ASGI extensions that let the server send a file with sendfile instead of streaming it through the application
+PATHSEND_EXTENSION = "http.response.pathsend"
+ZEROCOPYSEND_EXTENSION = "http.response.zerocopysend"
+
+# Headers that a 304 Not Modified response repeats from the full response
+NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "date", "etag", "expires", "last-modified", "vary")
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """File response that hands the file to the ASGI server to send with the kernel's zero-copy sendfile path.
+
+    Servers advertise this with the "http.response.pathsend" or "http.response.zerocopysend" ASGI extensions. When the
+    server supports neither, the file is streamed in chunks as FileResponse does.
+
+    GET requests with a Range header are answered with 206 Partial Content, using a multipart/byteranges body when
+    more than one range is requested. If-Range is honoured against the response's ETag and Last-Modified headers, and
+    conditional requests whose If-None-Match or If-Modified-Since still match are answered with 304 Not Modified.
+
+    Small files held in the blob cache are sent from memory instead, with no disk access at all.
+    """
+
+    def __init__(self, *args, cached_blob: Optional[CachedBlob] = None, **kwargs):
+        """Initialise the response.
+
+        Args:
+            *args: Positional arguments for FileResponse, starting with the path of the file.
+            cached_blob: Contents of the file held in memory. If given, the body is sent from memory and its stat
+                result is used for the headers. Defaults to None.
+            **kwargs: Keyword arguments for FileResponse.
+        """
+        if cached_blob is not None:
+            kwargs["stat_result"] = cached_blob.stat_result
+        super().__init__(*args, **kwargs)
+        self.content = None if cached_blob is None else cached_blob.content
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        has_etag = "etag" in self.headers
+        super().set_stat_headers(stat_result)
+        self.headers["accept-ranges"] = "bytes"
+        # Entity tags must be quoted for If-Range and If-None-Match comparisons to work
+        etag = self.headers["etag"]
+        if not etag.startswith(('"', 'W/"')):
+            etag = f'"{etag}"'
+        # Starlette's own entity tag only hashes the modification time and size, so it is marked weak to keep clients
+        # from taking it for a checksum of the content
+        self.headers["etag"] = etag if has_etag or etag.startswith("W/") else f"W/{etag}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.stat_result = stat_result
+        self.set_stat_headers(self.stat_result)
+        file_size = self.stat_result.st_size
+
+        request_headers = Headers(scope=scope)
+        if self.status_code == 200 and is_not_modified(request_headers.get("if-none-match"),
+                                                       request_headers.get("if-modified-since"),
+                                                       self.headers.get("etag"), self.headers.get("last-modified")):
+            await send_not_modified(send, self.raw_headers)
+            return
+
+        try:
+            ranges = self.get_requested_ranges(request_headers, file_size)
+        except FileRangeNotSatisfiableError:
+            await self.send_range_not_satisfiable(send, file_size)
+            return
+
+        if ranges is None:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if self.send_header_only:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            else:
+                await self.send_file(scope, send, 0, file_size)
+        elif len(ranges) == 1:
+            await self.send_single_range(scope, send, ranges[0], file_size)
+        else:
+            await self.send_multiple_ranges(send, ranges, file_size)
+
+        if self.background is not None:
+            await self.background()
+
+    def get_requested_ranges(self, request_headers: Headers, file_size: int) -> Optional[List[Tuple[int, int]]]:
+        """Get the byte ranges requested by a GET request.
+
+        Args:
+            request_headers: Headers of the request.
+            file_size: Size of the file in bytes.
+
+        Returns:
+            List of (start, end) byte ranges, where end is inclusive, or None if the whole file should be sent.
+
+        Raises:
+            FileRangeNotSatisfiableError: If none of the requested ranges overlap the file.
+        """
+        if self.send_header_only or self.status_code != 200:
+            return None
+        if not if_range_matches(request_headers.get("if-range"), self.headers.get("etag"),
+                                self.headers.get("last-modified")):
+            return None
+        return parse_range_header(request_headers.get("range"), file_size)
+
+    async def send_range_not_satisfiable(self, send: Send, file_size: int):
+        """Send a 416 response for a request whose ranges do not overlap the file.
+
+        Args:
+            send: ASGI send function.
+            file_size: Size of the file in bytes.
+        """
+        headers = [(b"content-range", f"bytes */{file_size}".encode("latin-1")), (b"content-length", b"0")]
+        await send({"type": "http.response.start", "status": 416, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send_single_range(self, scope: Scope, send: Send, byte_range: Tuple[int, int], file_size: int):
+        """Send a 206 response with a single range of the file.
+
+        Args:
+            scope: ASGI scope of the request.
+            send: ASGI send function.
+            byte_range: (start, end) byte range to send, where end is inclusive.
+            file_size: Size of the file in bytes.
+        """
+        start, end = byte_range
+        self.headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+        self.headers["content-length"] = str(end - start + 1)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+        await self.send_file(scope, send, start, end - start + 1)
+
+    async def send_multiple_ranges(self, send: Send, ranges: List[Tuple[int, int]], file_size: int):
+        """Send a 206 response with several ranges of the file as a multipart/byteranges body.
+
+        Args:
+            send: ASGI send function.
+            ranges: (start, end) byte ranges to send, where end is inclusive.
+            file_size: Size of the file in bytes.
+        """
+        boundary = token_hex(16)
+        part_headers = [
+            (f"--{boundary}\r\ncontent-type: {self.media_type}\r\n"
+             f"content-range: bytes {start}-{end}/{file_size}\r\n\r\n").encode("latin-1")
+            for start, end in ranges]
+        closing_boundary = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = (sum(len(part_header) + (end - start + 1) + 2
+                              for part_header, (start, end) in zip(part_headers, ranges)) + len(closing_boundary))
+
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length)
+        await send({"type": "http.response.start", "status": 206, "headers": self.raw_headers})
+
+        async with self.open_file() as file:
+            for part_header, (start, end) in zip(part_headers, ranges):
+                await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                await self.stream_file(file, send, start, end - start + 1, more_body=True)
+                await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        await send({"type": "http.response.body", "body": closing_boundary, "more_body": False})
+
+    async def send_file(self, scope: Scope, send: Send, offset: int, count: int):
+        """Send part of the file as the response body, with sendfile if the server supports it.
+
+        Args:
+            scope: ASGI scope of the request.
+            send: ASGI send function.
+            offset: Byte offset to start sending from.
+            count: Number of bytes to send.
+        """
+        extensions = scope.get("extensions") or {}
+        if self.content is not None:
+            await self.stream_file(None, send, offset, count, more_body=False)
+        elif PATHSEND_EXTENSION in extensions and offset == 0 and count == self.stat_result.st_size:
+            await send({"type": PATHSEND_EXTENSION, "path": str(self.path)})
+        elif ZEROCOPYSEND_EXTENSION in extensions:
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                message = {"type": ZEROCOPYSEND_EXTENSION, "file": file, "count": count}
+                if offset:
+                    message["offset"] = offset
+                await send(message)
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+        else:
+            async with self.open_file() as file:
+                await self.stream_file(file, send, offset, count, more_body=False)
+
+    @asynccontextmanager
+    async def open_file(self) -> AsyncIterator[Optional[anyio.AsyncFile]]:
+        """Open the file to stream the body from.
+
+        Yields:
+            The open async file, or None if the body is sent from memory.
+        """
+        if self.content is not None:
+            yield None
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                yield file
+
+    async def stream_file(self, file, send: Send, offset: int, count: int, more_body: bool):
+        """Stream part of an open file as response body chunks.
+
+        Args:
+            file: Open async file to read from, or None if the body is sent from memory.
+            send: ASGI send function.
+            offset: Byte offset to start reading from.
+            count: Number of bytes to send.
+            more_body: Whether more of the body follows this part.
+        """
+        if file is None:
+            await send({"type": "http.response.body", "body": self.content[offset:offset + count],
+                        "more_body": more_body})
+            return
+        await file.seek(offset)
+        remaining = count
+        while True:
+            chunk = await file.read(min(self.chunk_size, remaining)) if remaining > 0 else b""
+            remaining -= len(chunk)
+            last_chunk = remaining <= 0 or not chunk
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body or not last_chunk})
+            if last_chunk:
+                break
+
+
+class DecompressedFileResponse(Response):
+    """Response that streams a file stored compressed, decompressing it for clients that do not accept its encoding.
+
+    The decompressed content is only produced by reading the file from the start, so Range requests are not supported
+    and the whole file is always sent. Conditional requests are answered with 304 Not Modified as usual.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"], content_encoding: str, size: int,
+                 headers: Optional[Mapping[str, str]] = None, media_type: Optional[str] = None,
+                 method: Optional[str] = None):
+        """Initialise the response.
+
+        Args:
+            path: Path of the compressed file.
+            content_encoding: Encoding the file is stored with.
+            size: Size of the original content in bytes.
+            headers: Headers to send with the response. Defaults to None.
+            media_type: Media type of the response. Defaults to a guess from the path.
+            method: Method of the request. HEAD requests are sent the headers only. Defaults to None.
+        """
+        self.path = path
+        self.content_encoding = content_encoding
+        self.status_code = 200
+        self.media_type = media_type or guess_type(str(path))[0] or "text/plain"
+        self.background = None
+        self.send_header_only = method is not None and method.upper() == "HEAD"
+        self.init_headers(headers)
+        self.headers["content-length"] = str(size)
+        self.headers["accept-ranges"] = "none"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        if is_not_modified(request_headers.get("if-none-match"), request_headers.get("if-modified-since"),
+                           self.headers.get("etag"), self.headers.get("last-modified")):
+            await send_not_modified(send, self.raw_headers)
+            return
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        # Reading and decompressing both block, so each chunk is produced on a worker thread
+        chunks = iter_decompressed(self.path, self.content_encoding)
+        try:
+            while (chunk := await anyio.to_thread.run_sync(next, chunks, None)) is not None:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            await anyio.to_thread.run_sync(chunks.close)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def send_not_modified(send: Send, raw_headers: List[Tuple[bytes, bytes]]):
+    """Send a 304 response for a conditional request whose cached copy is still current.
+
+    Args:
+        send: ASGI send function.
+        raw_headers: Headers of the full response, of which the ones that describe the cached copy are repeated.
+    """
+    headers = [(key, value) for key, value in raw_headers if key.decode("latin-1") in NOT_MODIFIED_HEADERS]
+    await send({"type": "http.response.start", "status": 304, "headers": headers})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
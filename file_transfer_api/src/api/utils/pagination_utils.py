@@ -0,0 +1,54 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.exceptions.database_exceptions import InvalidPageCursorError
+
+# Number of file records on a page of the listing, unless the client asks for fewer or more
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(file_record: DatabaseEntry, sort_by: str) -> str:
+    """Encode the position after a file record as an opaque cursor for the next page of a listing.
+
+    Args:
+        file_record: Last file record of the page.
+        sort_by: Column the listing is sorted by.
+
+    Returns:
+        URL-safe cursor holding the sort column, the record's value in it and its file id.
+    """
+    value = getattr(file_record, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    cursor = json.dumps({"sort_by": sort_by, "value": value, "file_id": file_record.file_id})
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, str]:
+    """Decode a cursor made by encode_cursor.
+
+    Args:
+        cursor: Cursor sent by the client.
+        sort_by: Column the listing is sorted by.
+
+    Returns:
+        The sort value and file id of the last record of the previous page.
+
+    Raises:
+        InvalidPageCursorError: If the cursor cannot be decoded or was made for a listing sorted by another column.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if position["sort_by"] != sort_by:
+            raise InvalidPageCursorError(f'Cursor is for a listing sorted by {position["sort_by"]}, not {sort_by}')
+        value = position["value"]
+        if sort_by == "created_timestamp":
+            value = datetime.fromisoformat(value)
+        return value, position["file_id"]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError, KeyError) as e:
+        raise InvalidPageCursorError(f'Cursor {cursor} is not valid: {e}')
@@ -0,0 +1,107 @@
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from src.exceptions.file_exceptions import FileRangeNotSatisfiableError
+
+# Most ranges a single request may ask for, to stop clients requesting a file one byte at a time
+MAX_RANGES = 100
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse an HTTP Range header into the byte ranges it requests.
+
+    Overlapping and adjacent ranges are merged. Headers that cannot be parsed, or that use a unit other than bytes,
+    are ignored so that the whole file is sent, as RFC 9110 requires.
+
+    Args:
+        range_header: Value of the Range header, e.g. "bytes=0-499, -500".
+        file_size: Size of the file in bytes.
+
+    Returns:
+        Sorted list of (start, end) byte ranges, where end is inclusive, or None if the whole file should be sent.
+
+    Raises:
+        FileRangeNotSatisfiableError: If none of the requested ranges overlap the file.
+    """
+    if not range_header:
+        return None
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set.strip():
+        return None
+
+    range_specs = [range_spec.strip() for range_spec in range_set.split(",") if range_spec.strip()]
+    if not range_specs or len(range_specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for range_spec in range_specs:
+        first, dash, last = range_spec.partition("-")
+        first, last = first.strip(), last.strip()
+        if not dash or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+
+        if not first:
+            # Suffix range, i.e. the last N bytes of the file
+            suffix_length = int(last)
+            if suffix_length == 0 or file_size == 0:
+                continue
+            ranges.append((max(file_size - suffix_length, 0), file_size - 1))
+            continue
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(int(last), file_size - 1) if last else file_size - 1))
+
+    if not ranges:
+        raise FileRangeNotSatisfiableError(f'None of the ranges in "{range_header}" overlap a file of '
+                                           f'{file_size} bytes')
+
+    return merge_ranges(ranges)
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping and adjacent byte ranges.
+
+    Args:
+        ranges: List of (start, end) byte ranges, where end is inclusive.
+
+    Returns:
+        Sorted list of non-overlapping byte ranges.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(if_range_header: Optional[str], etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """Check whether the representation named by an If-Range header is still current.
+
+    Args:
+        if_range_header: Value of the If-Range header, either an entity tag or an HTTP date.
+        etag: Current entity tag of the file.
+        last_modified: Current Last-Modified HTTP date of the file.
+
+    Returns:
+        True if the Range header should be honoured.
+    """
+    if if_range_header is None:
+        return True
+    if_range_header = if_range_header.strip()
+
+    if if_range_header.startswith(('"', 'W/"')):
+        # Only strong entity tags can be used for ranges
+        return etag is not None and not etag.startswith("W/") and if_range_header == etag
+
+    if last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(if_range_header) == parsedate_to_datetime(last_modified)
+    except (TypeError, ValueError):
+        return False
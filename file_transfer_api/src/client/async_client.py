@@ -0,0 +1,327 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import (Any, Awaitable, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union,
+                    ByteString)
+
+import httpx
+
+from src.client.client import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, parse_file_records
+from src.client.download_utils import (DOWNLOAD_CHUNK_SIZE, DownloadWriter, ProgressCallback, get_expected_checksum,
+                                       get_expected_size)
+from src.client.upload_utils import UploadStream, aiter_upload_stream, get_form_framing
+from src.schemas.custom_responses import (BulkOperationResult, DownloadResult, FileIdAndPath, FileRecords,
+                                          ErrorResponse)
+from src.utils.logging_utils import ErrorLogger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Transfers upload_many and download_many run at once
+DEFAULT_CONCURRENCY = 8
+
+# Times a request that fails to connect is retried
+DEFAULT_CONNECT_RETRIES = 3
+
+
+class AsyncAPIClient:
+    """Asyncio client for the file transfer API, with the same operations as APIClient.
+
+    Requests go through a single httpx.AsyncClient, so connections to the API are kept alive and reused.
+    upload_many and download_many run many transfers at once, so that their throughput is not bound by the round trip
+    time of each request. Close the client when done with it, or use it as an async context manager.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8000", error_logger_path: Optional[str] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: Union[float, Tuple[float, float], None] = DEFAULT_TIMEOUT,
+                 connect_retries: int = DEFAULT_CONNECT_RETRIES, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Initialise the async API client.
+
+        Args:
+            base_url: Base URL for the API. Defaults to "http://127.0.0.1:8000"
+            error_logger_path: Path of the error log file. Defaults to None, i.e. "logs/errors.log"
+            pool_size: Most connections open at once, which also bounds the transfers in flight. Defaults to
+                DEFAULT_POOL_SIZE (10)
+            timeout: Seconds to wait for a response, or to connect and to read as a tuple, or None to wait forever.
+                Defaults to DEFAULT_TIMEOUT (5 and 60)
+            connect_retries: Times a request that fails to connect is retried. Defaults to DEFAULT_CONNECT_RETRIES (3)
+            transport: Transport to send requests with instead of connecting to the API, e.g. for tests. Defaults to
+                None
+        """
+        self.base_url = base_url
+        self.logger = ErrorLogger(log_file_path=error_logger_path, name="AsyncAPIClient")
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(retries=connect_retries)
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=transport,
+                                        limits=httpx.Limits(max_connections=pool_size,
+                                                            max_keepalive_connections=pool_size))
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """Close the client's connections to the API"""
+        await self.client.aclose()
+
+    def _request_handler(self, response: httpx.Response, raw: bool = False) -> (
+            Union)[FileIdAndPath, ByteString, ErrorResponse]:
+        """Handle the response from the API.
+
+        Args:
+            response: Response from the API.
+            raw: Whether to return the raw content of the response. Defaults to False.
+
+        Returns:
+            Response from the API.
+        """
+        if not response.is_success:
+            return self._error_handler(response)
+        if raw:
+            return response.content
+        response = response.json()
+        return FileIdAndPath(file_id=response["file_id"], file_path=response["file_path"])
+
+    def _error_handler(self, response: httpx.Response) -> ErrorResponse:
+        """Log an error response from the API.
+
+        Args:
+            response: Error response from the API.
+
+        Returns:
+            The error's status code and message.
+        """
+        self.logger.log(f"Error: {response.status_code} - {response.json()['detail']}")
+        return ErrorResponse(status_code=response.status_code, message=response.json()['detail'])
+
+    async def upload_file(self, file_path: Union[str, Path]) -> Union[FileIdAndPath, ErrorResponse]:
+        """Upload a file to the API.
+
+        The file is sent as a multipart/form-data body streamed from disk a chunk at a time, each chunk read in a worker
+        thread so that reading the file never blocks the event loop.
+
+        Args:
+            file_path: Path to the file to upload.
+
+        Returns:
+            Response from the API.
+        """
+        try:
+            f = await asyncio.to_thread(open, file_path, "rb")
+            try:
+                content_type, prefix, suffix = get_form_framing(Path(file_path).name)
+                body = UploadStream(f, 0, os.fstat(f.fileno()).st_size, prefix=prefix, suffix=suffix)
+                response = await self.client.post("/files/", content=aiter_upload_stream(body),
+                                                  headers={"Content-Type": content_type,
+                                                           "Content-Length": str(len(body))})
+                return self._request_handler(response)
+            finally:
+                f.close()
+        except FileNotFoundError as e:
+            self.logger.log(f"Error uploading file: {e}")
+            return ErrorResponse(status_code=404, message=f"No such file or directory at: {file_path}")
+
+    async def download_file(self, file_id: str) -> Union[ByteString, ErrorResponse]:
+        """Download a file from the API.
+
+        Args:
+            file_id: ID of the file to download.
+
+        Returns:
+            Response from the API.
+        """
+        response = await self.client.get(f"/files/{file_id}")
+        return self._request_handler(response, raw=True)
+
+    async def download_file_to(self, file_id: str, destination: Union[str, Path, BinaryIO],
+                               progress: Optional[ProgressCallback] = None, verify_checksum: bool = True,
+                               checksum_algorithm: str = "sha256", chunk_size: int = DOWNLOAD_CHUNK_SIZE
+                               ) -> Union[DownloadResult, ErrorResponse]:
+        """Download a file from the API to a path or file object, a chunk at a time, so that it is never held in memory.
+
+        A download to a path is written next to it and only moved into place once it is complete and verified. Writes
+        to the destination block the event loop, which is fine for local disks.
+
+        Args:
+            file_id: ID of the file to download.
+            destination: Path to write the file to, or a binary file object to write it into.
+            progress: Callback called with the bytes written so far and the size of the file, or None if the size is
+                not known, after every chunk. Defaults to None.
+            verify_checksum: Whether to check the file's checksum against the one the API gives. Defaults to True.
+            checksum_algorithm: hashlib algorithm the API checksums files with, i.e. its CHECKSUM_ALGORITHM. Defaults
+                to "sha256".
+            chunk_size: Bytes read from the response at a time. Defaults to DOWNLOAD_CHUNK_SIZE (1 MiB).
+
+        Returns:
+            The size and checksum of the file downloaded, or the error from the API. A file whose checksum does not
+            match returns an ErrorResponse with status code 502.
+        """
+        async with self.client.stream("GET", f"/files/{file_id}") as response:
+            if not response.is_success:
+                await response.aread()
+                return self._error_handler(response)
+            expected_size = get_expected_size(response.headers.get("Content-Length"),
+                                              response.headers.get("Content-Encoding"))
+            expected_checksum = get_expected_checksum(response.headers.get("ETag"), checksum_algorithm) \
+                if verify_checksum else None
+            with DownloadWriter(destination, checksum_algorithm, expected_size, progress) as writer:
+                async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                    writer.write(chunk)
+                verified = writer.verify(expected_checksum)
+        if not verified:
+            message = f"Checksum of file {file_id} does not match, expected {expected_checksum}"
+            self.logger.log(f"Error: 502 - {message}")
+            return ErrorResponse(status_code=502, message=message)
+        return DownloadResult(file_id=file_id, size=writer.size, checksum=writer.hasher.hexdigest(),
+                              verified=expected_checksum is not None)
+
+    async def rename_file(self, file_id: str, new_file_name: str) -> Union[FileIdAndPath, ErrorResponse]:
+        """Rename a file in the API.
+
+        Args:
+            file_id: ID of the file to rename.
+            new_file_name: New name of the file.
+
+        Returns:
+            Response from the API.
+        """
+        response = await self.client.put(f"/files/{file_id}", params={"new_file_name": new_file_name})
+        return self._request_handler(response)
+
+    async def delete_file(self, file_id: str) -> Union[FileIdAndPath, ErrorResponse]:
+        """Delete a file from the API.
+
+        Args:
+            file_id: ID of the file to delete.
+
+        Returns:
+            Response from the API.
+        """
+        response = await self.client.delete(f"/files/{file_id}")
+        return self._request_handler(response)
+
+    async def get_file_records(self, file_ids: List[str]) -> Union[FileRecords, ErrorResponse]:
+        """Get the metadata of many files from the API in one request.
+
+        Args:
+            file_ids: IDs of the files.
+
+        Returns:
+            Metadata of the files found and the IDs that do not exist, or the error from the API.
+        """
+        response = await self.client.post("/files/bulk/get", json={"file_ids": file_ids})
+        if not response.is_success:
+            return self._error_handler(response)
+        return parse_file_records(response.json())
+
+    async def rename_files(self, new_names: Dict[str, str]) -> Union[BulkOperationResult, ErrorResponse]:
+        """Rename many files in the API in one request.
+
+        Args:
+            new_names: New name of each file, by file ID.
+
+        Returns:
+            The number of files renamed and the IDs that do not exist, or the error from the API.
+        """
+        response = await self.client.post("/files/bulk/rename", json={"new_names": new_names})
+        if not response.is_success:
+            return self._error_handler(response)
+        return BulkOperationResult(**response.json())
+
+    async def delete_files(self, file_ids: List[str]) -> Union[BulkOperationResult, ErrorResponse]:
+        """Delete many files from the API in one request.
+
+        Args:
+            file_ids: IDs of the files to delete.
+
+        Returns:
+            The number of files deleted, the IDs that do not exist and the IDs that could not be deleted, or the error
+            from the API.
+        """
+        response = await self.client.post("/files/bulk/delete", json={"file_ids": file_ids})
+        if not response.is_success:
+            return self._error_handler(response)
+        return BulkOperationResult(**response.json())
+
+    async def upload_many(self, file_paths: Iterable[Union[str, Path]], concurrency: int = DEFAULT_CONCURRENCY
+                          ) -> List[Union[FileIdAndPath, ErrorResponse]]:
+        """Upload many files, running up to concurrency uploads at once.
+
+        Args:
+            file_paths: Paths to the files to upload.
+            concurrency: Most uploads in flight at once. Defaults to DEFAULT_CONCURRENCY (8).
+
+        Returns:
+            The result of each upload, in the order of the file paths. A file that fails does not stop the others.
+        """
+        return await self._run_many(self.upload_file, file_paths, concurrency)
+
+    async def download_many(self, file_ids: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY
+                            ) -> List[Union[ByteString, ErrorResponse]]:
+        """Download many files, running up to concurrency downloads at once. The files are held in memory, so use
+        download_many_to for large files.
+
+        Args:
+            file_ids: IDs of the files to download.
+            concurrency: Most downloads in flight at once. Defaults to DEFAULT_CONCURRENCY (8).
+
+        Returns:
+            The content of each file or the error it failed with, in the order of the file IDs.
+        """
+        return await self._run_many(self.download_file, file_ids, concurrency)
+
+    async def download_many_to(self, destinations: Dict[str, Union[str, Path, BinaryIO]],
+                               concurrency: int = DEFAULT_CONCURRENCY, verify_checksum: bool = True,
+                               checksum_algorithm: str = "sha256") -> List[Union[DownloadResult, ErrorResponse]]:
+        """Download many files to paths or file objects, running up to concurrency downloads at once. Each file is
+        streamed to its destination with download_file_to, so it is never held in memory.
+
+        Args:
+            destinations: Path or binary file object to write each file to, by file ID.
+            concurrency: Most downloads in flight at once. Defaults to DEFAULT_CONCURRENCY (8).
+            verify_checksum: Whether to check each file's checksum against the one the API gives. Defaults to True.
+            checksum_algorithm: hashlib algorithm the API checksums files with, i.e. its CHECKSUM_ALGORITHM. Defaults
+                to "sha256".
+
+        Returns:
+            The size and checksum of each file or the error it failed with, in the order of the destinations.
+        """
+        async def download(file_id: str) -> Union[DownloadResult, ErrorResponse]:
+            return await self.download_file_to(file_id, destinations[file_id], verify_checksum=verify_checksum,
+                                               checksum_algorithm=checksum_algorithm)
+
+        return await self._run_many(download, destinations, concurrency)
+
+    async def _run_many(self, transfer: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int
+                        ) -> List[Union[R, ErrorResponse]]:
+        """Run a transfer for each item, with at most concurrency transfers in flight.
+
+        Args:
+            transfer: Transfer to run for each item.
+            items: Items to run the transfer for.
+            concurrency: Most transfers in flight at once.
+
+        Returns:
+            The result of each transfer, in the order of the items. Transfers that cannot reach the API return an
+            ErrorResponse with status code 503.
+
+        Raises:
+            ValueError: If concurrency is not positive.
+        """
+        if concurrency < 1:
+            raise ValueError(f'Concurrency must be positive, got {concurrency}')
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(item: Any) -> Union[R, ErrorResponse]:
+            async with semaphore:
+                try:
+                    return await transfer(item)
+                except httpx.TransportError as e:
+                    self.logger.log(f"Error reaching the API for {item}: {e!r}")
+                    return ErrorResponse(status_code=503, message=f"Could not reach the API: {e!r}")
+
+        return await asyncio.gather(*[run(item) for item in items])
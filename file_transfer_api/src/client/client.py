@@ -1,20 +1,107 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Union, ByteString
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union, ByteString
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from src.schemas.custom_responses import FileIdAndPath, ErrorResponse
+from src.client.download_utils import (DOWNLOAD_CHUNK_SIZE, DownloadWriter, ProgressCallback, get_expected_checksum,
+                                       get_expected_size, hash_file, preallocate_file, split_ranges)
+from src.client.upload_utils import UploadProgressCallback, UploadStream, get_form_framing, hash_file_range
+from src.schemas.custom_responses import (BulkOperationResult, DownloadResult, FileIdAndPath, FileRecordDetails,
+                                          FileRecords, ErrorResponse)
 from src.utils.logging_utils import ErrorLogger
 
+# Connections kept open to the API for reuse, i.e. the most requests that can run at once without opening new ones
+DEFAULT_POOL_SIZE = 10
+
+# Seconds to wait to connect and to wait for each read
+DEFAULT_TIMEOUT = (5.0, 60.0)
+
+# Requests that fail to connect or get one of the retry status codes are retried with exponential backoff, waiting
+# backoff_factor * 2 ** (retry - 1) seconds plus up to backoff_jitter seconds at random. Only idempotent methods are
+# retried, so an upload is never sent twice.
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_BACKOFF_JITTER = 0.5
+RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Connections a parallel download fetches byte ranges over, and times each range may resume after failing part way
+DEFAULT_CONNECTIONS = 4
+DEFAULT_SEGMENT_RETRIES = 3
+
+# Size of each part of a resumable upload, and so the most bytes sent again when an upload resumes
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+# Ranges are byte offsets into the file as sent, so parallel downloads ask for files uncompressed
+IDENTITY_HEADERS = {"Accept-Encoding": "identity"}
+
 
 class APIClient:
-    def __init__(self, base_url: str = "http://127.0.0.1:8000", error_logger_path: Optional[str] = None):
+    """Client for the file transfer API.
+
+    Requests go through a single HTTP session, so connections to the API are kept alive and reused rather than opened
+    for every request. Close the client when done with it, or use it as a context manager.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8000", error_logger_path: Optional[str] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: Union[float, Tuple[float, float], None] = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 backoff_jitter: float = DEFAULT_BACKOFF_JITTER):
         """Constructor for FastAPIClient.
 
         Args:
             base_url: Base URL for the API. Defaults to "http://127.0.0.1:8000"
+            error_logger_path: Path of the error log file. Defaults to None, i.e. "logs/errors.log"
+            pool_size: Connections kept open for reuse. Defaults to DEFAULT_POOL_SIZE (10)
+            timeout: Seconds to wait for a response, or to connect and to read as a tuple, or None to wait forever.
+                Defaults to DEFAULT_TIMEOUT (5 and 60)
+            max_retries: Times an idempotent request is retried. Defaults to DEFAULT_MAX_RETRIES (3)
+            backoff_factor: Seconds the first retry waits for, doubling for each retry after it. Defaults to
+                DEFAULT_BACKOFF_FACTOR (0.5)
+            backoff_jitter: Most seconds added at random to each wait, so that clients do not retry in step. Defaults to
+                DEFAULT_BACKOFF_JITTER (0.5)
         """
         self.base_url = base_url
         self.logger = ErrorLogger(log_file_path=error_logger_path, name="APIClient")
+        self.timeout = timeout
+
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor, backoff_jitter=backoff_jitter,
+                      allowed_methods=RETRY_METHODS, status_forcelist=RETRY_STATUS_CODES,
+                      respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Upload ID of each file whose resumable upload has not completed, so that uploading it again resumes it
+        self.pending_uploads: Dict[str, str] = {}
+
+    def __enter__(self) -> "APIClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the client's connections to the API"""
+        self.session.close()
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """Send a request to the API through the client's session.
+
+        Args:
+            method: HTTP method of the request.
+            path: Path of the endpoint, relative to the base URL.
+            **kwargs: Keyword arguments for requests, e.g. params or json.
+
+        Returns:
+            Response from the API, after any retries.
+        """
+        return self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
 
     def _request_handler(self, response: requests.Response, raw: bool = False) -> (
             Union)[FileIdAndPath, ByteString, ErrorResponse]:
@@ -35,9 +122,20 @@ class APIClient:
                 return FileIdAndPath(file_id=response["file_id"],
                                      file_path=response["file_path"])
         else:
-            self.logger.log(f"Error: {response.status_code} - {response.json()['detail']}")
-            return ErrorResponse(status_code=response.status_code,
-                                 message=response.json()['detail'])
+            return self._error_handler(response)
+
+    def _error_handler(self, response: requests.Response) -> ErrorResponse:
+        """Log an error response from the API.
+
+        Args:
+            response: Error response from the API.
+
+        Returns:
+            The error's status code and message.
+        """
+        self.logger.log(f"Error: {response.status_code} - {response.json()['detail']}")
+        return ErrorResponse(status_code=response.status_code,
+                             message=response.json()['detail'])
 
     def upload_file(self, file_path: Union[str, Path]) -> Union[FileIdAndPath, ErrorResponse]:
         """Upload a file to the API.
@@ -50,12 +148,147 @@ class APIClient:
         """
         try:
             with open(file_path, "rb") as f:
-                response = requests.post(f"{self.base_url}/files", files={"file": f})
+                response = self._request("POST", "/files", files={"file": f})
                 return self._request_handler(response)
         except FileNotFoundError as e:
             self.logger.log(f"Error uploading file: {e}")
             return ErrorResponse(status_code=404, message=f"No such file or directory at: {file_path}")
 
+    def upload_file_streamed(self, file_path: Union[str, Path], progress: Optional[UploadProgressCallback] = None,
+                             upload_id: Optional[str] = None, part_size: int = DEFAULT_PART_SIZE,
+                             checksum_algorithm: str = "sha256") -> Union[FileIdAndPath, ErrorResponse]:
+        """Upload a file to the API, streaming it from disk so that it is never held in memory, and resuming it if an
+        earlier upload of it did not complete.
+
+        Files larger than one part are sent as a resumable multipart upload, one part per request. If the upload fails,
+        uploading the same path again with the same client, or passing the upload ID from the error message, resumes it:
+        parts the API already has whose size and checksum match are not sent again. Smaller files, and every file when
+        the API has no resumable uploads, are sent as a single streamed multipart/form-data request.
+
+        Args:
+            file_path: Path to the file to upload.
+            progress: Callback called with the bytes of the file sent so far and the size of the file as it is sent.
+                Defaults to None.
+            upload_id: ID of an unfinished upload of the file to resume. Defaults to None, i.e. the upload of the path
+                this client last left unfinished, if any.
+            part_size: Bytes sent per part. Defaults to DEFAULT_PART_SIZE (8 MiB).
+            checksum_algorithm: hashlib algorithm the API checksums files with, i.e. its CHECKSUM_ALGORITHM, used to
+                check the parts it already has. Defaults to "sha256".
+
+        Returns:
+            Response from the API.
+
+        Raises:
+            ValueError: If the part size is not positive.
+        """
+        if part_size < 1:
+            raise ValueError(f'Part size must be positive, got {part_size}')
+        file_path = Path(file_path)
+        upload_key = str(file_path.resolve())
+        try:
+            with open(file_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > part_size:
+                    response = self._upload_parts(f, file_path.name, size, progress, part_size, checksum_algorithm,
+                                                  upload_id or self.pending_uploads.get(upload_key), upload_key)
+                    if response is not None:
+                        return response
+                return self._upload_form_streamed(f, file_path.name, size, progress)
+        except FileNotFoundError as e:
+            self.logger.log(f"Error uploading file: {e}")
+            return ErrorResponse(status_code=404, message=f"No such file or directory at: {file_path}")
+        except requests.RequestException as e:
+            message = f"Could not upload {file_path}: {e!r}"
+            if upload_key in self.pending_uploads:
+                message += f". Resume with upload_id={self.pending_uploads[upload_key]}"
+            self.logger.log(f"Error: 503 - {message}")
+            return ErrorResponse(status_code=503, message=message)
+
+    def _upload_form_streamed(self, file: BinaryIO, file_name: str, size: int,
+                              progress: Optional[UploadProgressCallback]) -> Union[FileIdAndPath, ErrorResponse]:
+        """Upload a file in a single multipart/form-data request whose body is streamed from disk.
+
+        Args:
+            file: Open file to upload.
+            file_name: Name of the file.
+            size: Size of the file in bytes.
+            progress: Callback called with the bytes sent so far and the size of the file.
+
+        Returns:
+            Response from the API.
+        """
+        content_type, prefix, suffix = get_form_framing(file_name)
+        body = UploadStream(file, 0, size, prefix=prefix, suffix=suffix, progress=progress)
+        response = self._request("POST", "/files/", data=body, headers={"Content-Type": content_type})
+        return self._request_handler(response)
+
+    def _upload_parts(self, file: BinaryIO, file_name: str, size: int, progress: Optional[UploadProgressCallback],
+                      part_size: int, checksum_algorithm: str, upload_id: Optional[str], upload_key: str
+                      ) -> Union[FileIdAndPath, ErrorResponse, None]:
+        """Upload a file as a resumable multipart upload, sending only the parts the API does not already have.
+
+        A part the API already has is only skipped when its size and checksum match the same range of the file, so parts
+        of a file that has changed since are sent again.
+
+        Args:
+            file: Open file to upload.
+            file_name: Name of the file.
+            size: Size of the file in bytes.
+            progress: Callback called with the bytes sent so far and the size of the file.
+            part_size: Bytes sent per part.
+            checksum_algorithm: hashlib algorithm the API checksums parts with.
+            upload_id: ID of an unfinished upload to resume, or None to start a new one.
+            upload_key: Key of the file in pending_uploads.
+
+        Returns:
+            Response from the API, or None if the API has no resumable uploads.
+        """
+        part_count = -(-size // part_size)
+        received_parts = {}
+        if upload_id is not None:
+            # Uploads that have expired or been completed are started again
+            response = self._request("GET", f"/files/uploads/{upload_id}")
+            parts = response.json()["parts"] if response.ok else []
+            if response.ok and all(part["part_number"] <= part_count for part in parts):
+                received_parts = {part["part_number"]: part for part in parts}
+            else:
+                if response.ok:
+                    # Parts beyond the end of the file would be assembled into it, so the upload cannot be resumed
+                    self._request("DELETE", f"/files/uploads/{upload_id}")
+                upload_id = None
+        if upload_id is None:
+            response = self._request("POST", "/files/uploads", params={"file_name": file_name})
+            if response.status_code in (404, 405):
+                return None
+            if not response.ok:
+                return self._error_handler(response)
+            upload_id = response.json()["upload_id"]
+        self.pending_uploads[upload_key] = upload_id
+
+        sent = 0
+        for part_number in range(1, part_count + 1):
+            offset = (part_number - 1) * part_size
+            length = min(part_size, size - offset)
+            received_part = received_parts.get(part_number)
+            # Parts whose checksum the API does not give cannot be checked against the file, so are sent again
+            if received_part is not None and received_part["size"] == length and \
+                    received_part["checksum"] is not None and \
+                    received_part["checksum"] == hash_file_range(file, offset, length, checksum_algorithm):
+                sent += length
+                if progress is not None:
+                    progress(sent, size)
+                continue
+            body = UploadStream(file, offset, length, progress=progress, progress_offset=sent, total_size=size)
+            response = self._request("PUT", f"/files/uploads/{upload_id}/parts/{part_number}", data=body)
+            if not response.ok:
+                return self._error_handler(response)
+            sent += length
+
+        response = self._request("POST", f"/files/uploads/{upload_id}/complete")
+        if response.ok:
+            self.pending_uploads.pop(upload_key, None)
+        return self._request_handler(response)
+
     def download_file(self, file_id: str) -> Union[ByteString, ErrorResponse]:
         """Download a file from the API.
 
@@ -65,9 +298,196 @@ class APIClient:
         Returns:
             Response from the API.
         """
-        response = requests.get(f"{self.base_url}/files/{file_id}")
+        response = self._request("GET", f"/files/{file_id}")
         return self._request_handler(response, raw=True)
 
+    def download_file_to(self, file_id: str, destination: Union[str, Path, BinaryIO],
+                         progress: Optional[ProgressCallback] = None, verify_checksum: bool = True,
+                         checksum_algorithm: str = "sha256", chunk_size: int = DOWNLOAD_CHUNK_SIZE
+                         ) -> Union[DownloadResult, ErrorResponse]:
+        """Download a file from the API to a path or file object, a chunk at a time, so that it is never held in memory.
+
+        A download to a path is written next to it and only moved into place once it is complete and verified.
+
+        Args:
+            file_id: ID of the file to download.
+            destination: Path to write the file to, or a binary file object to write it into.
+            progress: Callback called with the bytes written so far and the size of the file, or None if the size is
+                not known, after every chunk. Defaults to None.
+            verify_checksum: Whether to check the file's checksum against the one the API gives. Defaults to True.
+            checksum_algorithm: hashlib algorithm the API checksums files with, i.e. its CHECKSUM_ALGORITHM. Defaults
+                to "sha256".
+            chunk_size: Bytes read from the response at a time. Defaults to DOWNLOAD_CHUNK_SIZE (1 MiB).
+
+        Returns:
+            The size and checksum of the file downloaded, or the error from the API. A file whose checksum does not
+            match returns an ErrorResponse with status code 502.
+        """
+        with self._request("GET", f"/files/{file_id}", stream=True) as response:
+            if not response.ok:
+                return self._error_handler(response)
+            expected_size = get_expected_size(response.headers.get("Content-Length"),
+                                              response.headers.get("Content-Encoding"))
+            expected_checksum = get_expected_checksum(response.headers.get("ETag"), checksum_algorithm) \
+                if verify_checksum else None
+            with DownloadWriter(destination, checksum_algorithm, expected_size, progress) as writer:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    writer.write(chunk)
+                verified = writer.verify(expected_checksum)
+        if not verified:
+            message = f"Checksum of file {file_id} does not match, expected {expected_checksum}"
+            self.logger.log(f"Error: 502 - {message}")
+            return ErrorResponse(status_code=502, message=message)
+        return DownloadResult(file_id=file_id, size=writer.size, checksum=writer.hasher.hexdigest(),
+                              verified=expected_checksum is not None)
+
+    def download_file_parallel(self, file_id: str, destination: Union[str, Path],
+                               connections: int = DEFAULT_CONNECTIONS, progress: Optional[ProgressCallback] = None,
+                               verify_checksum: bool = True, checksum_algorithm: str = "sha256",
+                               segment_retries: int = DEFAULT_SEGMENT_RETRIES, chunk_size: int = DOWNLOAD_CHUNK_SIZE
+                               ) -> Union[DownloadResult, ErrorResponse]:
+        """Download a file from the API to a path over several connections at once, each fetching a byte range of it.
+
+        A single connection's throughput is bound by its round trip time, so splitting a large file over several
+        connections fills more of a high latency link. The ranges are written at their offsets into a file preallocated
+        next to the path, which is only moved into place once every range is complete and the file is verified. A range
+        whose connection fails part way resumes from where it stopped, up to segment_retries times, without the others
+        starting over. Files the API does not send ranges of, e.g. files it stores compressed, and files too small to
+        split are downloaded over a single connection with download_file_to.
+
+        Keep the client's pool_size at least as large as connections, or the extra connections are closed after use.
+
+        Args:
+            file_id: ID of the file to download.
+            destination: Path to write the file to.
+            connections: Most byte ranges fetched at once. Defaults to DEFAULT_CONNECTIONS (4).
+            progress: Callback called with the bytes written so far and the size of the file after every chunk. It is
+                called from the threads fetching the ranges. Defaults to None.
+            verify_checksum: Whether to check the file's checksum against the one the API gives. Defaults to True.
+            checksum_algorithm: hashlib algorithm the API checksums files with, i.e. its CHECKSUM_ALGORITHM. Defaults
+                to "sha256".
+            segment_retries: Times a range that fails part way is resumed. Defaults to DEFAULT_SEGMENT_RETRIES (3).
+            chunk_size: Bytes read from each response at a time. A range that fails resumes after the last whole chunk
+                it wrote. Defaults to DOWNLOAD_CHUNK_SIZE (1 MiB).
+
+        Returns:
+            The size and checksum of the file downloaded, or the error from the API. A range that cannot be fetched
+            returns the error it failed with, and a file whose checksum does not match returns an ErrorResponse with
+            status code 502.
+
+        Raises:
+            ValueError: If connections is not positive.
+        """
+        if connections < 1:
+            raise ValueError(f'Connections must be positive, got {connections}')
+        response = self._request("HEAD", f"/files/{file_id}", headers=IDENTITY_HEADERS)
+        size = response.headers.get("Content-Length")
+        ranges = []
+        # Errors are left to download_file_to, as HEAD responses have no body to read them from
+        if response.ok and response.headers.get("Accept-Ranges") == "bytes" and size is not None:
+            ranges = split_ranges(int(size), connections)
+        if len(ranges) < 2:
+            return self.download_file_to(file_id, destination, progress=progress, verify_checksum=verify_checksum,
+                                         checksum_algorithm=checksum_algorithm, chunk_size=chunk_size)
+
+        size = int(size)
+        etag = response.headers.get("ETag")
+        # Only strong entity tags can be sent as If-Range, so files without a checksum are matched on their date instead
+        if_range = etag if etag is not None and not etag.startswith("W/") else response.headers.get("Last-Modified")
+        destination = Path(destination)
+        part_path = destination.with_name(f"{destination.name}.part")
+        lock = threading.Lock()
+        written = 0
+        cancelled = threading.Event()
+
+        def on_chunk(length: int):
+            nonlocal written
+            with lock:
+                written += length
+                if progress is not None:
+                    progress(written, size)
+
+        def download_range(byte_range: Tuple[int, int]) -> Optional[ErrorResponse]:
+            error = self._download_range(file_id, part_path, byte_range, if_range, on_chunk, cancelled,
+                                         segment_retries, chunk_size)
+            if error is not None:
+                # Stop the other ranges, as the download has failed
+                cancelled.set()
+            return error
+
+        try:
+            preallocate_file(part_path, size)
+            with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="download") as executor:
+                error = next((error for error in executor.map(download_range, ranges) if error is not None), None)
+            if error is None:
+                checksum = hash_file(part_path, checksum_algorithm, chunk_size)
+                expected_checksum = get_expected_checksum(etag, checksum_algorithm) if verify_checksum else None
+                if expected_checksum is not None and checksum != expected_checksum:
+                    error = ErrorResponse(status_code=502, message=f"Checksum of file {file_id} does not match, "
+                                                                   f"expected {expected_checksum}")
+                    self.logger.log(f"Error: 502 - {error.message}")
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        if error is not None:
+            part_path.unlink(missing_ok=True)
+            return error
+        os.replace(part_path, destination)
+        return DownloadResult(file_id=file_id, size=size, checksum=checksum, verified=expected_checksum is not None)
+
+    def _download_range(self, file_id: str, part_path: Path, byte_range: Tuple[int, int], if_range: Optional[str],
+                        on_chunk: Callable[[int], None], cancelled: threading.Event, retries: int, chunk_size: int
+                        ) -> Optional[ErrorResponse]:
+        """Download a byte range of a file into its place in a part file, resuming from where it stopped if it fails.
+
+        Args:
+            file_id: ID of the file.
+            part_path: Path of the preallocated part file.
+            byte_range: Start and inclusive end of the range.
+            if_range: Strong entity tag, or else Last-Modified date, of the file when the download started, sent as
+                If-Range so that a file that has changed since is not mixed with the old one.
+            on_chunk: Callback called with the length of each chunk written.
+            cancelled: Event set when the download has failed, which stops the range.
+            retries: Times the range is resumed after failing part way.
+            chunk_size: Bytes read from the response at a time.
+
+        Returns:
+            None if the range was written or the download was cancelled, or the error the range failed with.
+        """
+        start, end = byte_range
+        error = None
+        with open(part_path, "r+b") as f:
+            for _ in range(retries + 1):
+                headers = {**IDENTITY_HEADERS, "Range": f"bytes={start}-{end}"}
+                if if_range is not None:
+                    headers["If-Range"] = if_range
+                try:
+                    with self._request("GET", f"/files/{file_id}", headers=headers, stream=True) as response:
+                        if not response.ok:
+                            return self._error_handler(response)
+                        if response.status_code != 206:
+                            # The whole file is sent instead of the range when it no longer matches If-Range
+                            error = ErrorResponse(status_code=412, message=f"File {file_id} changed while it was "
+                                                                           f"being downloaded")
+                            self.logger.log(f"Error: 412 - {error.message}")
+                            return error
+                        f.seek(start)
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if cancelled.is_set():
+                                return None
+                            f.write(chunk)
+                            start += len(chunk)
+                            on_chunk(len(chunk))
+                    if start > end:
+                        return None
+                    error = ErrorResponse(status_code=502, message=f"Bytes {start}-{end} of file {file_id} were not "
+                                                                   f"sent")
+                except requests.RequestException as e:
+                    error = ErrorResponse(status_code=503, message=f"Could not download bytes {start}-{end} of file "
+                                                                   f"{file_id}: {e!r}")
+                self.logger.log(f"Error: {error.status_code} - {error.message}")
+        return error
+
     def rename_file(self, file_id: str, new_file_name: str) -> Union[FileIdAndPath, ErrorResponse]:
         """Rename a file in the API.
 
@@ -78,7 +498,7 @@ class APIClient:
         Returns:
             Response from the API.
         """
-        response = requests.put(f"{self.base_url}/files/{file_id}", params={"new_file_name": new_file_name})
+        response = self._request("PUT", f"/files/{file_id}", params={"new_file_name": new_file_name})
         return self._request_handler(response)
 
     def delete_file(self, file_id: str) -> Union[FileIdAndPath, ErrorResponse]:
@@ -90,8 +510,67 @@ class APIClient:
         Returns:
             Response from the API.
         """
-        response = requests.delete(f"{self.base_url}/files/{file_id}")
+        response = self._request("DELETE", f"/files/{file_id}")
         return self._request_handler(response)
 
+    def get_file_records(self, file_ids: List[str]) -> Union[FileRecords, ErrorResponse]:
+        """Get the metadata of many files from the API in one request.
+
+        Args:
+            file_ids: IDs of the files.
+
+        Returns:
+            Metadata of the files found and the IDs that do not exist, or the error from the API.
+        """
+        response = self._request("POST", "/files/bulk/get", json={"file_ids": file_ids})
+        if not response.ok:
+            return self._error_handler(response)
+        return parse_file_records(response.json())
+
+    def rename_files(self, new_names: Dict[str, str]) -> Union[BulkOperationResult, ErrorResponse]:
+        """Rename many files in the API in one request.
+
+        Args:
+            new_names: New name of each file, by file ID.
+
+        Returns:
+            The number of files renamed and the IDs that do not exist, or the error from the API.
+        """
+        response = self._request("POST", "/files/bulk/rename", json={"new_names": new_names})
+        if not response.ok:
+            return self._error_handler(response)
+        return BulkOperationResult(**response.json())
+
+    def delete_files(self, file_ids: List[str]) -> Union[BulkOperationResult, ErrorResponse]:
+        """Delete many files from the API in one request.
+
+        Args:
+            file_ids: IDs of the files to delete.
+
+        Returns:
+            The number of files deleted, the IDs that do not exist and the IDs that could not be deleted, or the error
+            from the API.
+        """
+        response = self._request("POST", "/files/bulk/delete", json={"file_ids": file_ids})
+        if not response.ok:
+            return self._error_handler(response)
+        return BulkOperationResult(**response.json())
+
+
+def parse_file_records(response_json: Dict[str, Any]) -> FileRecords:
+    """Get the file records from the body of a bulk get response.
+
+    Args:
+        response_json: Parsed body of the response.
+
+    Returns:
+        Metadata of the files found and the IDs that do not exist.
+    """
+    files = [FileRecordDetails(**{**file,
+                                  "created_timestamp": datetime.fromisoformat(file["created_timestamp"]),
+                                  "last_modified_timestamp": datetime.fromisoformat(file["last_modified_timestamp"])})
+             for file in response_json["files"]]
+    return FileRecords(files=files, missing=response_json["missing"])
+
 
 # TODO: Use Marshmallow to validate the response from the API
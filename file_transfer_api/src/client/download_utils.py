@@ -0,0 +1,180 @@
+import hashlib
+import os
+import string
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
+
+# Bytes read from the response and written at a time when streaming a download
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Smallest byte range a parallel download fetches on a connection of its own
+MIN_SEGMENT_SIZE = 1024 * 1024
+
+# Called with the bytes written so far and the size of the file, if the response gives it
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def get_expected_checksum(etag: Optional[str], checksum_algorithm: str = "sha256") -> Optional[str]:
+    """Get the checksum of a file's original content from the entity tag of its download.
+
+    The API's entity tag is the checksum, with the content encoding appended if the file is sent compressed, e.g.
+    "<checksum>-gzip". Clients decode the content as it is read, so the checksum is always of the original content.
+    Files stored without a checksum are sent a weak entity tag that is not a digest of their content, so weak entity
+    tags, and any that are not a hex digest of the algorithm, are not taken for a checksum.
+
+    Args:
+        etag: ETag header of the response.
+        checksum_algorithm: hashlib algorithm the API checksums files with. Defaults to "sha256".
+
+    Returns:
+        The hex digest of the file's content, or None if the response has no entity tag holding one.
+    """
+    if not etag or etag.startswith("W/"):
+        return None
+    checksum = etag.strip('"').split("-", 1)[0]
+    if len(checksum) != hashlib.new(checksum_algorithm).digest_size * 2 or \
+            any(character not in string.hexdigits for character in checksum):
+        return None
+    return checksum
+
+
+def get_expected_size(content_length: Optional[str], content_encoding: Optional[str]) -> Optional[int]:
+    """Get the size of a file's original content from the headers of its download.
+
+    Args:
+        content_length: Content-Length header of the response.
+        content_encoding: Content-Encoding header of the response.
+
+    Returns:
+        The size in bytes, or None if it is not known because the file is sent compressed or in chunks.
+    """
+    if content_length is None or content_encoding:
+        return None
+    return int(content_length)
+
+
+def split_ranges(size: int, count: int, min_segment_size: int = MIN_SEGMENT_SIZE) -> List[Tuple[int, int]]:
+    """Split a file into contiguous byte ranges of about the same size.
+
+    Args:
+        size: Size of the file in bytes.
+        count: Most ranges to split the file into.
+        min_segment_size: Fewest bytes in a range, so that small files are not split into many tiny requests. Defaults
+            to MIN_SEGMENT_SIZE (1 MiB).
+
+    Returns:
+        List of (start, end) byte ranges, where end is inclusive, in order. Empty if the file is empty.
+    """
+    if size == 0:
+        return []
+    count = max(min(count, size // max(min_segment_size, 1)), 1)
+    bounds = [size * index // count for index in range(count + 1)]
+    return [(bounds[index], bounds[index + 1] - 1) for index in range(count)]
+
+
+def preallocate_file(path: Path, size: int):
+    """Create a file of the given size, so that ranges of it can be written at their offsets in any order.
+
+    The disk space is reserved up front where the platform supports it, so a full disk fails the download straight away
+    rather than part way through, and the file is not fragmented by writes landing out of order.
+
+    Args:
+        path: Path of the file to create.
+        size: Size of the file in bytes.
+    """
+    with open(path, "wb") as f:
+        if size and hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(f.fileno(), 0, size)
+        else:
+            f.truncate(size)
+
+
+def hash_file(path: Path, checksum_algorithm: str = "sha256", chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> str:
+    """Compute the checksum of a file, reading it a chunk at a time.
+
+    Args:
+        path: Path of the file.
+        checksum_algorithm: hashlib algorithm to use. Defaults to "sha256".
+        chunk_size: Bytes read at a time. Defaults to DOWNLOAD_CHUNK_SIZE (1 MiB).
+
+    Returns:
+        The hex digest of the file's content.
+    """
+    hasher = hashlib.new(checksum_algorithm)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class DownloadWriter:
+    """Writes a download to a path or file object a chunk at a time, hashing the content as it goes.
+
+    Downloads to a path are written to a ".part" file next to it, which only replaces the path once the download is
+    complete and its checksum matches, so a failed download never leaves a partial file at the path.
+    """
+
+    def __init__(self, destination: Union[str, Path, BinaryIO], checksum_algorithm: str = "sha256",
+                 expected_size: Optional[int] = None, progress: Optional[ProgressCallback] = None):
+        """Initialise the download writer.
+
+        Args:
+            destination: Path to write the file to, or a binary file object to write it into.
+            checksum_algorithm: hashlib algorithm the API checksums files with. Defaults to "sha256".
+            expected_size: Size of the file, passed on to the progress callback. Defaults to None, i.e. unknown.
+            progress: Callback called with the bytes written so far and the expected size after every chunk. Defaults
+                to None.
+        """
+        self.destination = destination
+        self.expected_size = expected_size
+        self.progress = progress
+        self.hasher = hashlib.new(checksum_algorithm)
+        self.size = 0
+        self.discarded = False
+        self._part_path: Optional[Path] = None
+        self._file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "DownloadWriter":
+        if isinstance(self.destination, (str, Path)):
+            path = Path(self.destination)
+            self._part_path = path.with_name(f"{path.name}.part")
+            self._file = open(self._part_path, "wb")
+        else:
+            self._file = self.destination
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._part_path is None:
+            return
+        self._file.close()
+        if exc_type is None and not self.discarded:
+            os.replace(self._part_path, self.destination)
+        else:
+            self._part_path.unlink(missing_ok=True)
+
+    def write(self, chunk: bytes):
+        """Write a chunk of the file.
+
+        Args:
+            chunk: Next chunk of the file's content.
+        """
+        self._file.write(chunk)
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        if self.progress is not None:
+            self.progress(self.size, self.expected_size)
+
+    def verify(self, expected_checksum: Optional[str]) -> bool:
+        """Check the checksum of the content written against the checksum the API gave. If they differ, the download to
+        a path is discarded.
+
+        Args:
+            expected_checksum: Checksum the API gave, or None if it gave none.
+
+        Returns:
+            True if the checksums match, or if there is no checksum to check against.
+        """
+        if expected_checksum is None or self.hasher.hexdigest() == expected_checksum:
+            return True
+        self.discarded = True
+        return False
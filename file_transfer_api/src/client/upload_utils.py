@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import io
+import mimetypes
+import uuid
+from typing import AsyncIterator, BinaryIO, Callable, Optional, Tuple
+
+# Called with the bytes of the file sent so far and the size of the file
+UploadProgressCallback = Callable[[int, int], None]
+
+# Bytes of an upload read from disk at a time when it is sent by the async client
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_form_framing(file_name: str) -> Tuple[str, bytes, bytes]:
+    """Get the framing of a multipart/form-data body that sends a file in the "file" field.
+
+    Args:
+        file_name: Name of the file.
+
+    Returns:
+        The Content-Type header of the body, and the bytes to send before and after the file's content.
+    """
+    boundary = uuid.uuid4().hex
+    content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    file_name = file_name.replace('"', "%22")
+    prefix = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+              f'Content-Type: {content_type}\r\n\r\n').encode()
+    return f"multipart/form-data; boundary={boundary}", prefix, f"\r\n--{boundary}--\r\n".encode()
+
+
+def hash_file_range(file: BinaryIO, offset: int, length: int, checksum_algorithm: str = "sha256",
+                    chunk_size: int = 1024 * 1024) -> str:
+    """Compute the checksum of a range of an open file, reading it a chunk at a time.
+
+    Args:
+        file: Binary file to read.
+        offset: Offset of the range in bytes.
+        length: Length of the range in bytes.
+        checksum_algorithm: hashlib algorithm to use. Defaults to "sha256".
+        chunk_size: Bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        The hex digest of the range.
+    """
+    hasher = hashlib.new(checksum_algorithm)
+    file.seek(offset)
+    while length > 0 and (chunk := file.read(min(chunk_size, length))):
+        hasher.update(chunk)
+        length -= len(chunk)
+    return hasher.hexdigest()
+
+
+class UploadStream(io.RawIOBase):
+    """Read-only, seekable view of a range of a file, optionally wrapped in a prefix and a suffix, to send as a request
+    body.
+
+    requests sends a body with a length as it is read, a block at a time, with a Content-Length header, so the range is
+    never held in memory. The view can be rewound, so a request that is retried sends the body again from the start.
+    Progress is reported as the position in the range, so bytes sent again after a rewind are not counted twice.
+    """
+
+    def __init__(self, file: BinaryIO, offset: int, length: int, prefix: bytes = b"", suffix: bytes = b"",
+                 progress: Optional[UploadProgressCallback] = None, progress_offset: int = 0,
+                 total_size: Optional[int] = None):
+        """Initialise the upload stream.
+
+        Args:
+            file: Binary file to read the range from.
+            offset: Offset of the range in bytes.
+            length: Length of the range in bytes.
+            prefix: Bytes sent before the range. Defaults to b"".
+            suffix: Bytes sent after the range. Defaults to b"".
+            progress: Callback called with the bytes of the file sent so far and the size of the file after every read.
+                Defaults to None.
+            progress_offset: Bytes of the file sent before this range, added to the bytes reported. Defaults to 0.
+            total_size: Size of the file, reported to the progress callback. Defaults to None, i.e. the range's length.
+        """
+        super().__init__()
+        self.file = file
+        self.offset = offset
+        self.length = length
+        self.prefix = prefix
+        self.suffix = suffix
+        self.progress = progress
+        self.progress_offset = progress_offset
+        self.total_size = length if total_size is None else total_size
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.prefix) + self.length + len(self.suffix)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, position: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            position += self.position
+        elif whence == io.SEEK_END:
+            position += len(self)
+        self.position = min(max(position, 0), len(self))
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the body from the current position.
+
+        Args:
+            size: Most bytes to read, or -1 to read to the end. Defaults to -1.
+
+        Returns:
+            The bytes read, which are empty at the end of the body.
+        """
+        if size is None or size < 0:
+            size = len(self) - self.position
+        chunks = []
+        while size > 0 and self.position < len(self):
+            chunk = self._read_at(self.position, size)
+            chunks.append(chunk)
+            self.position += len(chunk)
+            size -= len(chunk)
+        if self.progress is not None and chunks:
+            sent = min(max(self.position - len(self.prefix), 0), self.length)
+            self.progress(self.progress_offset + sent, self.total_size)
+        return b"".join(chunks)
+
+    def _read_at(self, position: int, size: int) -> bytes:
+        """Read up to size bytes from within one of the prefix, the range and the suffix.
+
+        Args:
+            position: Position in the body to read from.
+            size: Most bytes to read.
+
+        Returns:
+            The bytes read, which are never empty before the end of the body.
+
+        Raises:
+            OSError: If the file ends before the range does.
+        """
+        if position < len(self.prefix):
+            return self.prefix[position:position + size]
+        position -= len(self.prefix)
+        if position < self.length:
+            self.file.seek(self.offset + position)
+            chunk = self.file.read(min(size, self.length - position))
+            if not chunk:
+                raise OSError(f'File ended {self.length - position} bytes before the end of the upload range')
+            return chunk
+        position -= self.length
+        return self.suffix[position:position + size]
+
+
+async def aiter_upload_stream(body: UploadStream, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read an upload stream a chunk at a time in a worker thread, so that reading the file never blocks the event loop.
+
+    Args:
+        body: Upload stream to read.
+        chunk_size: Bytes read at a time. Defaults to UPLOAD_CHUNK_SIZE (1 MiB).
+
+    Yields:
+        Chunks of the body, in order.
+    """
+    while chunk := await asyncio.to_thread(body.read, chunk_size):
+        yield chunk
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
 from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
 
 
 class AbstractDatabaseManager(ABC):
@@ -9,20 +11,37 @@ class AbstractDatabaseManager(ABC):
     """
 
     @abstractmethod
-    def create_file_record(self, name: str, file_id: str, content_type: str, size: int) -> str:
+    def create_file_record(self, name: str, file_id: str, content_type: str, size: int,
+                           checksum: Optional[str] = None, stored_size: Optional[int] = None,
+                           content_encoding: Optional[str] = None) -> str:
         """Abstract method to create a file record.
 
         Args:
             name: Name of the file
             file_id: Id of the file
             content_type: Content type of the file
-            size: Size of the file
+            size: Size of the file in bytes
+            checksum: Hex digest of the file contents
+            stored_size: Size of the file as stored, if it differs from its size
+            content_encoding: Encoding the file is stored with, if it is compressed
 
         Returns:
             A message confirming the file record creation.
         """
         pass
 
+    @abstractmethod
+    def bulk_create_file_records(self, records: List[Dict[str, Any]]) -> List[DatabaseEntry]:
+        """Abstract method to create many file records in a single transaction.
+
+        Args:
+            records: Keyword arguments of create_file_record for each file record
+
+        Returns:
+            The file records created.
+        """
+        pass
+
     @abstractmethod
     def get_file_record(self, file_id: str) -> DatabaseEntry:
         """Abstract method to get a file record.
@@ -35,6 +54,30 @@ class AbstractDatabaseManager(ABC):
         """
         pass
 
+    @abstractmethod
+    def bulk_get_file_records(self, file_ids: List[str]) -> List[DatabaseEntry]:
+        """Abstract method to get many file records.
+
+        Args:
+            file_ids: Ids of the file records to get
+
+        Returns:
+            The file records found. Ids that do not exist are left out.
+        """
+        pass
+
+    @abstractmethod
+    def list_file_records(self, query: FileRecordQuery) -> List[DatabaseEntry]:
+        """Abstract method to get a page of file records.
+
+        Args:
+            query: Sort order, filters and position of the page
+
+        Returns:
+            Up to query.limit file records, in the order requested.
+        """
+        pass
+
     @abstractmethod
     def rename_file_record(self, file_id: str, new_name: str) -> str:
         """Abstract method to change a file record's file id.
@@ -48,6 +91,18 @@ class AbstractDatabaseManager(ABC):
         """
         pass
 
+    @abstractmethod
+    def bulk_rename_file_records(self, new_names: Dict[str, str]) -> int:
+        """Abstract method to rename many file records in a single transaction.
+
+        Args:
+            new_names: New name of each file record, by file id
+
+        Returns:
+            The number of file records renamed.
+        """
+        pass
+
     @abstractmethod
     def delete_file_record(self, file_id: str) -> str:
         """Abstract method to delete a file record.
@@ -59,3 +114,15 @@ class AbstractDatabaseManager(ABC):
             A message confirming the file record deletion.
         """
         pass
+
+    @abstractmethod
+    def bulk_delete_file_records(self, file_ids: List[str]) -> int:
+        """Abstract method to delete many file records in a single transaction.
+
+        Args:
+            file_ids: Ids of the file records to delete
+
+        Returns:
+            The number of file records deleted.
+        """
+        pass
@@ -0,0 +1,360 @@
+import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Executable, case, delete, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database_manager.abstract_database_manager import AbstractDatabaseManager
+from src.database_manager.database_connection.local_database import get_async_session_local
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from src.database_manager.utils.record_utils import chunked, get_bulk_insert_rows, get_listing_statement
+from src.exceptions.database_exceptions import (DatabaseWriteError, DatabaseReadError, DatabaseConnectionError,
+                                               FileRecordNotFoundError)
+
+
+class AsyncLocalDatabaseManager(AbstractDatabaseManager):
+    """Class that manages the local database with SQLAlchemy's async engine.
+
+    It uses aiosqlite for SQLite and asyncpg for Postgres. Each instance owns one AsyncSession, which must not be shared
+    between concurrent tasks, so an instance should be created per request.
+    """
+
+    def __init__(self, db: Optional[AsyncSession] = None):
+        """Initialises the async local database manager
+
+        Args:
+            db: Async session to use. Defaults to a new session from the async sessionmaker.
+        """
+        self.db = db if db is not None else get_async_session_local()()
+
+    async def close(self):
+        """Close the database session"""
+        await self.db.close()
+
+    async def check_database_connection(self) -> bool:
+        """Check if the database is connected.
+
+        Returns:
+            True if the database is connected.
+
+        Raises:
+            DatabaseConnectionError: If the database is not connected.
+        """
+        try:
+            await self.db.execute(text("SELECT 1"))
+        except SQLAlchemyError as e:
+            raise DatabaseConnectionError(f'Error occurred while checking database connection: {e}')
+        return True
+
+    async def _find_file_record(self, file_id: str) -> Optional[DatabaseEntry]:
+        """Find a file record in the database.
+
+        Args:
+            file_id: ID of the file to find
+
+        Returns:
+            File record which contains the file metadata, or None if it does not exist.
+        """
+        result = await self.db.execute(select(DatabaseEntry).where(DatabaseEntry.file_id == file_id))
+        return result.scalars().first()
+
+    async def get_file_record(self, file_id: str) -> DatabaseEntry:
+        """Get a file from the database.
+
+        Args:
+            file_id: ID of the file to get
+
+        Returns:
+            File record which contains the file metadata.
+
+        Raises:
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseReadError: If the file record cannot be read
+        """
+        try:
+            record_query = await self._find_file_record(file_id)
+            # raise error if the file does not exist (i.e. the query returns None)
+            if record_query is None:
+                raise FileRecordNotFoundError(f'File with id {file_id} does not exist')
+        except SQLAlchemyError as e:
+            raise DatabaseReadError(f'Error occurred while reading file record: {e}')
+        return record_query
+
+    async def bulk_get_file_records(self, file_ids: List[str]) -> List[DatabaseEntry]:
+        """Get many file records from the database, with one query per chunk of file ids.
+
+        Args:
+            file_ids: IDs of the files to get
+
+        Returns:
+            File records which contain the file metadata, in no particular order. IDs that do not exist are left out.
+
+        Raises:
+            DatabaseReadError: If the file records cannot be read
+        """
+        file_records = []
+        try:
+            for chunk in chunked(list(dict.fromkeys(file_ids))):
+                result = await self.db.execute(select(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk)))
+                file_records.extend(result.scalars().all())
+        except SQLAlchemyError as e:
+            raise DatabaseReadError(f'Error occurred while reading file records: {e}')
+        return file_records
+
+    async def get_all_file_records(self) -> List[DatabaseEntry]:
+        """Get all files from the database.
+
+        Returns:
+            List of file records which contain the file metadata.
+        """
+        result = await self.db.execute(select(DatabaseEntry))
+        return list(result.scalars().all())
+
+    async def list_file_records(self, query: FileRecordQuery) -> List[DatabaseEntry]:
+        """Get a page of file records, using keyset pagination.
+
+        Args:
+            query: Sort order, filters and position of the page
+
+        Returns:
+            Up to query.limit file records, in the order requested.
+
+        Raises:
+            DatabaseReadError: If the file records cannot be read
+        """
+        try:
+            result = await self.db.execute(get_listing_statement(query))
+        except SQLAlchemyError as e:
+            raise DatabaseReadError(f'Error occurred while listing file records: {e}')
+        return list(result.scalars().all())
+
+    async def create_file_record(self, name: str, file_id: str, content_type: ContentEnum, size: int,
+                                 checksum: Optional[str] = None, stored_size: Optional[int] = None,
+                                 content_encoding: Optional[str] = None) -> DatabaseEntry:
+        """Create a file record in the database.
+
+        Args:
+            name: Name of the file
+            file_id: ID of the file
+            content_type: Content type of the file
+            size: Size of the file in bytes
+            checksum: Hex digest of the file contents. Defaults to None.
+            stored_size: Size of the file as stored in bytes. Defaults to None, i.e. the same as size.
+            content_encoding: Encoding the file is stored with, e.g. "gzip". Defaults to None, i.e. not compressed.
+
+        Returns:
+            File record which contains the file metadata. It is not attached to the session.
+
+        Raises:
+            DatabaseWriteError: If the file record creation fails, e.g. because it already exists
+        """
+        row = get_bulk_insert_rows([{"name": name, "file_id": file_id, "content_type": content_type, "size": size,
+                                     "checksum": checksum, "stored_size": stored_size,
+                                     "content_encoding": content_encoding}])[0]
+
+        # The primary key rejects a file id that already exists, so the insert is the only round trip before the commit
+        try:
+            await self.db.execute(insert(DatabaseEntry).values(**row))
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise DatabaseWriteError(f'File with id {file_id} already exists')
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while creating file record: {e}')
+
+        # Built from the inserted values rather than read back
+        return DatabaseEntry(**row)
+
+    async def bulk_create_file_records(self, records: List[Dict[str, Any]]) -> List[DatabaseEntry]:
+        """Create many file records in the database with a single bulk insert and a single commit.
+
+        Either every record is created or, if any of them cannot be, none are.
+
+        Args:
+            records: Keyword arguments of create_file_record for each file record
+
+        Returns:
+            File records which contain the file metadata. They are not attached to the session.
+
+        Raises:
+            DatabaseWriteError: If the file records cannot be created, e.g. because one of them already exists
+        """
+        if not records:
+            return []
+        rows = get_bulk_insert_rows(records)
+
+        try:
+            await self.db.execute(insert(DatabaseEntry), rows)
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while creating file records: {e}')
+
+        return [DatabaseEntry(**row) for row in rows]
+
+    async def _write_file_record(self, statement: Executable, file_id: str, action: str):
+        """Update or delete a single file record with one statement and commit it, without reading the record first.
+
+        Args:
+            statement: Update or delete statement matching the file record by its ID
+            file_id: ID of the file
+            action: What the statement does, e.g. "renaming", for error messages
+
+        Raises:
+            FileRecordNotFoundError: If no file record has the ID
+            DatabaseWriteError: If the statement fails
+        """
+        try:
+            result = await self.db.execute(statement.execution_options(synchronize_session=False))
+            if result.rowcount == 0:
+                await self.db.rollback()
+                raise FileRecordNotFoundError(f'File with id {file_id} does not exist')
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while {action} file record: {e}')
+
+    async def update_file_record(self, file_id: str, name: str, content_type: ContentEnum, size: int) -> str:
+        """Update a file record in the database.
+
+        Args:
+            file_id: ID of the file
+            name: Name of the file
+            content_type: Content type of the file
+            size: Size of the file
+
+        Returns:
+            A message confirming the file record update.
+
+        Raises:
+            DatabaseWriteError: If the file record update fails
+            FileRecordNotFoundError: If the file record does not exist
+        """
+        await self._write_file_record(update(DatabaseEntry).where(DatabaseEntry.file_id == file_id)
+                                      .values(name=name, content_type=content_type, size=size,
+                                              last_modified_timestamp=datetime.datetime.now()),
+                                      file_id, "updating")
+        return "File record updated successfully"
+
+    async def rename_file_record(self, file_id: str, new_file_name: str) -> str:
+        """Rename a file record in the database.
+
+        Args:
+            file_id: ID of the file
+            new_file_name: New name of the file
+
+        Returns:
+            A message confirming the file record rename.
+
+        Raises:
+            DatabaseWriteError: If the file record rename fails
+            FileRecordNotFoundError: If the file record does not exist
+        """
+        await self._write_file_record(update(DatabaseEntry).where(DatabaseEntry.file_id == file_id)
+                                      .values(name=new_file_name, last_modified_timestamp=datetime.datetime.now()),
+                                      file_id, "renaming")
+        return "File record renamed successfully"
+
+    async def bulk_rename_file_records(self, new_names: Dict[str, str]) -> int:
+        """Rename many file records in a single transaction, with one update per chunk of file ids.
+
+        Args:
+            new_names: New name of each file, by file ID
+
+        Returns:
+            The number of file records renamed. IDs that do not exist are skipped.
+
+        Raises:
+            DatabaseWriteError: If the file records cannot be renamed, in which case none of them are
+        """
+        last_modified_timestamp = datetime.datetime.now()
+        renamed_count = 0
+        try:
+            for chunk in chunked(list(new_names)):
+                result = await self.db.execute(
+                    update(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk))
+                    .values(name=case({file_id: new_names[file_id] for file_id in chunk}, value=DatabaseEntry.file_id),
+                            last_modified_timestamp=last_modified_timestamp)
+                    .execution_options(synchronize_session=False))
+                renamed_count += result.rowcount
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while renaming file records: {e}')
+        return renamed_count
+
+    async def delete_file_record(self, file_id: str) -> str:
+        """Delete a file record in the database.
+
+        Args:
+            file_id: ID of the file
+
+        Returns:
+            A message confirming the file record deletion.
+
+        Raises:
+            DatabaseWriteError: If the file record deletion fails
+            FileRecordNotFoundError: If the file record does not exist
+        """
+        await self._write_file_record(delete(DatabaseEntry).where(DatabaseEntry.file_id == file_id), file_id,
+                                      "deleting")
+        return "File record deleted successfully"
+
+    async def bulk_delete_file_records(self, file_ids: List[str]) -> int:
+        """Delete many file records in a single transaction, with one delete per chunk of file ids.
+
+        Args:
+            file_ids: IDs of the files to delete
+
+        Returns:
+            The number of file records deleted. IDs that do not exist are skipped.
+
+        Raises:
+            DatabaseWriteError: If the file records cannot be deleted, in which case none of them are
+        """
+        deleted_count = 0
+        try:
+            for chunk in chunked(list(dict.fromkeys(file_ids))):
+                result = await self.db.execute(delete(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk))
+                                               .execution_options(synchronize_session=False))
+                deleted_count += result.rowcount
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while deleting file records: {e}')
+        return deleted_count
+
+    async def delete_all_file_records(self) -> str:
+        """Delete all file records in the database.
+
+        Returns:
+            String confirming how many file records have been deleted.
+
+        Raises:
+            DatabaseWriteError: If the file record deletion fails
+        """
+        try:
+            deleted_count = await self.get_count()
+
+            await self.db.execute(delete(DatabaseEntry))
+            await self.db.commit()
+
+        except SQLAlchemyError as e:
+            # Roll back the transaction in case of an error
+            await self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while deleting all file records: {e}')
+
+        return f"All of the {deleted_count} file records have been deleted."
+
+    async def get_count(self) -> int:
+        """Get the number of file records in the database.
+
+        Returns:
+            The number of file records in the database.
+        """
+        result = await self.db.execute(select(func.count()).select_from(DatabaseEntry))
+        return result.scalar_one()
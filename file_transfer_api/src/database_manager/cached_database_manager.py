@@ -0,0 +1,259 @@
+from typing import Any, Dict, List, Optional
+
+from src.database_manager.abstract_database_manager import AbstractDatabaseManager
+from src.database_manager.metadata_cache import MISSING, MetadataCache, metadata_cache
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from src.exceptions.database_exceptions import FileRecordNotFoundError
+from src.utils.concurrency_utils import run_database_operation
+
+
+class CachedDatabaseManager(AbstractDatabaseManager):
+    """Database manager that puts a read-through metadata cache in front of another database manager.
+
+    File record lookups are answered from the cache when possible, so hot lookups do not query the database. Writes go
+    to the wrapped manager and then update or invalidate the cached record. Operations are awaitable and the wrapped
+    manager's operations run with run_database_operation, so it can be either a blocking or an async manager.
+    """
+
+    def __init__(self, database_manager: AbstractDatabaseManager, cache: Optional[MetadataCache] = None):
+        """Initialise the cached database manager.
+
+        Args:
+            database_manager: Database manager to read from on a miss and to write to.
+            cache: Metadata cache to use. Defaults to the cache shared by the whole process.
+        """
+        self.database_manager = database_manager
+        self.cache = metadata_cache if cache is None else cache
+
+    async def close(self):
+        """Close the wrapped manager's session, returning its connection to the pool. It is opened again if used."""
+        await run_database_operation(self.database_manager.close)
+
+    async def check_database_connection(self) -> bool:
+        """Check if the database is connected.
+
+        Returns:
+            True if the database is connected.
+        """
+        return await run_database_operation(self.database_manager.check_database_connection)
+
+    async def get_file_record(self, file_id: str) -> DatabaseEntry:
+        """Get a file record, from the cache if it is there.
+
+        The record returned is not attached to a session, so changing it does not change the database.
+
+        Args:
+            file_id: ID of the file to get
+
+        Returns:
+            File record which contains the file metadata.
+
+        Raises:
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseReadError: If the file record cannot be read
+        """
+        cached_record = self.cache.get(file_id)
+        if cached_record is MISSING:
+            raise FileRecordNotFoundError(f'File with id {file_id} does not exist')
+        if cached_record is not None:
+            return DatabaseEntry(**cached_record)
+
+        version = self.cache.version
+        try:
+            file_record = await run_database_operation(self.database_manager.get_file_record, file_id)
+        except FileRecordNotFoundError:
+            self.cache.put(file_id, MISSING, version=version)
+            raise
+        self.cache.put(file_id, file_record.to_dict(), version=version)
+        return file_record
+
+    async def bulk_get_file_records(self, file_ids: List[str]) -> List[DatabaseEntry]:
+        """Get many file records, reading only those that are not cached from the database.
+
+        Args:
+            file_ids: IDs of the files to get
+
+        Returns:
+            File records which contain the file metadata, in no particular order. IDs that do not exist are left out.
+        """
+        file_records = []
+        uncached_file_ids = []
+        for file_id in dict.fromkeys(file_ids):
+            cached_record = self.cache.get(file_id)
+            if cached_record is None:
+                uncached_file_ids.append(file_id)
+            elif cached_record is not MISSING:
+                file_records.append(DatabaseEntry(**cached_record))
+        if not uncached_file_ids:
+            return file_records
+
+        version = self.cache.version
+        read_file_records = await run_database_operation(self.database_manager.bulk_get_file_records,
+                                                         uncached_file_ids)
+        for file_record in read_file_records:
+            self.cache.put(file_record.file_id, file_record.to_dict(), version=version)
+        found_file_ids = {file_record.file_id for file_record in read_file_records}
+        for file_id in uncached_file_ids:
+            if file_id not in found_file_ids:
+                self.cache.put(file_id, MISSING, version=version)
+        return file_records + read_file_records
+
+    async def get_all_file_records(self) -> List[DatabaseEntry]:
+        """Get all file records from the database.
+
+        Returns:
+            List of file records which contain the file metadata.
+        """
+        return await run_database_operation(self.database_manager.get_all_file_records)
+
+    async def list_file_records(self, query: FileRecordQuery) -> List[DatabaseEntry]:
+        """Get a page of file records from the database. Listings are not cached.
+
+        Args:
+            query: Sort order, filters and position of the page
+
+        Returns:
+            Up to query.limit file records, in the order requested.
+        """
+        return await run_database_operation(self.database_manager.list_file_records, query)
+
+    async def create_file_record(self, name: str, file_id: str, content_type: ContentEnum, size: int,
+                                 checksum: Optional[str] = None, stored_size: Optional[int] = None,
+                                 content_encoding: Optional[str] = None) -> DatabaseEntry:
+        """Create a file record and cache it.
+
+        Args:
+            name: Name of the file
+            file_id: ID of the file
+            content_type: Content type of the file
+            size: Size of the file in bytes
+            checksum: Hex digest of the file contents. Defaults to None.
+            stored_size: Size of the file as stored in bytes. Defaults to None, i.e. the same as size.
+            content_encoding: Encoding the file is stored with, e.g. "gzip". Defaults to None, i.e. not compressed.
+
+        Returns:
+            File record which contains the file metadata.
+        """
+        self.cache.invalidate(file_id)
+        version = self.cache.version
+        file_record = await run_database_operation(self.database_manager.create_file_record, name=name,
+                                                   file_id=file_id, content_type=content_type, size=size,
+                                                   checksum=checksum, stored_size=stored_size,
+                                                   content_encoding=content_encoding)
+        self.cache.put(file_id, file_record.to_dict(), version=version)
+        return file_record
+
+    async def bulk_create_file_records(self, records: List[Dict[str, Any]]) -> List[DatabaseEntry]:
+        """Create many file records in a single transaction and cache them.
+
+        Args:
+            records: Keyword arguments of create_file_record for each file record
+
+        Returns:
+            File records which contain the file metadata.
+        """
+        for record in records:
+            self.cache.invalidate(record["file_id"])
+        version = self.cache.version
+        file_records = await run_database_operation(self.database_manager.bulk_create_file_records, records)
+        for file_record in file_records:
+            self.cache.put(file_record.file_id, file_record.to_dict(), version=version)
+        return file_records
+
+    async def update_file_record(self, file_id: str, name: str, content_type: ContentEnum, size: int) -> str:
+        """Update a file record and invalidate its cached copy.
+
+        Args:
+            file_id: ID of the file
+            name: Name of the file
+            content_type: Content type of the file
+            size: Size of the file
+
+        Returns:
+            A message confirming the update.
+        """
+        try:
+            return await run_database_operation(self.database_manager.update_file_record, file_id, name,
+                                                content_type, size)
+        finally:
+            self.cache.invalidate(file_id)
+
+    async def rename_file_record(self, file_id: str, new_file_name: str) -> str:
+        """Rename a file record and invalidate its cached copy.
+
+        Args:
+            file_id: ID of the file
+            new_file_name: New name of the file
+
+        Returns:
+            A message confirming the rename.
+        """
+        try:
+            return await run_database_operation(self.database_manager.rename_file_record, file_id, new_file_name)
+        finally:
+            self.cache.invalidate(file_id)
+
+    async def bulk_rename_file_records(self, new_names: Dict[str, str]) -> int:
+        """Rename many file records and invalidate their cached copies.
+
+        Args:
+            new_names: New name of each file, by file ID
+
+        Returns:
+            The number of file records renamed.
+        """
+        try:
+            return await run_database_operation(self.database_manager.bulk_rename_file_records, new_names)
+        finally:
+            for file_id in new_names:
+                self.cache.invalidate(file_id)
+
+    async def delete_file_record(self, file_id: str) -> str:
+        """Delete a file record and invalidate its cached copy.
+
+        Args:
+            file_id: ID of the file
+
+        Returns:
+            A message confirming the deletion.
+        """
+        try:
+            return await run_database_operation(self.database_manager.delete_file_record, file_id)
+        finally:
+            self.cache.invalidate(file_id)
+
+    async def bulk_delete_file_records(self, file_ids: List[str]) -> int:
+        """Delete many file records and invalidate their cached copies.
+
+        Args:
+            file_ids: IDs of the files to delete
+
+        Returns:
+            The number of file records deleted.
+        """
+        try:
+            return await run_database_operation(self.database_manager.bulk_delete_file_records, file_ids)
+        finally:
+            for file_id in file_ids:
+                self.cache.invalidate(file_id)
+
+    async def delete_all_file_records(self) -> str:
+        """Delete all file records and empty the cache.
+
+        Returns:
+            String confirming how many file records have been deleted.
+        """
+        try:
+            return await run_database_operation(self.database_manager.delete_all_file_records)
+        finally:
+            self.cache.clear()
+
+    async def get_count(self) -> int:
+        """Get the number of file records in the database.
+
+        Returns:
+            The number of file records in the database.
+        """
+        return await run_database_operation(self.database_manager.get_count)
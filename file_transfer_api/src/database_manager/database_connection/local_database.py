@@ -1,17 +1,245 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator
+
+from sqlalchemy import Engine, create_engine, event, exc, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
 import os
 from dotenv import load_dotenv
 
+from src.exceptions.database_exceptions import DatabaseConnectionError
+
 load_dotenv()  # Load the variables from .env
 
 DATABASE_URL = os.getenv("LOCAL_DATABASE_URL", default="sqlite:///./test.db")
+USE_ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", default="false").lower() in ("1", "true", "yes")
+
+# Connection pool settings
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", default=5))  # Connections kept open in the pool
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", default=10))  # Extra connections allowed under load
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", default=30))  # Seconds to wait for a connection
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", default="true").lower() in ("1", "true", "yes")
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", default=-1))  # Seconds before reconnecting, -1 is never
+
+# SQLite settings
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", default="default")  # One of SQLITE_PROFILES
+
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Pragmas applied to every new SQLite connection for each profile, trading durability for write throughput. WAL lets
+# readers carry on while a write is committed, and busy_timeout makes writers wait for the lock rather than failing
+# with "database is locked".
+# - durable: every commit is fsynced before it returns, so no committed write is lost even if the machine loses power.
+# - balanced: commits are only fsynced at checkpoints. A power loss can undo the last commits, but never corrupts the
+#   database, and the application crashing loses nothing.
+# - fast: SQLite never fsyncs and leaves it to the operating system, so a power loss can corrupt the database.
+# - default: SQLite's own settings, which fsync every commit without WAL. The faster profiles are opt-in.
+# WAL journal mode is stored in the database file, so it stays on after switching back to the default profile until
+# "PRAGMA journal_mode = DELETE" is run on the database.
+SQLITE_PROFILES = {
+    "durable": {"journal_mode": "WAL", "synchronous": "FULL", "busy_timeout": 5000, "cache_size": -2000,
+                "mmap_size": 0},
+    "balanced": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000, "cache_size": -64000,
+                 "mmap_size": 256 * 1024 * 1024},
+    "fast": {"journal_mode": "WAL", "synchronous": "OFF", "busy_timeout": 5000, "cache_size": -256000,
+             "mmap_size": 1024 * 1024 * 1024, "temp_store": "MEMORY"},
+    "default": {},
+}
+
+
+class PoolMetrics:
+    """Counts the requests that are waiting for a connection from the pool"""
+
+    def __init__(self):
+        """Initialise the pool metrics"""
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    @contextmanager
+    def track_wait(self) -> Iterator[None]:
+        """Context manager that counts the caller as waiting for a connection while it is open"""
+        with self._lock:
+            self.waiting += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredPoolMixin:
+    """Connection pool mixin that counts the callers waiting for a connection in pool_metrics, and raises
+    DatabaseConnectionError instead of SQLAlchemy's TimeoutError when none becomes free within the pool timeout"""
+
+    def connect(self) -> PoolProxiedConnection:
+        with pool_metrics.track_wait():
+            try:
+                return super().connect()
+            except exc.TimeoutError as e:
+                raise DatabaseConnectionError(f'No database connection became free in time: {e}')
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    """Queue pool that counts the callers waiting for a connection"""
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """Queue pool for async engines that counts the callers waiting for a connection"""
+
+
+def get_pool_options(database_url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Get the connection pool options for an engine.
+
+    In-memory SQLite databases live and die with their single connection, so they are left on SQLAlchemy's default pool.
+
+    Args:
+        database_url: URL of the database.
+        is_async: Whether the options are for an async engine. Defaults to False.
+
+    Returns:
+        Keyword arguments for create_engine.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": MeteredAsyncAdaptedQueuePool if is_async else MeteredQueuePool,
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+    }
+
+
+def apply_sqlite_profile(engine: Engine, profile: str = SQLITE_PROFILE):
+    """Apply a SQLite profile's pragmas to every connection an engine opens. Engines for other databases are left as
+    they are.
+
+    Args:
+        engine: Engine to configure. For an async engine, pass its sync_engine.
+        profile: Name of the profile in SQLITE_PROFILES. Defaults to SQLITE_PROFILE ("default").
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f'SQLite profile must be one of {tuple(SQLITE_PROFILES)}, got {profile}')
+    pragmas = SQLITE_PROFILES[profile]
+    if engine.url.get_backend_name() != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
 
 # Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **get_pool_options(DATABASE_URL))
+apply_sqlite_profile(engine)
 
 # SessionLocal class is a factory for new Session objects
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Base class for the models
 Base = declarative_base()
+
+
+def to_async_database_url(database_url: str) -> str:
+    """Convert a database URL to use the async driver for its backend.
+
+    Args:
+        database_url: URL of the database, e.g. sqlite:///./test.db
+
+    Returns:
+        The database URL with an async driver, e.g. sqlite+aiosqlite:///./test.db
+    """
+    url = make_url(database_url)
+    async_driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if async_driver is not None:
+        url = url.set(drivername=async_driver)
+    return url.render_as_string(hide_password=False)
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """Get the async SQLAlchemy engine. It is only created when first needed, so that the async drivers are only
+    required when the async database manager is used.
+
+    Returns:
+        The async engine for DATABASE_URL.
+    """
+    async_engine = create_async_engine(to_async_database_url(DATABASE_URL),
+                                       **get_pool_options(DATABASE_URL, is_async=True))
+    apply_sqlite_profile(async_engine.sync_engine)
+    return async_engine
+
+
+@lru_cache(maxsize=None)
+def get_async_session_local() -> async_sessionmaker:
+    """Get the factory for new AsyncSession objects.
+
+    Returns:
+        The async sessionmaker bound to the async engine.
+    """
+    return async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=get_async_engine())
+
+
+def get_db_session() -> Iterator[Session]:
+    """Dependency that provides a database session per request.
+
+    The session only checks out a connection from the pool when it is first used, so requests answered without the
+    database, e.g. from the metadata cache, never hold one. FastAPI closes the session only after the response body has
+    been sent, so routes that stream a file close it themselves first.
+
+    Yields:
+        A database session, which is closed once the request is done.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db_session() -> AsyncIterator[AsyncSession]:
+    """Dependency that provides an async database session per request, which checks out a connection when first used.
+
+    Yields:
+        An async database session, which is closed once the request is done.
+    """
+    db = get_async_session_local()()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def get_pool_status() -> Dict[str, int]:
+    """Get the status of the connection pool of the engine in use.
+
+    Returns:
+        The pool size, the number of connections checked in, checked out and in overflow, and the number of requests
+        waiting for a connection.
+    """
+    pool = get_async_engine().pool if USE_ASYNC_DATABASE else engine.pool
+    status = {"pool_size": 0, "checked_in": 0, "checked_out": 0, "overflow": 0, "waiting": pool_metrics.waiting}
+    # Only queue pools (the default for file-based SQLite and Postgres) keep track of their connections
+    if isinstance(pool, QueuePool):
+        status.update(pool_size=pool.size(),
+                      checked_in=pool.checkedin(),
+                      checked_out=pool.checkedout(),
+                      overflow=max(pool.overflow(), 0))
+    return status
@@ -1,20 +1,33 @@
 import datetime
-from typing import List
+from typing import Any, Dict, List, Optional
 from src.database_manager.abstract_database_manager import AbstractDatabaseManager
 from src.database_manager.schemas.content_enum import ContentEnum
 from src.database_manager.schemas.database_entry import DatabaseEntry
-from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from sqlalchemy import Executable, case, delete, insert, text, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
 from src.database_manager.database_connection.local_database import SessionLocal
-from src.exceptions.database_exceptions import DatabaseWriteError, DatabaseReadError, DatabaseConnectionError
+from src.database_manager.utils.record_utils import chunked, get_bulk_insert_rows, get_listing_statement
+from src.exceptions.database_exceptions import (DatabaseWriteError, DatabaseReadError, DatabaseConnectionError,
+                                               FileRecordNotFoundError)
 
 
 class LocalDatabaseManager(AbstractDatabaseManager):
     """Class that manages the local database. """
 
-    def __init__(self):
-        """Initialises the local database manager"""
-        self.db = SessionLocal()
+    def __init__(self, db: Optional[Session] = None):
+        """Initialises the local database manager
+
+        Args:
+            db: Session to use. Defaults to a new session from SessionLocal. Sessions must not be shared between
+                concurrent requests, so the API passes in a session per request.
+        """
+        self.db = db if db is not None else SessionLocal()
+
+    def close(self):
+        """Close the database session"""
+        self.db.close()
 
     def check_database_connection(self) -> bool:
         """Check if the database is connected.
@@ -41,18 +54,39 @@ class LocalDatabaseManager(AbstractDatabaseManager):
             File record which contains the file metadata.
 
         Raises:
-            DatabaseReadError: If the file does not exist
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseReadError: If the file record cannot be read
         """
         # return self.db.query(FileRecord).filter(FileRecord.file_id == file_id).first()
         try:
             record_query = self.db.query(DatabaseEntry).filter(DatabaseEntry.file_id == file_id).first()
             # raise error if the file does not exist (i.e. the query returns None)
             if record_query is None:
-                raise DatabaseReadError(f'File with id {file_id} does not exist')
+                raise FileRecordNotFoundError(f'File with id {file_id} does not exist')
         except SQLAlchemyError as e:
             raise DatabaseReadError(f'Error occurred while reading file record: {e}')
         return record_query
 
+    def bulk_get_file_records(self, file_ids: List[str]) -> List[DatabaseEntry]:
+        """Get many file records from the database, with one query per chunk of file ids.
+
+        Args:
+            file_ids: IDs of the files to get
+
+        Returns:
+            File records which contain the file metadata, in no particular order. IDs that do not exist are left out.
+
+        Raises:
+            DatabaseReadError: If the file records cannot be read
+        """
+        file_records = []
+        try:
+            for chunk in chunked(list(dict.fromkeys(file_ids))):
+                file_records.extend(self.db.query(DatabaseEntry).filter(DatabaseEntry.file_id.in_(chunk)).all())
+        except SQLAlchemyError as e:
+            raise DatabaseReadError(f'Error occurred while reading file records: {e}')
+        return file_records
+
     def get_all_file_records(self) -> List[DatabaseEntry]:
         """Get all files from the database.
 
@@ -61,84 +95,131 @@ class LocalDatabaseManager(AbstractDatabaseManager):
         """
         return self.db.query(DatabaseEntry).all()
 
-    def create_file_record(self, name: str, file_id: str, content_type: ContentEnum, size: int) -> DatabaseEntry:
+    def list_file_records(self, query: FileRecordQuery) -> List[DatabaseEntry]:
+        """Get a page of file records, using keyset pagination.
+
+        Args:
+            query: Sort order, filters and position of the page
+
+        Returns:
+            Up to query.limit file records, in the order requested.
+
+        Raises:
+            DatabaseReadError: If the file records cannot be read
+        """
+        try:
+            return list(self.db.scalars(get_listing_statement(query)).all())
+        except SQLAlchemyError as e:
+            raise DatabaseReadError(f'Error occurred while listing file records: {e}')
+
+    def create_file_record(self, name: str, file_id: str, content_type: ContentEnum, size: int,
+                           checksum: Optional[str] = None, stored_size: Optional[int] = None,
+                           content_encoding: Optional[str] = None) -> DatabaseEntry:
         """Create a file record in the database.
 
         Args:
             name: Name of the file
             file_id: ID of the file
             content_type: Content type of the file
-            size: Size of the file
+            size: Size of the file in bytes
+            checksum: Hex digest of the file contents. Defaults to None.
+            stored_size: Size of the file as stored in bytes. Defaults to None, i.e. the same as size.
+            content_encoding: Encoding the file is stored with, e.g. "gzip". Defaults to None, i.e. not compressed.
 
         Returns:
-            File record which contains the file metadata.
+            File record which contains the file metadata. It is not attached to the session.
 
         Raises:
-            DatabaseWriteError: If the file record creation fails
+            DatabaseWriteError: If the file record creation fails, e.g. because it already exists
         """
 
-        created_timestamp_str = datetime.datetime.now()
-
-        file_record = DatabaseEntry(
-            name=name,
-            file_id=file_id,
-            content_type=content_type,
-            size=size,
-            created_timestamp=created_timestamp_str,
-            last_modified_timestamp=created_timestamp_str
-        )
-
-        # Check if the file record already exists
-        if self.db.query(DatabaseEntry).filter(DatabaseEntry.file_id == file_id).first() is not None:
-            raise DatabaseWriteError(f'File with id {file_id} already exists')
+        row = get_bulk_insert_rows([{"name": name, "file_id": file_id, "content_type": content_type, "size": size,
+                                     "checksum": checksum, "stored_size": stored_size,
+                                     "content_encoding": content_encoding}])[0]
 
+        # The primary key rejects a file id that already exists, so the insert is the only round trip before the commit
         try:
-            self.db.add(file_record)
+            self.db.execute(insert(DatabaseEntry).values(**row))
             self.db.commit()
-            self.db.refresh(file_record)
+        except IntegrityError:
+            self.db.rollback()
+            raise DatabaseWriteError(f'File with id {file_id} already exists')
         except SQLAlchemyError as e:
             self.db.rollback()
             raise DatabaseWriteError(f'Error occurred while creating file record: {e}')
 
-        return file_record
+        # Built from the inserted values rather than read back
+        return DatabaseEntry(**row)
 
-    def update_file_record(self, file_id: str, name: str, content_type: ContentEnum, size: int) -> str:
-        """Update a file record in the database.
+    def bulk_create_file_records(self, records: List[Dict[str, Any]]) -> List[DatabaseEntry]:
+        """Create many file records in the database with a single bulk insert and a single commit.
+
+        Either every record is created or, if any of them cannot be, none are.
 
         Args:
-            file_id: ID of the file
-            name: Name of the file
-            content_type: Content type of the file
-            size: Size of the file
+            records: Keyword arguments of create_file_record for each file record
 
         Returns:
-            File record which contains the file metadata.
+            File records which contain the file metadata. They are not attached to the session.
 
         Raises:
-            DatabaseWriteError: If the file record update fails
-            DatabaseReadError: If the file record does not exist
+            DatabaseWriteError: If the file records cannot be created, e.g. because one of them already exists
         """
+        if not records:
+            return []
+        rows = get_bulk_insert_rows(records)
 
         try:
-            file_record = self.db.query(DatabaseEntry).filter(DatabaseEntry.file_id == file_id).first()
-            # raise error if the file does not exist (i.e. the query returns None)
-            if file_record is None:
-                raise DatabaseReadError(f'File with id {file_id} does not exist')
+            self.db.execute(insert(DatabaseEntry), rows)
+            self.db.commit()
         except SQLAlchemyError as e:
-            raise DatabaseReadError(f'Error occurred while reading file record: {e}')
+            self.db.rollback()
+            raise DatabaseWriteError(f'Error occurred while creating file records: {e}')
+
+        return [DatabaseEntry(**row) for row in rows]
 
-        file_record.name = name
-        file_record.content_type = content_type
-        file_record.size = size
+    def _write_file_record(self, statement: Executable, file_id: str, action: str):
+        """Update or delete a single file record with one statement and commit it, without reading the record first.
 
-        file_record.last_modified_timestamp = datetime.datetime.now()
+        Args:
+            statement: Update or delete statement matching the file record by its ID
+            file_id: ID of the file
+            action: What the statement does, e.g. "renaming", for error messages
 
+        Raises:
+            FileRecordNotFoundError: If no file record has the ID
+            DatabaseWriteError: If the statement fails
+        """
         try:
+            result = self.db.execute(statement.execution_options(synchronize_session=False))
+            if result.rowcount == 0:
+                self.db.rollback()
+                raise FileRecordNotFoundError(f'File with id {file_id} does not exist')
             self.db.commit()
-            self.db.refresh(file_record)
         except SQLAlchemyError as e:
             self.db.rollback()
-            raise DatabaseWriteError(f'Error occurred while updating file record: {e}')
+            raise DatabaseWriteError(f'Error occurred while {action} file record: {e}')
+
+    def update_file_record(self, file_id: str, name: str, content_type: ContentEnum, size: int) -> str:
+        """Update a file record in the database.
+
+        Args:
+            file_id: ID of the file
+            name: Name of the file
+            content_type: Content type of the file
+            size: Size of the file
+
+        Returns:
+            File record which contains the file metadata.
+
+        Raises:
+            DatabaseWriteError: If the file record update fails
+            FileRecordNotFoundError: If the file record does not exist
+        """
+        self._write_file_record(update(DatabaseEntry).where(DatabaseEntry.file_id == file_id)
+                                .values(name=name, content_type=content_type, size=size,
+                                        last_modified_timestamp=datetime.datetime.now()),
+                                file_id, "updating")
         return "File record updated successfully"
 
     def rename_file_record(self, file_id: str, new_file_name: str) -> str:
@@ -150,22 +231,43 @@ class LocalDatabaseManager(AbstractDatabaseManager):
 
         Returns:
             File record which contains the file metadata.
+
+        Raises:
+            DatabaseWriteError: If the file record rename fails
+            FileRecordNotFoundError: If the file record does not exist
         """
+        self._write_file_record(update(DatabaseEntry).where(DatabaseEntry.file_id == file_id)
+                                .values(name=new_file_name, last_modified_timestamp=datetime.datetime.now()),
+                                file_id, "renaming")
+        return "File record renamed successfully"
 
-        file_record = self.get_file_record(file_id)
+    def bulk_rename_file_records(self, new_names: Dict[str, str]) -> int:
+        """Rename many file records in a single transaction, with one update per chunk of file ids.
 
-        file_record.name = new_file_name
+        Args:
+            new_names: New name of each file, by file ID
 
-        last_modified_timestamp = datetime.datetime.now()
-        file_record.last_modified_timestamp = last_modified_timestamp
+        Returns:
+            The number of file records renamed. IDs that do not exist are skipped.
 
+        Raises:
+            DatabaseWriteError: If the file records cannot be renamed, in which case none of them are
+        """
+        last_modified_timestamp = datetime.datetime.now()
+        renamed_count = 0
         try:
+            for chunk in chunked(list(new_names)):
+                result = self.db.execute(
+                    update(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk))
+                    .values(name=case({file_id: new_names[file_id] for file_id in chunk}, value=DatabaseEntry.file_id),
+                            last_modified_timestamp=last_modified_timestamp)
+                    .execution_options(synchronize_session=False))
+                renamed_count += result.rowcount
             self.db.commit()
-            self.db.refresh(file_record)
         except SQLAlchemyError as e:
             self.db.rollback()
-            raise DatabaseWriteError(f'Error occurred while renaming file record: {e}')
-        return "File record renamed successfully"
+            raise DatabaseWriteError(f'Error occurred while renaming file records: {e}')
+        return renamed_count
 
     def delete_file_record(self, file_id: str) -> str:
         """Delete a file record in the database.
@@ -175,20 +277,37 @@ class LocalDatabaseManager(AbstractDatabaseManager):
 
         Returns:
             File record which contains the file metadata.
+
+        Raises:
+            DatabaseWriteError: If the file record deletion fails
+            FileRecordNotFoundError: If the file record does not exist
         """
+        self._write_file_record(delete(DatabaseEntry).where(DatabaseEntry.file_id == file_id), file_id, "deleting")
+        return "File record deleted successfully"
+
+    def bulk_delete_file_records(self, file_ids: List[str]) -> int:
+        """Delete many file records in a single transaction, with one delete per chunk of file ids.
+
+        Args:
+            file_ids: IDs of the files to delete
 
-        file_record = self.db.query(DatabaseEntry).filter(DatabaseEntry.file_id == file_id).first()
-        # raise error if the file does not exist (i.e. the query returns None)
-        if file_record is None:
-            raise DatabaseReadError(f'File with id {file_id} does not exist')
+        Returns:
+            The number of file records deleted. IDs that do not exist are skipped.
 
+        Raises:
+            DatabaseWriteError: If the file records cannot be deleted, in which case none of them are
+        """
+        deleted_count = 0
         try:
-            self.db.delete(file_record)
+            for chunk in chunked(list(dict.fromkeys(file_ids))):
+                result = self.db.execute(delete(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk))
+                                         .execution_options(synchronize_session=False))
+                deleted_count += result.rowcount
             self.db.commit()
         except SQLAlchemyError as e:
             self.db.rollback()
-            raise DatabaseWriteError(f'Error occurred while deleting file record: {e}')
-        return "File record deleted successfully"
+            raise DatabaseWriteError(f'Error occurred while deleting file records: {e}')
+        return deleted_count
 
     def delete_all_file_records(self) -> str:
         """Delete all file records in the database.
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+metadata_cache_max_entries = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", default=10000))  # 0 disables the cache
+metadata_cache_ttl = float(os.getenv("METADATA_CACHE_TTL", default=60))  # Seconds a record is cached for
+metadata_cache_negative_ttl = float(os.getenv("METADATA_CACHE_NEGATIVE_TTL", default=5))  # Seconds for missing IDs
+
+# Cached in place of a record for file IDs that are known not to exist
+MISSING = object()
+
+
+class MetadataCache:
+    """Thread-safe in-memory cache of file records, with a time to live and least recently used eviction.
+
+    Records are stored as dictionaries rather than ORM objects so that they are never tied to a session. File IDs that
+    do not exist are cached too, for a shorter time, so that repeated lookups of a missing file do not reach the
+    database either.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None):
+        """Initialise the metadata cache.
+
+        Args:
+            max_entries: Most records the cache may hold. Defaults to METADATA_CACHE_MAX_ENTRIES (10000). A size of 0
+                disables the cache.
+            ttl: Seconds a record is cached for. Defaults to METADATA_CACHE_TTL (60).
+            negative_ttl: Seconds a missing file ID is cached for. Defaults to METADATA_CACHE_NEGATIVE_TTL (5).
+
+        Raises:
+            ValueError: If any of the settings is negative.
+        """
+        self.max_entries = metadata_cache_max_entries if max_entries is None else max_entries
+        self.ttl = metadata_cache_ttl if ttl is None else ttl
+        self.negative_ttl = metadata_cache_negative_ttl if negative_ttl is None else negative_ttl
+        if self.max_entries < 0 or self.ttl < 0 or self.negative_ttl < 0:
+            raise ValueError(f'Cache settings must not be negative, got max_entries={self.max_entries}, '
+                             f'ttl={self.ttl} and negative_ttl={self.negative_ttl}')
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Bumped on every invalidation, so that a read that raced with a write does not cache what it read
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_id: str) -> Optional[Any]:
+        """Get a cached record and mark it as most recently used.
+
+        Args:
+            file_id: ID of the file.
+
+        Returns:
+            The record as a dictionary, MISSING if the file is known not to exist, or None if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[file_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, file_id: str, record: Any, version: Optional[int] = None):
+        """Cache a record, evicting the least recently used records if the cache is full.
+
+        Args:
+            file_id: ID of the file.
+            record: The record as a dictionary, or MISSING if the file does not exist.
+            version: Cache version read before the record was fetched. If the cache has been invalidated since, the
+                record may be stale and is not cached. Defaults to None, i.e. always cache.
+        """
+        if self.max_entries == 0:
+            return
+        ttl = self.negative_ttl if record is MISSING else self.ttl
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._entries.pop(file_id, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[file_id] = (time.monotonic() + ttl, record)
+
+    def invalidate(self, file_id: str):
+        """Remove a record from the cache.
+
+        Args:
+            file_id: ID of the file.
+        """
+        with self._lock:
+            self._entries.pop(file_id, None)
+            self.version += 1
+
+    def clear(self):
+        """Remove every record from the cache and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+            self.hits = self.misses = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the cache's size and hit and miss counters.
+
+        Returns:
+            Dictionary of cache statistics.
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses}
+
+
+metadata_cache = MetadataCache()
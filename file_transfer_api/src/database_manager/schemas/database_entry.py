@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from typing import Dict, Any
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index
 from src.database_manager.database_connection.local_database import Base
 import os
 from dotenv import load_dotenv
@@ -15,10 +15,21 @@ class DatabaseEntry(Base):
     """A dataclass for database entries"""
 
     __tablename__ = TABLE_NAME
+    __table_args__ = (
+        # Listings seek on their sort column with the file id as a tie breaker, so every page costs the same
+        Index(f"ix_{TABLE_NAME}_created_timestamp_file_id", "created_timestamp", "file_id"),
+        Index(f"ix_{TABLE_NAME}_name_file_id", "name", "file_id"),
+        Index(f"ix_{TABLE_NAME}_size_file_id", "size", "file_id"),
+        Index(f"ix_{TABLE_NAME}_content_type_created_timestamp_file_id", "content_type", "created_timestamp",
+              "file_id"),
+    )
     file_id = Column(String, primary_key=True, unique=True, nullable=False)
     name = Column(String, nullable=False)
     content_type = Column(Enum(ContentEnum), nullable=False)
-    size = Column(Integer)
+    size = Column(Integer, nullable=False)  # Size of the file in bytes
+    checksum = Column(String, nullable=True)  # Hex digest of the file contents
+    stored_size = Column(Integer, nullable=True)  # Size of the file as stored, which differs from size if compressed
+    content_encoding = Column(String, nullable=True)  # Encoding the file is stored with, e.g. "gzip", if compressed
     created_timestamp = Column(DateTime, nullable=False)
     last_modified_timestamp = Column(DateTime, nullable=False)
 
@@ -33,6 +44,9 @@ class DatabaseEntry(Base):
             "name": self.name,
             "content_type": self.content_type,
             "size": self.size,
+            "checksum": self.checksum,
+            "stored_size": self.stored_size,
+            "content_encoding": self.content_encoding,
             "created_timestamp": self.created_timestamp,
             "last_modified_timestamp": self.last_modified_timestamp}
 
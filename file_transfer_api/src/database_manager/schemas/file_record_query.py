@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from src.database_manager.schemas.content_enum import ContentEnum
+
+# Columns a file record listing can be sorted by. Each has an index with the file id as a tie breaker
+SORT_FIELDS = ("created_timestamp", "name", "size")
+
+
+@dataclass
+class FileRecordQuery:
+    """Sort order, filters and position of a page of file records"""
+    sort_by: str = "created_timestamp"
+    descending: bool = False
+    limit: int = 100
+    after: Optional[Tuple[Any, str]] = None  # Sort value and file id of the last record of the previous page
+    content_type: Optional[ContentEnum] = None
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    created_after: Optional[datetime] = None  # Inclusive
+    created_before: Optional[datetime] = None  # Exclusive
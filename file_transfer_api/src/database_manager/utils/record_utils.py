@@ -0,0 +1,91 @@
+import datetime
+from typing import Any, Dict, Iterator, List, Sequence, TypeVar
+
+from sqlalchemy import Select, select, tuple_
+
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import SORT_FIELDS, FileRecordQuery
+
+T = TypeVar("T")
+
+# Most file ids bound in a single bulk statement. SQLite builds before 3.32 allow 999 parameters per statement, and a
+# bulk rename binds each file id three times
+BULK_QUERY_CHUNK_SIZE = 300
+
+
+def get_bulk_insert_rows(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get the rows to bulk insert for new file records, filling in the columns that create_file_record would.
+
+    Args:
+        records: Keyword arguments of create_file_record for each file record
+
+    Returns:
+        One row of column values for each file record, all with the same timestamps.
+    """
+    created_timestamp = datetime.datetime.now()
+    rows = []
+    for record in records:
+        stored_size = record.get("stored_size")
+        rows.append({**record,
+                     "checksum": record.get("checksum"),
+                     "stored_size": record["size"] if stored_size is None else stored_size,
+                     "content_encoding": record.get("content_encoding"),
+                     "created_timestamp": created_timestamp,
+                     "last_modified_timestamp": created_timestamp})
+    return rows
+
+
+def chunked(items: Sequence[T], chunk_size: int = BULK_QUERY_CHUNK_SIZE) -> Iterator[Sequence[T]]:
+    """Split a sequence into chunks small enough to bind in a single statement.
+
+    Args:
+        items: Items to split.
+        chunk_size: Most items in each chunk. Defaults to BULK_QUERY_CHUNK_SIZE.
+
+    Yields:
+        Consecutive chunks of the items.
+    """
+    for offset in range(0, len(items), chunk_size):
+        yield items[offset:offset + chunk_size]
+
+
+def get_listing_statement(query: FileRecordQuery) -> Select:
+    """Get the statement that selects a page of file records, using keyset pagination.
+
+    Rather than skipping the records of earlier pages with an offset, the page starts after the sort value and file id
+    of the last record of the previous page. With an index on the sort column and the file id, the database seeks
+    straight to the start of the page, so a page deep into the listing costs the same as the first.
+
+    Args:
+        query: Sort order, filters and position of the page.
+
+    Returns:
+        Statement selecting the page's file records.
+
+    Raises:
+        ValueError: If the sort column is not supported.
+    """
+    if query.sort_by not in SORT_FIELDS:
+        raise ValueError(f'Sort column must be one of {SORT_FIELDS}, got {query.sort_by}')
+    sort_column = getattr(DatabaseEntry, query.sort_by)
+
+    statement = select(DatabaseEntry)
+    if query.content_type is not None:
+        statement = statement.where(DatabaseEntry.content_type == query.content_type)
+    if query.min_size is not None:
+        statement = statement.where(DatabaseEntry.size >= query.min_size)
+    if query.max_size is not None:
+        statement = statement.where(DatabaseEntry.size <= query.max_size)
+    if query.created_after is not None:
+        statement = statement.where(DatabaseEntry.created_timestamp >= query.created_after)
+    if query.created_before is not None:
+        statement = statement.where(DatabaseEntry.created_timestamp < query.created_before)
+
+    keyset = tuple_(sort_column, DatabaseEntry.file_id)
+    if query.after is not None:
+        statement = statement.where(keyset < tuple_(*query.after) if query.descending else keyset > tuple_(*query.after))
+    if query.descending:
+        statement = statement.order_by(sort_column.desc(), DatabaseEntry.file_id.desc())
+    else:
+        statement = statement.order_by(sort_column, DatabaseEntry.file_id)
+    return statement.limit(query.limit)
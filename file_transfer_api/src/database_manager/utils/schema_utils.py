@@ -0,0 +1,75 @@
+from typing import Callable, List, Optional
+
+from sqlalchemy import Table, create_engine, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+
+def upgrade_table(database_url: str, table: Table,
+                  get_file_size: Optional[Callable[[str], Optional[int]]] = None) -> List[str]:
+    """Bring a table created by an earlier version of the API up to date with its model. It is safe to run repeatedly.
+
+    Columns the model has and the table lacks are added, as create_all only creates missing tables. Tables from before
+    the checksum column recorded sizes in kilobytes, so their sizes are converted to bytes when that column is added,
+    which happens only once. The converted sizes are only as precise as the kilobytes they were rounded to.
+
+    Records without a size, which earlier versions allowed, are given the size of their stored file, or 0 if it is not
+    known, as listings sorted by size would otherwise skip them.
+
+    Args:
+        database_url: URL of the database
+        table: Table of the model to upgrade to
+        get_file_size: Function getting the size in bytes of a stored file from its id, or None if it is not stored.
+            Defaults to None, which gives every record without a size a size of 0.
+
+    Returns:
+        Names of the columns added, in the order they were added.
+    """
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            inspector = inspect(connection)
+            if not inspector.has_table(table.name):
+                return []
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            added_columns = []
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added_columns.append(column.name)
+            if "checksum" in added_columns:
+                connection.execute(text(f'UPDATE {table.name} SET size = size * 1024 WHERE size IS NOT NULL'))
+            if "size" in table.columns:
+                unsized_file_ids = connection.execute(
+                    text(f'SELECT file_id FROM {table.name} WHERE size IS NULL')).scalars().all()
+                for file_id in unsized_file_ids:
+                    size = get_file_size(file_id) if get_file_size else None
+                    connection.execute(text(f'UPDATE {table.name} SET size = :size WHERE file_id = :file_id'),
+                                       {"size": size or 0, "file_id": file_id})
+        return added_columns
+    finally:
+        engine.dispose()
+
+
+def create_indexes(database_url: str, table: Table) -> List[str]:
+    """Create the model's indexes on a table that lacks them, as create_all only creates indexes with new tables. It is
+    safe to run repeatedly.
+
+    Args:
+        database_url: URL of the database
+        table: Table whose indexes to create
+
+    Returns:
+        Names of the indexes created or already present, or an empty list if the table does not exist.
+    """
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            if not inspect(connection).has_table(table.name):
+                return []
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                connection.execute(CreateIndex(index, if_not_exists=True))
+        return sorted(index.name for index in table.indexes)
+    finally:
+        engine.dispose()
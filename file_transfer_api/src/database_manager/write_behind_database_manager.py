@@ -0,0 +1,296 @@
+import asyncio
+import datetime
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.database_manager.abstract_database_manager import AbstractDatabaseManager
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from src.database_manager.utils.record_utils import get_bulk_insert_rows
+from src.database_manager.write_behind_queue import PendingWrite, WriteBehindQueue, write_behind_queue
+from src.utils.concurrency_utils import run_database_operation
+
+
+class WriteBehindDatabaseManager(AbstractDatabaseManager):
+    """Database manager that puts metadata writes on a write-behind queue instead of committing them one by one.
+
+    Writes return once they are queued, unless the manager is durable, in which case they return once they are
+    committed. Either way, writes from many requests are committed together by the queue's writer. Renames, updates and
+    deletes of a single file check that the file exists first, so that a missing file is still reported straight away.
+    Reads are answered by another database manager, after waiting for any queued writes to the files they read, so a
+    caller always reads its own writes.
+
+    A file is stored before its record is queued, so if the record cannot be created after the caller has moved on,
+    on_create_failure is called with the record's fields to clean up the stored file.
+    """
+
+    def __init__(self, database_manager: AbstractDatabaseManager, write_queue: Optional[WriteBehindQueue] = None,
+                 durable: bool = False, on_create_failure: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Initialise the write-behind database manager.
+
+        Args:
+            database_manager: Database manager to read from.
+            write_queue: Write-behind queue to put writes on. Defaults to the queue shared by the whole process.
+            durable: Whether writes wait until they are committed. Defaults to False.
+            on_create_failure: Callback called on the queue's writer thread with the fields of each file record whose
+                creation failed, e.g. to delete the stored file. Defaults to None.
+        """
+        self.database_manager = database_manager
+        self.write_queue = write_behind_queue if write_queue is None else write_queue
+        self.durable = durable
+        self.on_create_failure = on_create_failure
+
+    async def wait_for_writes(self, file_ids: Optional[Iterable[str]] = None):
+        """Wait until queued writes to some files have been committed.
+
+        Args:
+            file_ids: IDs of the files to wait for. Defaults to None, i.e. every file.
+        """
+        if self.write_queue.is_pending(file_ids):
+            await asyncio.wrap_future(self.write_queue.flush())
+
+    def discard_created_files(self, write: PendingWrite):
+        """Pass each file record of a failed create to on_create_failure.
+
+        Args:
+            write: Create that could not be committed.
+        """
+        for row in write.arguments["rows"]:
+            self.on_create_failure(row)
+
+    async def submit(self, operation: str, file_ids: List[str], wait: bool = False, **arguments: Any) -> int:
+        """Put a write on the queue, waiting for it to be committed if the manager is durable.
+
+        Args:
+            operation: Operation to apply.
+            file_ids: IDs of the files written.
+            wait: Whether to wait for the write to be committed even if the manager is not durable. Defaults to False.
+            **arguments: Arguments of the operation.
+
+        Returns:
+            The number of file records written if the write was waited for, and otherwise 0.
+
+        Raises:
+            DatabaseWriteError: If the write was waited for and could not be committed
+        """
+        on_failure = self.discard_created_files if operation == "create" and self.on_create_failure else None
+        future: Future = self.write_queue.submit(operation, file_ids, on_failure=on_failure, **arguments)
+        if self.durable or wait:
+            # Flush rather than wait for the batch to fill up or time out
+            self.write_queue.flush()
+            return await asyncio.wrap_future(future)
+        return 0
+
+    async def close(self):
+        """Close the wrapped manager's session, returning its connection to the pool. Queued writes are unaffected."""
+        await run_database_operation(self.database_manager.close)
+
+    async def check_database_connection(self) -> bool:
+        """Check if the database is connected.
+
+        Returns:
+            True if the database is connected.
+        """
+        return await run_database_operation(self.database_manager.check_database_connection)
+
+    async def get_file_record(self, file_id: str) -> DatabaseEntry:
+        """Get a file record, once any queued writes to it are committed.
+
+        Args:
+            file_id: ID of the file to get
+
+        Returns:
+            File record which contains the file metadata.
+
+        Raises:
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseReadError: If the file record cannot be read
+        """
+        await self.wait_for_writes([file_id])
+        return await run_database_operation(self.database_manager.get_file_record, file_id)
+
+    async def bulk_get_file_records(self, file_ids: List[str]) -> List[DatabaseEntry]:
+        """Get many file records, once any queued writes to them are committed.
+
+        Args:
+            file_ids: IDs of the files to get
+
+        Returns:
+            File records which contain the file metadata, in no particular order. IDs that do not exist are left out.
+        """
+        await self.wait_for_writes(file_ids)
+        return await run_database_operation(self.database_manager.bulk_get_file_records, file_ids)
+
+    async def get_all_file_records(self) -> List[DatabaseEntry]:
+        """Get all file records, once every queued write is committed.
+
+        Returns:
+            List of file records which contain the file metadata.
+        """
+        await self.wait_for_writes()
+        return await run_database_operation(self.database_manager.get_all_file_records)
+
+    async def list_file_records(self, query: FileRecordQuery) -> List[DatabaseEntry]:
+        """Get a page of file records, once every queued write is committed.
+
+        Args:
+            query: Sort order, filters and position of the page
+
+        Returns:
+            Up to query.limit file records, in the order requested.
+        """
+        await self.wait_for_writes()
+        return await run_database_operation(self.database_manager.list_file_records, query)
+
+    async def create_file_record(self, name: str, file_id: str, content_type: ContentEnum, size: int,
+                                 checksum: Optional[str] = None, stored_size: Optional[int] = None,
+                                 content_encoding: Optional[str] = None) -> DatabaseEntry:
+        """Queue the creation of a file record.
+
+        Args:
+            name: Name of the file
+            file_id: ID of the file
+            content_type: Content type of the file
+            size: Size of the file in bytes
+            checksum: Hex digest of the file contents. Defaults to None.
+            stored_size: Size of the file as stored in bytes. Defaults to None, i.e. the same as size.
+            content_encoding: Encoding the file is stored with, e.g. "gzip". Defaults to None, i.e. not compressed.
+
+        Returns:
+            File record which contains the file metadata. It is not attached to a session.
+
+        Raises:
+            DatabaseWriteError: If the manager is durable and the file record cannot be created
+        """
+        row = get_bulk_insert_rows([{"name": name, "file_id": file_id, "content_type": content_type, "size": size,
+                                     "checksum": checksum, "stored_size": stored_size,
+                                     "content_encoding": content_encoding}])[0]
+        await self.submit("create", [file_id], rows=[row])
+        return DatabaseEntry(**row)
+
+    async def bulk_create_file_records(self, records: List[Dict[str, Any]]) -> List[DatabaseEntry]:
+        """Queue the creation of many file records, which are committed in the same transaction.
+
+        Args:
+            records: Keyword arguments of create_file_record for each file record
+
+        Returns:
+            File records which contain the file metadata. They are not attached to a session.
+
+        Raises:
+            DatabaseWriteError: If the manager is durable and the file records cannot be created
+        """
+        if not records:
+            return []
+        rows = get_bulk_insert_rows(records)
+        await self.submit("create", [row["file_id"] for row in rows], rows=rows)
+        return [DatabaseEntry(**row) for row in rows]
+
+    async def update_file_record(self, file_id: str, name: str, content_type: ContentEnum, size: int) -> str:
+        """Queue an update of a file record.
+
+        Args:
+            file_id: ID of the file
+            name: Name of the file
+            content_type: Content type of the file
+            size: Size of the file
+
+        Returns:
+            A message confirming the update.
+
+        Raises:
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseWriteError: If the manager is durable and the file record cannot be updated
+        """
+        await self.get_file_record(file_id)
+        await self.submit("update", [file_id], values={"name": name, "content_type": content_type, "size": size,
+                                                       "last_modified_timestamp": datetime.datetime.now()})
+        return "File record updated successfully"
+
+    async def rename_file_record(self, file_id: str, new_file_name: str) -> str:
+        """Queue a rename of a file record.
+
+        Args:
+            file_id: ID of the file
+            new_file_name: New name of the file
+
+        Returns:
+            A message confirming the rename.
+
+        Raises:
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseWriteError: If the manager is durable and the file record cannot be renamed
+        """
+        await self.get_file_record(file_id)
+        await self.submit("rename", [file_id], new_names={file_id: new_file_name},
+                          last_modified_timestamp=datetime.datetime.now())
+        return "File record renamed successfully"
+
+    async def bulk_rename_file_records(self, new_names: Dict[str, str]) -> int:
+        """Rename many file records through the queue, waiting for the renames to be committed.
+
+        Args:
+            new_names: New name of each file, by file ID
+
+        Returns:
+            The number of file records renamed. IDs that do not exist are skipped.
+
+        Raises:
+            DatabaseWriteError: If the file records cannot be renamed, in which case none of them are
+        """
+        if not new_names:
+            return 0
+        return await self.submit("rename", list(new_names), wait=True, new_names=new_names,
+                                 last_modified_timestamp=datetime.datetime.now())
+
+    async def delete_file_record(self, file_id: str) -> str:
+        """Queue the deletion of a file record.
+
+        Args:
+            file_id: ID of the file
+
+        Returns:
+            A message confirming the deletion.
+
+        Raises:
+            FileRecordNotFoundError: If the file does not exist
+            DatabaseWriteError: If the manager is durable and the file record cannot be deleted
+        """
+        await self.get_file_record(file_id)
+        await self.submit("delete", [file_id])
+        return "File record deleted successfully"
+
+    async def bulk_delete_file_records(self, file_ids: List[str]) -> int:
+        """Delete many file records through the queue, waiting for the deletes to be committed.
+
+        Args:
+            file_ids: IDs of the files to delete
+
+        Returns:
+            The number of file records deleted. IDs that do not exist are skipped.
+
+        Raises:
+            DatabaseWriteError: If the file records cannot be deleted, in which case none of them are
+        """
+        if not file_ids:
+            return 0
+        return await self.submit("delete", list(dict.fromkeys(file_ids)), wait=True)
+
+    async def delete_all_file_records(self) -> str:
+        """Delete all file records, once every queued write is committed.
+
+        Returns:
+            String confirming how many file records have been deleted.
+        """
+        await self.wait_for_writes()
+        return await run_database_operation(self.database_manager.delete_all_file_records)
+
+    async def get_count(self) -> int:
+        """Get the number of file records in the database, once every queued write is committed.
+
+        Returns:
+            The number of file records in the database.
+        """
+        await self.wait_for_writes()
+        return await run_database_operation(self.database_manager.get_count)
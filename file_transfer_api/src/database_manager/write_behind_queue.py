@@ -0,0 +1,310 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import case, delete, insert, update
+from sqlalchemy.orm import Session
+
+from src.database_manager.database_connection.local_database import SessionLocal
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.utils.record_utils import chunked
+from src.exceptions.database_exceptions import DatabaseWriteError
+from src.utils.logging_utils import ErrorLogger
+
+load_dotenv()
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", default="false").lower() in ("1", "true", "yes")
+write_behind_flush_interval = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", default=10))  # Milliseconds
+write_behind_max_batch = int(os.getenv("WRITE_BEHIND_MAX_BATCH", default=500))  # Writes committed together
+
+# Operations the write-behind queue can apply, and the marker that makes the writer commit straight away
+OPERATIONS = ("create", "update", "rename", "delete")
+FLUSH = "flush"
+
+
+@dataclass
+class PendingWrite:
+    """A metadata write waiting in the write-behind queue"""
+    operation: str
+    file_ids: List[str]
+    arguments: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+    on_failure: Optional[Callable[["PendingWrite"], None]] = None  # Called on the writer thread if the write fails
+
+
+def apply_write(session: Session, write: PendingWrite) -> int:
+    """Apply a write to a session without committing it.
+
+    Args:
+        session: Session to apply the write to.
+        write: Write to apply.
+
+    Returns:
+        The number of file records written.
+    """
+    if write.operation == "create":
+        session.execute(insert(DatabaseEntry), write.arguments["rows"])
+        return len(write.arguments["rows"])
+    if write.operation == "update":
+        return session.execute(update(DatabaseEntry).where(DatabaseEntry.file_id == write.file_ids[0])
+                               .values(**write.arguments["values"])
+                               .execution_options(synchronize_session=False)).rowcount
+
+    written_count = 0
+    for chunk in chunked(write.file_ids):
+        if write.operation == "rename":
+            new_names = write.arguments["new_names"]
+            statement = (update(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk))
+                         .values(name=case({file_id: new_names[file_id] for file_id in chunk},
+                                           value=DatabaseEntry.file_id),
+                                 last_modified_timestamp=write.arguments["last_modified_timestamp"]))
+        else:
+            statement = delete(DatabaseEntry).where(DatabaseEntry.file_id.in_(chunk))
+        written_count += session.execute(statement.execution_options(synchronize_session=False)).rowcount
+    return written_count
+
+
+class WriteBehindQueue:
+    """Queue of metadata writes that a background thread commits in batches.
+
+    Committing every write on its own makes metadata write throughput depend on how fast the database can flush its
+    log. Writes put on this queue return straight away, and a writer thread commits them together, in one transaction
+    per batch. A batch is committed once it holds max_batch writes, flush_interval milliseconds after its first write
+    arrived, or when a caller asks for a flush. If a batch cannot be committed, its writes are retried one at a time so
+    that only the writes that fail are failed.
+
+    Each write has a future that completes when the write is committed, for callers that need it to be durable.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, flush_interval: Optional[float] = None,
+                 max_batch: Optional[int] = None, error_logger_path: Optional[str] = None):
+        """Initialise the write-behind queue. The writer thread is started by the first write.
+
+        Args:
+            session_factory: Callable that returns a new session for each batch. Defaults to SessionLocal.
+            flush_interval: Milliseconds a write may wait for others to join its batch. Defaults to
+                WRITE_BEHIND_FLUSH_INTERVAL (10).
+            max_batch: Most writes committed in one transaction. Defaults to WRITE_BEHIND_MAX_BATCH (500).
+            error_logger_path: Path of the log file failed writes are logged to. Defaults to None, i.e.
+                "logs/errors.log"
+
+        Raises:
+            ValueError: If the flush interval is negative or the batch size is not positive.
+        """
+        self.session_factory = session_factory
+        self.error_logger_path = error_logger_path
+        self._logger: Optional[ErrorLogger] = None
+        self.flush_interval = write_behind_flush_interval if flush_interval is None else flush_interval
+        self.max_batch = write_behind_max_batch if max_batch is None else max_batch
+        if self.flush_interval < 0 or self.max_batch < 1:
+            raise ValueError(f'Flush interval must not be negative and batch size must be positive, got '
+                             f'flush_interval={self.flush_interval} and max_batch={self.max_batch}')
+
+        self._lock = threading.Lock()
+        self._queue: "Optional[queue.Queue[Optional[PendingWrite]]]" = None
+        self._thread: Optional[threading.Thread] = None
+        # Writes not yet committed for each file ID, so that reads of those files can wait for them
+        self._pending_file_ids: Counter = Counter()
+        self.batches = 0
+        self.writes = 0
+
+    def submit(self, operation: str, file_ids: List[str], on_failure: Optional[Callable[[PendingWrite], None]] = None,
+               **arguments: Any) -> Future:
+        """Put a write on the queue, starting the writer thread if it is not running.
+
+        Args:
+            operation: Operation to apply, one of OPERATIONS.
+            file_ids: IDs of the files written.
+            on_failure: Callback called with the write on the writer thread if it cannot be committed, e.g. to clean up
+                after a write whose caller did not wait for it. Defaults to None.
+            **arguments: Arguments of the operation.
+
+        Returns:
+            A future that completes with the number of file records written once the write is committed, or with a
+            DatabaseWriteError if it cannot be.
+
+        Raises:
+            ValueError: If the operation is not supported.
+        """
+        if operation not in OPERATIONS + (FLUSH,):
+            raise ValueError(f'Write-behind operation must be one of {OPERATIONS}, got {operation}')
+        write = PendingWrite(operation=operation, file_ids=file_ids, arguments=arguments, on_failure=on_failure)
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            self._pending_file_ids.update(file_ids)
+            self._queue.put(write)
+        return write.future
+
+    def flush(self) -> Future:
+        """Commit the current batch without waiting for it to fill up.
+
+        Returns:
+            A future that completes once every write submitted before it has been committed or failed.
+        """
+        return self.submit(FLUSH, [])
+
+    def is_pending(self, file_ids: Optional[Iterable[str]] = None) -> bool:
+        """Check whether writes are waiting to be committed.
+
+        Args:
+            file_ids: IDs of the files to check. Defaults to None, i.e. any file.
+
+        Returns:
+            True if any of the files has a write that is not yet committed.
+        """
+        with self._lock:
+            if file_ids is None:
+                return bool(self._pending_file_ids)
+            return any(file_id in self._pending_file_ids for file_id in file_ids)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Commit every queued write and stop the writer thread. A later write starts a new writer thread.
+
+        Args:
+            timeout: Seconds to wait for the queued writes to be committed. Defaults to None, i.e. wait for all of them.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            # The writer commits everything queued before the sentinel, while later writes go to a new queue
+            self._queue.put(None)
+        thread.join(timeout)
+
+    @property
+    def logger(self) -> ErrorLogger:
+        """Logger for failed writes, created on first use so that importing the queue does not create a log file"""
+        if self._logger is None:
+            self._logger = ErrorLogger(log_file_path=self.error_logger_path, name="WriteBehindQueue")
+        return self._logger
+
+    def _start(self):
+        """Start a writer thread with a queue of its own. Must be called with the lock held."""
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(self._queue,), name="write-behind", daemon=True)
+        self._thread.start()
+
+    def _run(self, write_queue: "queue.Queue[Optional[PendingWrite]]"):
+        """Commit batches of writes from a queue until its sentinel is reached.
+
+        Args:
+            write_queue: Queue to take writes from.
+        """
+        stopping = False
+        while not stopping:
+            write = write_queue.get()
+            if write is None:
+                break
+            batch = [write]
+            deadline = time.monotonic() + self.flush_interval / 1000
+            while len(batch) < self.max_batch and batch[-1].operation != FLUSH:
+                try:
+                    write = write_queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # The writer must outlive any batch, or every later write and every read waiting for one would hang
+                self.logger.log(f"Write-behind batch of {len(batch)} writes failed unexpectedly: {e!r}")
+
+    def _write_batch(self, batch: List[PendingWrite]):
+        """Commit a batch of writes in one transaction, or one at a time if the batch fails, and complete their futures.
+
+        Every future in the batch is completed and every write is cleared from the pending file IDs whatever goes wrong,
+        so that callers waiting for a write never hang.
+
+        Args:
+            batch: Writes to commit, which may include flush markers.
+        """
+        writes = [write for write in batch if write.operation != FLUSH]
+        results: List[Any] = []
+        try:
+            if writes:
+                try:
+                    results = self._commit(writes)
+                except Exception:
+                    results = [self._commit_alone(write) for write in writes]
+                self.batches += 1
+                self.writes += len(writes)
+        except Exception as e:
+            results = [DatabaseWriteError(f'Error occurred while writing file records: {e}')] * len(writes)
+        finally:
+            with self._lock:
+                for write in writes:
+                    self._pending_file_ids.subtract(write.file_ids)
+                self._pending_file_ids = +self._pending_file_ids
+
+        for write, result in zip(writes, results):
+            if isinstance(result, DatabaseWriteError):
+                self._fail(write, result)
+            else:
+                write.future.set_result(result)
+        for write in batch:
+            if write.operation == FLUSH:
+                write.future.set_result(0)
+
+    def _commit_alone(self, write: PendingWrite) -> Any:
+        """Commit a write in a transaction of its own.
+
+        Args:
+            write: Write to commit.
+
+        Returns:
+            The number of file records written, or the DatabaseWriteError the write failed with.
+        """
+        try:
+            return self._commit([write])[0]
+        except Exception as e:
+            return DatabaseWriteError(f'Error occurred while writing file records: {e}')
+
+    def _fail(self, write: PendingWrite, error: DatabaseWriteError):
+        """Log a write that could not be committed, run its failure callback and fail its future.
+
+        Args:
+            write: Write that failed.
+            error: Error the write failed with.
+        """
+        self.logger.log(f"Write-behind {write.operation} of files {write.file_ids} failed: {error.description}")
+        if write.on_failure is not None:
+            try:
+                write.on_failure(write)
+            except Exception as e:
+                self.logger.log(f"Cleaning up after write-behind {write.operation} of files {write.file_ids} "
+                                f"failed: {e!r}")
+        write.future.set_exception(error)
+
+    def _commit(self, writes: List[PendingWrite]) -> List[int]:
+        """Apply writes in a single transaction and commit it.
+
+        Args:
+            writes: Writes to apply.
+
+        Returns:
+            The number of file records written by each write.
+
+        Raises:
+            Exception: If any of the writes fails, e.g. with a SQLAlchemyError, in which case none of them are committed
+        """
+        with self.session_factory() as session:
+            try:
+                results = [apply_write(session, write) for write in writes]
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        return results
+
+
+# Write-behind queue shared by the whole process, used when WRITE_BEHIND is set
+write_behind_queue = WriteBehindQueue()
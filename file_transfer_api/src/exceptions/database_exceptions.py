@@ -23,5 +23,19 @@ class DatabaseWriteError(DatabaseError):
 
 @dataclass
 class DatabaseConnectionError(DatabaseError):
-    """Raised when a database connection fails"""
+    """Raised when a database connection fails, or none is free in the connection pool"""
     description = "Database connection failed"
+    status_code: int = 503
+
+
+@dataclass
+class FileRecordNotFoundError(DatabaseReadError):
+    """Raised when a file record does not exist"""
+    description: str = "File record not found"
+
+
+@dataclass
+class InvalidPageCursorError(DatabaseReadError):
+    """Raised when a listing cursor cannot be decoded or was made for a different sort order"""
+    status_code: int = 400
+    description: str = "Invalid page cursor"
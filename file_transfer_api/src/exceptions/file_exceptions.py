@@ -37,3 +37,31 @@ class FileDoesNotExistError(FileError):
     """Raised when a file does not exist."""
     status_code: int = 404
     description: str = "File does not exist"
+
+
+@dataclass
+class FileRangeNotSatisfiableError(FileError):
+    """Raised when none of the byte ranges requested overlap the file."""
+    status_code: int = 416
+    description: str = "Requested range not satisfiable"
+
+
+@dataclass
+class UploadSessionDoesNotExistError(FileError):
+    """Raised when a multipart upload session does not exist."""
+    status_code: int = 404
+    description: str = "Upload session does not exist"
+
+
+@dataclass
+class InvalidUploadPartError(FileError):
+    """Raised when a multipart upload part number is out of range or parts are missing on completion."""
+    status_code: int = 400
+    description: str = "Invalid upload part"
+
+
+@dataclass
+class InvalidBatchUploadError(FileError):
+    """Raised when a batch upload contains no files."""
+    status_code: int = 400
+    description: str = "Invalid batch upload"
@@ -1,6 +1,12 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import IO
+from typing import IO, Optional
+
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.file_manager.blob_cache import CachedBlob
+from src.file_manager.compression import CompressionResult
+from src.file_manager.ingest_pipeline import IngestResult
+from src.file_manager.upload_session import AbstractPartWriter, UploadPart, UploadSession
 
 
 class AbstractFileManager(ABC):
@@ -21,6 +27,35 @@ class AbstractFileManager(ABC):
         """
         pass
 
+    @abstractmethod
+    def ingest_file(self, file: IO) -> IngestResult:
+        """Abstract method to upload a file and gather its details in the same pass.
+
+        Args:
+            file: File to upload
+
+        Returns:
+            Ingest result with the path of the file uploaded, its size, checksum and sniffed content type.
+        """
+        pass
+
+    @abstractmethod
+    def compress_file(self, file_id: str, checksum: str, content_type: ContentEnum, size: int,
+                      media_type: Optional[str] = None) -> CompressionResult:
+        """Abstract method to compress an uploaded file at rest, if the file manager's policy calls for it.
+
+        Args:
+            file_id: Id of the file to compress
+            checksum: Checksum of the original content
+            content_type: Content type of the file
+            size: Size of the original content in bytes
+            media_type: Media type of the file, used to skip formats that are already compressed
+
+        Returns:
+            The size the file is stored at and the encoding it is stored with, if any.
+        """
+        pass
+
     @abstractmethod
     def download_file(self, file_id: str) -> Path:
         """Abstract method to download a file.
@@ -33,6 +68,32 @@ class AbstractFileManager(ABC):
         """
         pass
 
+    def get_cached_file(self, file_id: str) -> Optional[CachedBlob]:
+        """Method to get the contents of a file from an in-memory cache without any I/O.
+
+        File managers without a cache do not need to override this.
+
+        Args:
+            file_id: Id of the file to get
+
+        Returns:
+            The cached file, or None if it is not cached.
+        """
+        return None
+
+    def cache_file(self, file_id: str) -> Optional[CachedBlob]:
+        """Method to read a file into an in-memory cache.
+
+        File managers without a cache do not need to override this.
+
+        Args:
+            file_id: Id of the file to read
+
+        Returns:
+            The cached file, or None if it cannot be cached.
+        """
+        return None
+
     @abstractmethod
     def rename_file(self, file_id, new_file_id):
         """Abstract method to rename a file.
@@ -47,13 +108,109 @@ class AbstractFileManager(ABC):
         pass
 
     @abstractmethod
-    def delete_file(self, file_id):
+    def delete_file(self, file_id, checksum: Optional[str] = None, content_encoding: Optional[str] = None):
         """Abstract method to delete a file.
 
         Args:
             file_id: Id of the file to delete
+            checksum: Checksum of the file, for file managers that store identical content once
+            content_encoding: Encoding the file is stored with, if it is compressed
 
         Returns:
             Path of the file deleted.
         """
         pass
+
+    @abstractmethod
+    def create_upload_session(self, file_name: Optional[str], content_type: Optional[str]) -> str:
+        """Abstract method to start a multipart upload.
+
+        Args:
+            file_name: Name of the file being uploaded
+            content_type: Content type declared by the client
+
+        Returns:
+            Id of the upload session.
+        """
+        pass
+
+    @abstractmethod
+    def open_part(self, upload_id: str, part_number: int) -> AbstractPartWriter:
+        """Abstract method to start writing a part of a multipart upload as it arrives.
+
+        Args:
+            upload_id: Id of the upload session
+            part_number: Number of the part, which sets its position in the file
+
+        Returns:
+            Writer for the part, which stores it once committed.
+        """
+        pass
+
+    @abstractmethod
+    def upload_part(self, upload_id: str, part_number: int, file: IO) -> UploadPart:
+        """Abstract method to store a part of a multipart upload. Uploading a part again replaces it.
+
+        Args:
+            upload_id: Id of the upload session
+            part_number: Number of the part, which sets its position in the file
+            file: Contents of the part
+
+        Returns:
+            The part stored.
+        """
+        pass
+
+    @abstractmethod
+    def get_upload_session(self, upload_id: str) -> UploadSession:
+        """Abstract method to get a multipart upload and the parts received so far.
+
+        Args:
+            upload_id: Id of the upload session
+
+        Returns:
+            The upload session.
+        """
+        pass
+
+    @abstractmethod
+    def complete_upload(self, upload_id: str) -> IngestResult:
+        """Abstract method to assemble the parts of a multipart upload into a file and end the session.
+
+        Args:
+            upload_id: Id of the upload session
+
+        Returns:
+            Ingest result with the path of the file assembled, its size, checksum and sniffed content type.
+        """
+        pass
+
+    @abstractmethod
+    def end_upload(self, upload_id: str):
+        """Abstract method to delete the parts of a completed multipart upload once its file is recorded.
+
+        Args:
+            upload_id: Id of the upload session
+        """
+        pass
+
+    @abstractmethod
+    def abort_upload(self, upload_id: str):
+        """Abstract method to end a multipart upload and discard its parts.
+
+        Args:
+            upload_id: Id of the upload session
+        """
+        pass
+
+    @abstractmethod
+    def expire_upload_sessions(self, max_age: float) -> int:
+        """Abstract method to discard multipart uploads that have not received a part for a while.
+
+        Args:
+            max_age: Seconds since the last part after which an upload is discarded
+
+        Returns:
+            Number of upload sessions discarded.
+        """
+        pass
@@ -0,0 +1,210 @@
+from pathlib import Path
+from typing import IO, AsyncIterable, Optional
+
+from src.file_manager.abstract_file_manager import AbstractFileManager
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.file_manager.blob_cache import CachedBlob
+from src.file_manager.compression import CompressionResult
+from src.file_manager.ingest_pipeline import IngestResult
+from src.file_manager.upload_session import UploadPart, UploadSession
+from src.utils.concurrency_utils import io_executor, run_in_executor
+
+
+class AsyncFileManager:
+    """Awaitable wrapper around a file manager.
+
+    Every operation runs on the bounded file I/O thread pool so that disk work never blocks the event loop.
+    """
+
+    def __init__(self, file_manager: AbstractFileManager):
+        """Initialise the async file manager.
+
+        Args:
+            file_manager: File manager to run operations with.
+        """
+        self.file_manager = file_manager
+
+    async def upload_file(self, file: IO) -> Path:
+        """Upload a file without blocking the event loop.
+
+        Args:
+            file: File to upload.
+
+        Returns:
+            Path to the uploaded file.
+        """
+        return await run_in_executor(io_executor, self.file_manager.upload_file, file)
+
+    async def ingest_file(self, file: IO) -> IngestResult:
+        """Upload a file and gather its details without blocking the event loop.
+
+        Args:
+            file: File to upload.
+
+        Returns:
+            Ingest result with the path to the uploaded file and its details.
+        """
+        return await run_in_executor(io_executor, self.file_manager.ingest_file, file)
+
+    async def compress_file(self, file_id: str, checksum: str, content_type: ContentEnum, size: int,
+                            media_type: Optional[str] = None) -> CompressionResult:
+        """Compress an uploaded file at rest without blocking the event loop.
+
+        Args:
+            file_id: ID of the file to compress.
+            checksum: Checksum of the original content.
+            content_type: Content type of the file.
+            size: Size of the original content in bytes.
+            media_type: Media type of the file, used to skip formats that are already compressed.
+
+        Returns:
+            The size the file is stored at and the encoding it is stored with, if any.
+        """
+        return await run_in_executor(io_executor, self.file_manager.compress_file, file_id, checksum, content_type,
+                                     size, media_type)
+
+    async def download_file(self, file_id: str) -> Path:
+        """Download a file without blocking the event loop.
+
+        Args:
+            file_id: ID of the file to download.
+
+        Returns:
+            Path to the downloaded file.
+        """
+        return await run_in_executor(io_executor, self.file_manager.download_file, file_id)
+
+    async def read_cached_file(self, file_id: str, stored_size: Optional[int] = None) -> Optional[CachedBlob]:
+        """Get the contents of a small file from memory without blocking the event loop.
+
+        Cache hits are answered on the event loop, and only misses go to the file I/O thread pool to read the file.
+        Misses of files known to be too large to cache return straight away, without opening the file.
+
+        Args:
+            file_id: ID of the file to read.
+            stored_size: Size of the file as stored in bytes, e.g. from its file record. Defaults to None, i.e. unknown,
+                in which case the size is read from the file.
+
+        Returns:
+            The cached file, or None if it cannot be served from memory.
+        """
+        cached_blob = self.file_manager.get_cached_file(file_id)
+        if cached_blob is not None:
+            return cached_blob
+        if not self.file_manager.can_cache_file(stored_size):
+            return None
+        return await run_in_executor(io_executor, self.file_manager.cache_file, file_id)
+
+    async def rename_file(self, file_id: str, new_file_id: str):
+        """Rename a file without blocking the event loop.
+
+        Args:
+            file_id: ID of the file to rename.
+            new_file_id: New id of the file.
+        """
+        return await run_in_executor(io_executor, self.file_manager.rename_file, file_id, new_file_id)
+
+    async def delete_file(self, file_id: str, checksum: Optional[str] = None, content_encoding: Optional[str] = None):
+        """Delete a file without blocking the event loop.
+
+        Args:
+            file_id: ID of the file to delete.
+            checksum: Checksum of the file. Defaults to None.
+            content_encoding: Encoding the file is stored with. Defaults to None.
+        """
+        return await run_in_executor(io_executor, self.file_manager.delete_file, file_id, checksum, content_encoding)
+
+    async def create_upload_session(self, file_name: Optional[str], content_type: Optional[str]) -> str:
+        """Start a multipart upload without blocking the event loop.
+
+        Args:
+            file_name: Name of the file being uploaded.
+            content_type: Content type declared by the client.
+
+        Returns:
+            ID of the upload session.
+        """
+        return await run_in_executor(io_executor, self.file_manager.create_upload_session, file_name, content_type)
+
+    async def upload_part(self, upload_id: str, part_number: int, file: IO) -> UploadPart:
+        """Store a part of a multipart upload without blocking the event loop.
+
+        Args:
+            upload_id: ID of the upload session.
+            part_number: Number of the part.
+            file: Contents of the part.
+
+        Returns:
+            The part stored.
+        """
+        return await run_in_executor(io_executor, self.file_manager.upload_part, upload_id, part_number, file)
+
+    async def upload_part_stream(self, upload_id: str, part_number: int, chunks: AsyncIterable[bytes]) -> UploadPart:
+        """Store a part of a multipart upload as its chunks arrive, writing each one without blocking the event loop.
+
+        The chunks are written straight to the part's place in the upload session, so the part is written to disk once.
+
+        Args:
+            upload_id: ID of the upload session.
+            part_number: Number of the part.
+            chunks: Chunks of the part, in order, e.g. a request's stream.
+
+        Returns:
+            The part stored.
+        """
+        writer = await run_in_executor(io_executor, self.file_manager.open_part, upload_id, part_number)
+        try:
+            async for chunk in chunks:
+                await run_in_executor(io_executor, writer.write, chunk)
+            return await run_in_executor(io_executor, writer.commit)
+        finally:
+            await run_in_executor(io_executor, writer.close)
+
+    async def get_upload_session(self, upload_id: str) -> UploadSession:
+        """Get a multipart upload and its parts without blocking the event loop.
+
+        Args:
+            upload_id: ID of the upload session.
+
+        Returns:
+            The upload session.
+        """
+        return await run_in_executor(io_executor, self.file_manager.get_upload_session, upload_id)
+
+    async def complete_upload(self, upload_id: str) -> IngestResult:
+        """Assemble a multipart upload into a file without blocking the event loop.
+
+        Args:
+            upload_id: ID of the upload session.
+
+        Returns:
+            Ingest result with the path to the assembled file and its details.
+        """
+        return await run_in_executor(io_executor, self.file_manager.complete_upload, upload_id)
+
+    async def end_upload(self, upload_id: str):
+        """Delete the parts of a completed multipart upload without blocking the event loop.
+
+        Args:
+            upload_id: ID of the upload session.
+        """
+        return await run_in_executor(io_executor, self.file_manager.end_upload, upload_id)
+
+    async def abort_upload(self, upload_id: str):
+        """End a multipart upload and discard its parts without blocking the event loop.
+
+        Args:
+            upload_id: ID of the upload session.
+        """
+        return await run_in_executor(io_executor, self.file_manager.abort_upload, upload_id)
+
+    async def expire_upload_sessions(self, max_age: float) -> int:
+        """Discard stale multipart uploads without blocking the event loop.
+
+        Args:
+            max_age: Seconds since the last part after which an upload is discarded.
+
+        Returns:
+            Number of upload sessions discarded.
+        """
+        return await run_in_executor(io_executor, self.file_manager.expire_upload_sessions, max_age)
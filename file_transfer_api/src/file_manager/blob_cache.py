@@ -0,0 +1,134 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+blob_cache_max_bytes = int(os.getenv("BLOB_CACHE_MAX_BYTES", default=64 * 1024 * 1024))  # Total budget, 0 disables
+blob_cache_max_object_bytes = int(os.getenv("BLOB_CACHE_MAX_OBJECT_BYTES", default=256 * 1024))  # Largest cached file
+
+
+@dataclass(frozen=True)
+class CachedBlob:
+    """Contents of a file held in memory, with the stat result they were read with"""
+    content: bytes
+    stat_result: os.stat_result
+
+
+class BlobCache:
+    """Thread-safe in-memory LRU cache of small file contents, bounded by a total byte budget.
+
+    Files larger than the per-object cap are never cached, so that one large file cannot evict every small one.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_object_bytes: Optional[int] = None):
+        """Initialise the blob cache.
+
+        Args:
+            max_bytes: Total number of bytes the cache may hold. Defaults to BLOB_CACHE_MAX_BYTES (64 MiB). A budget of
+                0 disables the cache.
+            max_object_bytes: Size of the largest file the cache will hold. Defaults to BLOB_CACHE_MAX_OBJECT_BYTES
+                (256 KiB).
+
+        Raises:
+            ValueError: If either size is negative.
+        """
+        self.max_bytes = blob_cache_max_bytes if max_bytes is None else max_bytes
+        self.max_object_bytes = blob_cache_max_object_bytes if max_object_bytes is None else max_object_bytes
+        if self.max_bytes < 0 or self.max_object_bytes < 0:
+            raise ValueError(f'Cache sizes must not be negative, got {self.max_bytes} and {self.max_object_bytes}')
+
+        self._lock = threading.Lock()
+        self._blobs: "OrderedDict[str, CachedBlob]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, size: int) -> bool:
+        """Check whether a file of the given size can be cached.
+
+        Args:
+            size: Size of the file in bytes.
+
+        Returns:
+            True if the file is within both the per-object cap and the total budget.
+        """
+        return size <= min(self.max_object_bytes, self.max_bytes)
+
+    def get(self, key: str) -> Optional[CachedBlob]:
+        """Get a cached file and mark it as most recently used.
+
+        Args:
+            key: ID of the file.
+
+        Returns:
+            The cached file, or None if it is not cached.
+        """
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._blobs.move_to_end(key)
+            self.hits += 1
+            return blob
+
+    def put(self, key: str, blob: CachedBlob) -> bool:
+        """Cache a file, evicting the least recently used files until it fits in the budget.
+
+        Args:
+            key: ID of the file.
+            blob: Contents of the file and its stat result.
+
+        Returns:
+            True if the file was cached, or False if it is too large.
+        """
+        size = len(blob.content)
+        if not self.accepts(size):
+            return False
+        with self._lock:
+            previous = self._blobs.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous.content)
+            while self._blobs and self.size_bytes + size > self.max_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self.size_bytes -= len(evicted.content)
+                self.evictions += 1
+            self._blobs[key] = blob
+            self.size_bytes += size
+        return True
+
+    def invalidate(self, key: str):
+        """Remove a file from the cache if it is cached.
+
+        Args:
+            key: ID of the file.
+        """
+        with self._lock:
+            blob = self._blobs.pop(key, None)
+            if blob is not None:
+                self.size_bytes -= len(blob.content)
+
+    def clear(self):
+        """Remove every file from the cache and reset the counters"""
+        with self._lock:
+            self._blobs.clear()
+            self.size_bytes = self.hits = self.misses = self.evictions = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get the cache's size and hit, miss and eviction counters.
+
+        Returns:
+            Dictionary of cache statistics.
+        """
+        with self._lock:
+            return {"entries": len(self._blobs), "size_bytes": self.size_bytes, "max_bytes": self.max_bytes,
+                    "max_object_bytes": self.max_object_bytes, "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+blob_cache = BlobCache()
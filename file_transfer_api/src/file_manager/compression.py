@@ -0,0 +1,133 @@
+import gzip
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, FrozenSet, Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from src.database_manager.schemas.content_enum import ContentEnum
+
+try:
+    import zstandard
+except ImportError:  # zstd support is an optional extra
+    zstandard = None
+
+load_dotenv()
+compression_algorithm = os.getenv("COMPRESSION_ALGORITHM", default="none")  # "zstd", "gzip" or "none"
+compressed_content_types = os.getenv("COMPRESSED_CONTENT_TYPES", default="text,application")  # ContentEnum values
+compression_min_size = int(os.getenv("COMPRESSION_MIN_SIZE", default=1024))  # Smaller files are stored as they are
+
+# Content encodings files can be stored with, named as in the HTTP Content-Encoding header
+ENCODINGS = ("zstd", "gzip")
+
+# Compressed copies that save less than this fraction of the original size are discarded, as they are not worth
+# decompressing on download
+MIN_COMPRESSION_SAVING = 0.1
+
+# Media types whose content is already compressed, so compressing it again would only waste a pass over the file
+COMPRESSED_MEDIA_TYPES = frozenset({
+    "application/zip", "application/gzip", "application/x-gzip", "application/zstd", "application/x-bzip2",
+    "application/x-xz", "application/x-7z-compressed", "application/vnd.rar", "application/x-rar-compressed",
+    "application/java-archive", "application/epub+zip",
+})
+
+# Bytes read at a time when compressing or decompressing a file
+COMPRESSION_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class CompressionResult:
+    """How a file ended up being stored"""
+    stored_size: int
+    content_encoding: Optional[str] = None
+
+
+class CompressionPolicy:
+    """Decides which files are compressed at rest, by content type and size."""
+
+    def __init__(self, algorithm: Optional[str] = None, content_types: Optional[Iterable[ContentEnum]] = None,
+                 min_size: Optional[int] = None):
+        """Initialise the compression policy.
+
+        Args:
+            algorithm: Encoding to compress with, "zstd" or "gzip", or "none" to store every file as it is. Defaults
+                to COMPRESSION_ALGORITHM ("none").
+            content_types: Content types to compress. Defaults to COMPRESSED_CONTENT_TYPES (text and application).
+            min_size: Size in bytes of the smallest file to compress. Defaults to COMPRESSION_MIN_SIZE (1 KiB).
+
+        Raises:
+            ValueError: If the algorithm is not supported, or is zstd and the zstandard package is not installed.
+        """
+        self.algorithm = (algorithm or compression_algorithm).lower()
+        if self.algorithm not in ENCODINGS + ("none",):
+            raise ValueError(f'Compression algorithm must be one of {ENCODINGS + ("none",)}, got {self.algorithm}')
+        if self.algorithm == "zstd" and zstandard is None:
+            raise ValueError('zstd compression requires the zstandard package, install it with the zstd extra')
+
+        if content_types is None:
+            content_types = [ContentEnum(value.strip().lower())
+                             for value in compressed_content_types.split(",") if value.strip()]
+        self.content_types: FrozenSet[ContentEnum] = frozenset(content_types)
+        self.min_size = compression_min_size if min_size is None else min_size
+
+    def choose_encoding(self, content_type: ContentEnum, size: int, media_type: Optional[str] = None) -> Optional[str]:
+        """Choose the encoding to store a file with.
+
+        Files whose media type is a compressed format, e.g. zip or gzip archives, are never compressed.
+
+        Args:
+            content_type: Content type of the file.
+            size: Size of the file in bytes.
+            media_type: Media type of the file, e.g. "application/zip". Defaults to None.
+
+        Returns:
+            The encoding to compress the file with, or None to store it as it is.
+        """
+        if self.algorithm == "none" or content_type not in self.content_types or size < self.min_size:
+            return None
+        if media_type and media_type.split(";")[0].strip().lower() in COMPRESSED_MEDIA_TYPES:
+            return None
+        return self.algorithm
+
+
+def compress_file(source: IO, destination: IO, encoding: str):
+    """Compress a file a chunk at a time.
+
+    Args:
+        source: File object to read the original content from.
+        destination: File object to write the compressed content to.
+        encoding: Encoding to compress with.
+    """
+    if encoding == "gzip":
+        # mtime is fixed so that identical content always compresses to identical bytes
+        with gzip.GzipFile(fileobj=destination, mode="wb", mtime=0) as compressed:
+            shutil.copyfileobj(source, compressed, COMPRESSION_CHUNK_SIZE)
+    elif encoding == "zstd":
+        zstandard.ZstdCompressor().copy_stream(source, destination, read_size=COMPRESSION_CHUNK_SIZE)
+    else:
+        raise ValueError(f'Unsupported content encoding {encoding}')
+
+
+def iter_decompressed(file_path: Path, encoding: str, chunk_size: int = COMPRESSION_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a compressed file a chunk at a time, decompressing it.
+
+    Args:
+        file_path: Path of the compressed file.
+        encoding: Encoding the file is compressed with.
+        chunk_size: Number of decompressed bytes to yield at a time.
+
+    Yields:
+        Chunks of the original content.
+    """
+    with open(file_path, "rb") as f:
+        if encoding == "gzip":
+            reader = gzip.GzipFile(fileobj=f, mode="rb")
+        elif encoding == "zstd":
+            reader = zstandard.ZstdDecompressor().stream_reader(f)
+        else:
+            raise ValueError(f'Unsupported content encoding {encoding}')
+        with reader:
+            while chunk := reader.read(chunk_size):
+                yield chunk
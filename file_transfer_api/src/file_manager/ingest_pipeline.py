@@ -0,0 +1,109 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+checksum_algorithm = os.getenv("CHECKSUM_ALGORITHM", default="sha256")  # Any hashlib algorithm e.g. sha256, blake2b
+
+# Number of leading bytes kept for content sniffing
+SNIFF_LENGTH = 64
+
+# Each entry is a tuple of (offset, signature) pairs that must all match and the content type they identify.
+# More specific signatures must come before the more general ones that share a prefix.
+MAGIC_SIGNATURES: List[Tuple[Tuple[Tuple[int, bytes], ...], str]] = [
+    (((0, b"\x89PNG\r\n\x1a\n"),), "image/png"),
+    (((0, b"\xff\xd8\xff"),), "image/jpeg"),
+    (((0, b"GIF87a"),), "image/gif"),
+    (((0, b"GIF89a"),), "image/gif"),
+    (((0, b"RIFF"), (8, b"WEBP")), "image/webp"),
+    (((0, b"II*\x00"),), "image/tiff"),
+    (((0, b"MM\x00*"),), "image/tiff"),
+    (((0, b"RIFF"), (8, b"WAVE")), "audio/wav"),
+    (((0, b"ID3"),), "audio/mpeg"),
+    (((0, b"OggS"),), "audio/ogg"),
+    (((0, b"fLaC"),), "audio/flac"),
+    (((4, b"ftypM4A"),), "audio/mp4"),
+    (((4, b"ftypqt"),), "video/quicktime"),
+    (((4, b"ftyp"),), "video/mp4"),
+    (((0, b"RIFF"), (8, b"AVI ")), "video/x-msvideo"),
+    (((0, b"\x1a\x45\xdf\xa3"),), "video/webm"),
+    (((0, b"%PDF-"),), "application/pdf"),
+    (((0, b"PK\x03\x04"),), "application/zip"),
+    (((0, b"\x1f\x8b"),), "application/gzip"),
+    (((0, b"\x28\xb5\x2f\xfd"),), "application/zstd"),
+    (((0, b"\x7fELF"),), "application/x-executable"),
+]
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Identify the content type of a file from its leading bytes.
+
+    Args:
+        head: The first bytes of the file. SNIFF_LENGTH bytes is enough for every known signature.
+
+    Returns:
+        The content type identified by the file's magic number, or None if it is not recognised.
+    """
+    for signature, content_type in MAGIC_SIGNATURES:
+        if all(head[offset:offset + len(magic)] == magic for offset, magic in signature):
+            return content_type
+    return None
+
+
+@dataclass
+class IngestResult:
+    """Details of a file gathered while it was written to storage"""
+    file_path: Path
+    size: int
+    checksum: str
+    sniffed_content_type: Optional[str] = None
+
+
+class IngestPipeline:
+    """Computes the size, checksum and sniffed content type of a file from the chunks written to storage.
+
+    Feeding every chunk to the pipeline as it is written means the upload only has to be read once.
+    """
+
+    def __init__(self, algorithm: Optional[str] = None):
+        """Initialise the ingest pipeline.
+
+        Args:
+            algorithm: Name of the hashlib algorithm used for the checksum. Defaults to CHECKSUM_ALGORITHM (sha256).
+
+        Raises:
+            ValueError: If the algorithm is not supported by hashlib.
+        """
+        self.algorithm = algorithm or checksum_algorithm
+        self._hash = hashlib.new(self.algorithm)
+        self._head = b""
+        self.size = 0
+
+    def update(self, chunk: bytes):
+        """Account for a chunk of the file.
+
+        Args:
+            chunk: Next chunk of the file, in order.
+        """
+        if len(self._head) < SNIFF_LENGTH:
+            self._head += chunk[:SNIFF_LENGTH - len(self._head)]
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def result(self, file_path: Path) -> IngestResult:
+        """Get the details of the file once every chunk has been written.
+
+        Args:
+            file_path: Path the file was written to.
+
+        Returns:
+            The ingest result for the file.
+        """
+        return IngestResult(file_path=file_path,
+                            size=self.size,
+                            checksum=self._hash.hexdigest(),
+                            sniffed_content_type=sniff_content_type(self._head))
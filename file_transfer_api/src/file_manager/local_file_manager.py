@@ -1,22 +1,129 @@
-from typing import IO
+from typing import IO, Dict, Optional, Union
+import hashlib
+import json
 import shutil
+import time
 
 from src.file_manager.abstract_file_manager import AbstractFileManager
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.file_manager.blob_cache import BlobCache, CachedBlob
+from src.file_manager.compression import MIN_COMPRESSION_SAVING, CompressionPolicy, CompressionResult, compress_file
+from src.file_manager.ingest_pipeline import IngestPipeline, IngestResult
+from src.file_manager.upload_session import (MAX_PART_NUMBER, MIN_PART_NUMBER, AbstractPartWriter, UploadPart,
+                                             UploadSession)
 from uuid import uuid4
 from pathlib import Path
 from dotenv import load_dotenv
 import os
 from src.exceptions.file_exceptions import (FileDownloadError, FileUploadError, FileDeleteError, FileDoesNotExistError,
-                                        FileUpdateError)
+                                        FileUpdateError, InvalidUploadPartError, UploadSessionDoesNotExistError)
 
 load_dotenv()
 upload_path = Path(os.getenv("UPLOAD_DIRECTORY", default="data/uploads"))
 download_path = Path(os.getenv("DOWNLOAD_DIRECTORY", default="data/downloads"))
+multipart_path = Path(os.getenv("MULTIPART_UPLOAD_DIRECTORY", default="data/multipart"))  # Parts of unfinished uploads
+blob_path = Path(os.getenv("BLOB_DIRECTORY", default="data/blobs"))  # Content-addressed copies, named by checksum
+deduplicate_uploads = os.getenv("DEDUPLICATE_UPLOADS", default="true").lower() in ("1", "true", "yes")
+upload_chunk_size = int(os.getenv("UPLOAD_CHUNK_SIZE", default=1024 * 1024))  # Bytes copied per read when uploading
+default_download_mode = os.getenv("DOWNLOAD_MODE", default="direct")  # "direct" serves uploads in place, "copy" copies
+upload_shard_depth = int(os.getenv("UPLOAD_SHARD_DEPTH", default=0))  # Directory levels uploads are fanned out over
+upload_shard_width = int(os.getenv("UPLOAD_SHARD_WIDTH", default=2))  # Hex characters naming each directory level
+
+# Supported download modes
+DOWNLOAD_MODES = ("direct", "copy")
+
+# Files kept in each multipart upload session directory
+SESSION_FILE_NAME = "session.json"
+PART_SUFFIX = ".part"
+CHECKSUM_SUFFIX = ".checksum"  # Next to each part, holding the hex digest of the part
+
+# Hex characters in the digest that shard directories are named from
+SHARD_DIGEST_LENGTH = 32
 
 
 class LocalFileManager(AbstractFileManager):
     """Class for the local file manager."""
 
+    def __init__(self, chunk_size: Optional[int] = None, download_mode: Optional[str] = None,
+                 blob_cache: Optional[BlobCache] = None, deduplicate: Optional[bool] = None,
+                 compression_policy: Optional[CompressionPolicy] = None, shard_depth: Optional[int] = None,
+                 shard_width: Optional[int] = None):
+        """Initialises the local file manager.
+
+        Args:
+            chunk_size: Number of bytes to copy at a time when uploading a file. Defaults to UPLOAD_CHUNK_SIZE (1 MiB).
+            download_mode: Download mode. "direct" serves files straight from the upload directory, while "copy"
+                copies them to the download directory first. Defaults to DOWNLOAD_MODE ("direct").
+            blob_cache: Cache to keep the contents of small files in memory. Defaults to None, i.e. no caching.
+            deduplicate: Whether to store identical uploads once, by hard linking them to a blob named by their
+                checksum. Defaults to DEDUPLICATE_UPLOADS (True).
+            compression_policy: Policy deciding which files are compressed at rest. Defaults to a policy configured
+                from the environment, which compresses nothing unless COMPRESSION_ALGORITHM is set.
+            shard_depth: Number of directory levels files in the upload directory are fanned out over, e.g. 2 stores
+                a file at ab/cd/<file id>. Defaults to UPLOAD_SHARD_DEPTH (0), i.e. a flat directory.
+            shard_width: Number of hex characters naming each directory level. Defaults to UPLOAD_SHARD_WIDTH (2), i.e.
+                256 directories per level.
+
+        Raises:
+            ValueError: If the chunk size is not a positive integer, the download mode is not supported or the shard
+                layout is invalid.
+        """
+        chunk_size = upload_chunk_size if chunk_size is None else chunk_size
+        if chunk_size <= 0:
+            raise ValueError(f'Chunk size must be a positive integer, got {chunk_size}')
+        self.chunk_size = chunk_size
+
+        self.download_mode = download_mode or default_download_mode
+        if self.download_mode not in DOWNLOAD_MODES:
+            raise ValueError(f'Download mode must be one of {DOWNLOAD_MODES}, got {self.download_mode}')
+
+        self.blob_cache = blob_cache
+        self.deduplicate = deduplicate_uploads if deduplicate is None else deduplicate
+        self.compression_policy = compression_policy or CompressionPolicy()
+
+        self.shard_depth = upload_shard_depth if shard_depth is None else shard_depth
+        self.shard_width = upload_shard_width if shard_width is None else shard_width
+        if self.shard_depth < 0 or self.shard_width <= 0 or self.shard_depth * self.shard_width > SHARD_DIGEST_LENGTH:
+            raise ValueError(f'Shard depth must not be negative and shard width must be positive, with at most '
+                             f'{SHARD_DIGEST_LENGTH} characters in total, got {self.shard_depth} and '
+                             f'{self.shard_width}')
+
+    def get_file_location(self, file_id: str) -> Path:
+        """Get the path a file is stored at in the upload directory.
+
+        Files are looked for at their sharded path first and then at the flat path they were stored at before the
+        upload directory was sharded, so files can be moved to their shards while the API is running.
+
+        Args:
+            file_id: ID of the file.
+
+        Returns:
+            Path of the file. If the file does not exist, the path it would be stored at.
+        """
+        file_location = upload_path / get_shard_path(file_id, self.shard_depth, self.shard_width)
+        if self.shard_depth and not file_location.exists():
+            flat_file_location = upload_path / file_id
+            if flat_file_location.exists():
+                return flat_file_location
+        return file_location
+
+    def _make_file_location(self, file_id: str) -> Path:
+        """Get the sharded path to store a new file at, creating its shard directories.
+
+        Args:
+            file_id: ID of the file.
+
+        Returns:
+            Path to store the file at.
+
+        Raises:
+            OSError: If the shard directories cannot be created.
+        """
+        file_location = upload_path / get_shard_path(file_id, self.shard_depth, self.shard_width)
+        if self.shard_depth:
+            file_location.parent.mkdir(parents=True, exist_ok=True)
+        return file_location
+
     def upload_file(self, file: IO) -> Path:
         """Upload a file to the local file system.
 
@@ -26,6 +133,20 @@ class LocalFileManager(AbstractFileManager):
         Returns:
             Path to the uploaded file.
 
+        Raises:
+            FileUploadError: If an error occurs while uploading the file.
+        """
+        return self.ingest_file(file).file_path
+
+    def ingest_file(self, file: IO) -> IngestResult:
+        """Upload a file to the local file system, gathering its size, checksum and content type in the same pass.
+
+        Args:
+            file: File to upload.
+
+        Returns:
+            Ingest result with the path to the uploaded file and its details.
+
         Raises:
             FileUploadError: If an error occurs while uploading the file.
         """
@@ -33,20 +154,160 @@ class LocalFileManager(AbstractFileManager):
         # generate a file id
         file_id = str(uuid4())
         file_location = upload_path / file_id
+        pipeline = IngestPipeline()
 
         try:
-            # save the file
+            file_location = self._make_file_location(file_id)
+            # save the file a chunk at a time so that memory use does not grow with the file size
             with open(file_location, "wb") as f:
-                f.write(file.read())
+                self._copy_in_chunks(file, f, pipeline)
 
             # return the file id and the file path
         except IOError as e:
+            file_location.unlink(missing_ok=True)
             raise FileUploadError(f'Error occurred while uploading file: {e}')
-        return file_location
+        return self._store_blob(pipeline.result(file_location))
+
+    def _store_blob(self, result: IngestResult) -> IngestResult:
+        """Deduplicate a newly written file against the blob store.
+
+        The blob store holds one copy of each distinct content, named by its checksum. Files in the upload directory
+        are hard links to their blob, so identical uploads share their storage and the blob's link count, less one,
+        is its reference count.
+
+        Args:
+            result: Ingest result of the file written to the upload directory.
+
+        Returns:
+            The same ingest result.
+        """
+        self._link_blob(result.file_path, get_blob_name(result.checksum), result.size)
+        return result
+
+    def _link_blob(self, file_location: Path, blob_name: str, size: int):
+        """Make a file in the upload directory share its storage with the blob of the same content.
+
+        The first file with some content becomes its blob, while later files are replaced by a link to the existing
+        blob. Deduplication is best effort: if the blob store cannot be linked to, e.g. because it is on another file
+        system, the file is kept as a separate copy.
+
+        Args:
+            file_location: Path of the file in the upload directory.
+            blob_name: Name of the blob for the file's content, as stored.
+            size: Size of the file as stored, in bytes.
+        """
+        if not self.deduplicate:
+            return
+        blob_location = blob_path / blob_name
+        try:
+            blob_path.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(file_location, blob_location)
+                return
+            except FileExistsError:
+                pass
+
+            # The content is already stored, so point the file at the existing blob instead
+            if blob_location.stat().st_size != size:
+                return
+            temp_location = file_location.with_name(f"{file_location.name}.{uuid4()}.tmp")
+            try:
+                os.link(blob_location, temp_location)
+                os.replace(temp_location, file_location)
+            finally:
+                temp_location.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _release_blob(self, blob_name: Optional[str]):
+        """Delete a blob once no file in the upload directory links to it any more.
+
+        Args:
+            blob_name: Name of the blob of a file that was deleted or replaced.
+        """
+        if not blob_name:
+            return
+        blob_location = blob_path / blob_name
+        try:
+            if blob_location.stat().st_nlink <= 1:
+                blob_location.unlink()
+        except OSError:
+            # Already released by a concurrent delete, or never stored
+            pass
+
+    def compress_file(self, file_id: str, checksum: str, content_type: ContentEnum, size: int,
+                      media_type: Optional[str] = None) -> CompressionResult:
+        """Compress a newly uploaded file if the compression policy calls for it.
+
+        Compressed files are deduplicated like any other, against a blob named by the checksum of their original
+        content and their encoding.
+
+        Args:
+            file_id: ID of the file.
+            checksum: Checksum of the original content.
+            content_type: Content type of the file.
+            size: Size of the original content in bytes.
+            media_type: Media type of the file, used to skip formats that are already compressed.
+
+        Returns:
+            The size the file is stored at and the encoding it is stored with, if any.
+
+        Raises:
+            FileUploadError: If an error occurs while compressing the file.
+        """
+        encoding = self.compression_policy.choose_encoding(content_type, size, media_type)
+        if encoding is None:
+            return CompressionResult(stored_size=size)
+
+        file_location = self.get_file_location(file_id)
+        blob_location = blob_path / get_blob_name(checksum, encoding)
+        temp_location = file_location.with_name(f"{file_id}.{uuid4()}.tmp")
+        try:
+            if self.deduplicate and blob_location.exists():
+                # The same content has been compressed before, so there is nothing to compress
+                stored_size = blob_location.stat().st_size
+            else:
+                with open(file_location, "rb") as source, open(temp_location, "wb") as destination:
+                    compress_file(source, destination, encoding)
+                stored_size = temp_location.stat().st_size
+                if stored_size > size * (1 - MIN_COMPRESSION_SAVING):
+                    temp_location.unlink()
+                    return CompressionResult(stored_size=size)
+                os.replace(temp_location, file_location)
+        except OSError as e:
+            temp_location.unlink(missing_ok=True)
+            raise FileUploadError(f'Error occurred while compressing file: {e}')
+
+        self._link_blob(file_location, blob_location.name, stored_size)
+        # The original content's blob may no longer have any references
+        self._release_blob(get_blob_name(checksum))
+        return CompressionResult(stored_size=stored_size, content_encoding=encoding)
+
+    def _copy_in_chunks(self, source: IO, destination: IO, pipeline: Optional[IngestPipeline] = None) -> int:
+        """Copy the contents of one file object to another without holding more than one chunk in memory.
+
+        Args:
+            source: File object to read from.
+            destination: File object to write to.
+            pipeline: Ingest pipeline to feed each chunk to. Defaults to None.
+
+        Returns:
+            Number of bytes copied.
+        """
+        bytes_copied = 0
+        while chunk := source.read(self.chunk_size):
+            destination.write(chunk)
+            if pipeline is not None:
+                pipeline.update(chunk)
+            bytes_copied += len(chunk)
+        return bytes_copied
 
     def download_file(self, file_id: str) -> Path:
         """Download a file from the local file system.
 
+        In direct mode the path of the stored file is returned so that it can be served without being copied. In copy
+        mode the file is first copied to the download directory.
+
         Args:
             file_id: ID of the file to download.
 
@@ -57,9 +318,17 @@ class LocalFileManager(AbstractFileManager):
             FileDownloadError: If an error occurs while downloading the file.
             FileDoesNotExistError: If the file does not exist.
         """
+        upload_file_path = self.get_file_location(file_id)
+
+        if self.download_mode == "direct":
+            try:
+                if not upload_file_path.is_file():
+                    raise FileDoesNotExistError(f'File with id {file_id} does not exist')
+            except OSError as e:
+                raise FileDownloadError(f'Error occurred while downloading file: {e}')
+            return upload_file_path
 
         # Copy the file to the download path and return the path
-        upload_file_path = upload_path / file_id
         download_file_path = download_path / file_id
 
         try:
@@ -70,6 +339,64 @@ class LocalFileManager(AbstractFileManager):
             raise FileDownloadError(f'Error occurred while downloading file: {e}')
         return download_file_path
 
+    def get_cached_file(self, file_id: str) -> Optional[CachedBlob]:
+        """Get the contents of a file from the blob cache without touching the disk.
+
+        Args:
+            file_id: ID of the file to get.
+
+        Returns:
+            The cached file, or None if there is no cache or the file is not cached.
+        """
+        if self.blob_cache is None:
+            return None
+        return self.blob_cache.get(file_id)
+
+    def can_cache_file(self, size: Optional[int] = None) -> bool:
+        """Check whether a file could be read into the blob cache, without touching the disk.
+
+        Args:
+            size: Size of the file as stored in bytes. Defaults to None, i.e. unknown.
+
+        Returns:
+            False if there is no cache or the file is known to be too large to cache.
+        """
+        if self.blob_cache is None:
+            return False
+        return size is None or self.blob_cache.accepts(size)
+
+    def cache_file(self, file_id: str) -> Optional[CachedBlob]:
+        """Read a small file into the blob cache.
+
+        Args:
+            file_id: ID of the file to read.
+
+        Returns:
+            The cached file, or None if there is no cache or the file is too large to cache.
+
+        Raises:
+            FileDownloadError: If an error occurs while reading the file.
+            FileDoesNotExistError: If the file does not exist.
+        """
+        if self.blob_cache is None:
+            return None
+
+        file_location = self.get_file_location(file_id)
+        try:
+            with open(file_location, "rb") as f:
+                stat_result = os.fstat(f.fileno())
+                if not self.blob_cache.accepts(stat_result.st_size):
+                    return None
+                content = f.read()
+        except FileNotFoundError:
+            raise FileDoesNotExistError(f'File with id {file_id} does not exist')
+        except OSError as e:
+            raise FileDownloadError(f'Error occurred while downloading file: {e}')
+
+        cached_blob = CachedBlob(content=content, stat_result=stat_result)
+        self.blob_cache.put(file_id, cached_blob)
+        return cached_blob
+
     def rename_file(self, file_id: str, new_file_id: str):
         """Rename a file in the local file system.
 
@@ -82,30 +409,415 @@ class LocalFileManager(AbstractFileManager):
             FileDoesNotExistError: If the file does not exist.
             FileUpdateError: If an error occurs while renaming the file.
         """
-        old_file_location = upload_path / file_id
-        new_file_location = upload_path / new_file_id
+        old_file_location = self.get_file_location(file_id)
 
+        self._invalidate_cached_file(file_id)
         try:
+            new_file_location = self._make_file_location(new_file_id)
             old_file_location.rename(new_file_location)
         except FileNotFoundError:
             raise FileDoesNotExistError(f'File with id {file_id} does not exist')
         except IOError as e:
             raise FileUpdateError(f'Error occurred while renaming file: {e}')
 
-    def delete_file(self, file_id: str):
+    def delete_file(self, file_id: str, checksum: Optional[str] = None, content_encoding: Optional[str] = None):
         """Delete a file from the local file system.
 
+        If the file shares its content with other uploads, the stored content is only deleted along with the last of
+        them.
+
         Args:
             file_id: ID of the file to delete.
+            checksum: Checksum of the file, which names its blob in the blob store. Defaults to None, in which case
+                a blob left without references is not deleted.
+            content_encoding: Encoding the file is stored with. Defaults to None, i.e. not compressed.
 
         Raises:
             FileDoesNotExistError: If the file does not exist.
             FileDeleteError: If an error occurs while deleting the file.
         """
-        file_location = upload_path / file_id
+        file_location = self.get_file_location(file_id)
+        self._invalidate_cached_file(file_id)
         try:
             file_location.unlink()
         except FileNotFoundError:
             raise FileDoesNotExistError(f'File with id {file_id} does not exist')
         except OSError as e:
             raise FileDeleteError(f'Error occurred while deleting file: {e}')
+        if checksum:
+            self._release_blob(get_blob_name(checksum, content_encoding))
+
+    def _invalidate_cached_file(self, file_id: str):
+        """Remove a file from the blob cache, if there is one.
+
+        Args:
+            file_id: ID of the file to remove.
+        """
+        if self.blob_cache is not None:
+            self.blob_cache.invalidate(file_id)
+
+    def create_upload_session(self, file_name: Optional[str], content_type: Optional[str]) -> str:
+        """Start a multipart upload by creating a directory to hold its parts.
+
+        Args:
+            file_name: Name of the file being uploaded.
+            content_type: Content type declared by the client.
+
+        Returns:
+            ID of the upload session.
+
+        Raises:
+            FileUploadError: If an error occurs while creating the session.
+        """
+        upload_id = str(uuid4())
+        session_path = multipart_path / upload_id
+        try:
+            session_path.mkdir(parents=True)
+            with open(session_path / SESSION_FILE_NAME, "w") as f:
+                json.dump({"file_name": file_name, "content_type": content_type}, f)
+        except OSError as e:
+            shutil.rmtree(session_path, ignore_errors=True)
+            raise FileUploadError(f'Error occurred while creating upload session: {e}')
+        return upload_id
+
+    def open_part(self, upload_id: str, part_number: int) -> "LocalPartWriter":
+        """Start writing a part of a multipart upload straight into its session directory.
+
+        Args:
+            upload_id: ID of the upload session.
+            part_number: Number of the part, between 1 and 10000.
+
+        Returns:
+            Writer for the part, which stores it once committed.
+
+        Raises:
+            InvalidUploadPartError: If the part number is out of range.
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+            FileUploadError: If the part cannot be written.
+        """
+        if not MIN_PART_NUMBER <= part_number <= MAX_PART_NUMBER:
+            raise InvalidUploadPartError(
+                f'Part number must be between {MIN_PART_NUMBER} and {MAX_PART_NUMBER}, got {part_number}')
+        return LocalPartWriter(upload_id, self._get_session_path(upload_id), part_number)
+
+    def upload_part(self, upload_id: str, part_number: int, file: IO) -> UploadPart:
+        """Store a part of a multipart upload.
+
+        Args:
+            upload_id: ID of the upload session.
+            part_number: Number of the part, between 1 and 10000.
+            file: Contents of the part.
+
+        Returns:
+            The part stored, with its size and checksum.
+
+        Raises:
+            InvalidUploadPartError: If the part number is out of range.
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+            FileUploadError: If an error occurs while storing the part.
+        """
+        with self.open_part(upload_id, part_number) as writer:
+            while chunk := file.read(self.chunk_size):
+                writer.write(chunk)
+            return writer.commit()
+
+    def get_upload_session(self, upload_id: str) -> UploadSession:
+        """Get a multipart upload and the parts received so far.
+
+        Args:
+            upload_id: ID of the upload session.
+
+        Returns:
+            The upload session, with its parts in order.
+
+        Raises:
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+            FileUploadError: If an error occurs while reading the session.
+        """
+        session_path = self._get_session_path(upload_id)
+        try:
+            with open(session_path / SESSION_FILE_NAME) as f:
+                details = json.load(f)
+            parts = [UploadPart(part_number=int(part_location.name[:-len(PART_SUFFIX)]),
+                                size=part_location.stat().st_size, checksum=self._read_part_checksum(part_location))
+                     for part_location in sorted(session_path.glob(f"*{PART_SUFFIX}"))]
+        except FileNotFoundError:
+            raise UploadSessionDoesNotExistError(f'Upload session with id {upload_id} does not exist')
+        except (OSError, ValueError) as e:
+            raise FileUploadError(f'Error occurred while reading upload session: {e}')
+        return UploadSession(upload_id=upload_id, parts=parts, **details)
+
+    @staticmethod
+    def _read_part_checksum(part_location: Path) -> Optional[str]:
+        """Read the checksum stored next to a part of a multipart upload.
+
+        Args:
+            part_location: Path of the part.
+
+        Returns:
+            The hex digest of the part, or None if it was not stored, e.g. because storing the part was interrupted.
+        """
+        try:
+            with open(part_location.with_name(f"{part_location.name}{CHECKSUM_SUFFIX}")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def complete_upload(self, upload_id: str) -> IngestResult:
+        """Assemble the parts of a multipart upload into a file in the upload directory.
+
+        The session and its parts are kept until end_upload is called, so that completing the upload can be retried if
+        the file cannot be recorded.
+
+        Args:
+            upload_id: ID of the upload session.
+
+        Returns:
+            Ingest result with the path to the assembled file and its details.
+
+        Raises:
+            InvalidUploadPartError: If no parts have been received or a part is missing.
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+            FileUploadError: If an error occurs while assembling the file.
+        """
+        session = self.get_upload_session(upload_id)
+        part_numbers = [part.part_number for part in session.parts]
+        if not part_numbers:
+            raise InvalidUploadPartError(f'Upload session with id {upload_id} has no parts')
+        missing_part_numbers = sorted(set(range(MIN_PART_NUMBER, part_numbers[-1] + 1)) - set(part_numbers))
+        if missing_part_numbers:
+            raise InvalidUploadPartError(f'Upload session with id {upload_id} is missing parts {missing_part_numbers}')
+
+        session_path = multipart_path / upload_id
+        file_id = str(uuid4())
+        file_location = upload_path / file_id
+        pipeline = IngestPipeline()
+
+        try:
+            file_location = self._make_file_location(file_id)
+            with open(file_location, "wb") as f:
+                for part_number in part_numbers:
+                    with open(session_path / f"{part_number:05d}{PART_SUFFIX}", "rb") as part:
+                        self._copy_in_chunks(part, f, pipeline)
+        except IOError as e:
+            file_location.unlink(missing_ok=True)
+            raise FileUploadError(f'Error occurred while assembling upload: {e}')
+
+        return self._store_blob(pipeline.result(file_location))
+
+    def end_upload(self, upload_id: str):
+        """Delete the session and parts of a multipart upload once its assembled file has been recorded.
+
+        Args:
+            upload_id: ID of the upload session.
+        """
+        shutil.rmtree(multipart_path / upload_id, ignore_errors=True)
+
+    def abort_upload(self, upload_id: str):
+        """End a multipart upload and delete its parts.
+
+        Args:
+            upload_id: ID of the upload session.
+
+        Raises:
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+            FileDeleteError: If an error occurs while deleting the parts.
+        """
+        session_path = self._get_session_path(upload_id)
+        try:
+            shutil.rmtree(session_path)
+        except FileNotFoundError:
+            raise UploadSessionDoesNotExistError(f'Upload session with id {upload_id} does not exist')
+        except OSError as e:
+            raise FileDeleteError(f'Error occurred while aborting upload: {e}')
+
+    def expire_upload_sessions(self, max_age: float) -> int:
+        """Delete multipart uploads that have not received a part within the given time.
+
+        Args:
+            max_age: Seconds since the last part after which an upload is deleted.
+
+        Returns:
+            Number of upload sessions deleted.
+        """
+        expired = 0
+        cutoff = time.time() - max_age
+        try:
+            session_paths = list(multipart_path.iterdir())
+        except FileNotFoundError:
+            return 0
+
+        for session_path in session_paths:
+            try:
+                last_active = (session_path / SESSION_FILE_NAME).stat().st_mtime
+            except FileNotFoundError:
+                # A session without its session file was left half created, so judge it by its directory instead
+                try:
+                    last_active = session_path.stat().st_mtime
+                except OSError:
+                    continue
+            if last_active < cutoff:
+                shutil.rmtree(session_path, ignore_errors=True)
+                expired += 1
+        return expired
+
+    def _get_session_path(self, upload_id: str) -> Path:
+        """Get the directory of a multipart upload session.
+
+        Args:
+            upload_id: ID of the upload session.
+
+        Returns:
+            Path to the session directory.
+
+        Raises:
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+        """
+        session_path = multipart_path / upload_id
+        # Upload ids come from the URL, so refuse anything that is not a plain directory name
+        if session_path.parent != multipart_path or upload_id in ("", ".", "..") or not session_path.is_dir():
+            raise UploadSessionDoesNotExistError(f'Upload session with id {upload_id} does not exist')
+        return session_path
+
+
+class LocalPartWriter(AbstractPartWriter):
+    """Writes a part of a multipart upload to a temporary file in its session directory.
+
+    The part is moved into place once committed, so parts can be uploaded in parallel and a part whose upload is
+    interrupted is never mistaken for a received one. The part's checksum is stored next to it, so that clients resuming
+    the upload can check the parts already received.
+    """
+
+    def __init__(self, upload_id: str, session_path: Path, part_number: int):
+        """Initialise the part writer, creating its temporary file.
+
+        Args:
+            upload_id: ID of the upload session.
+            session_path: Directory of the upload session.
+            part_number: Number of the part.
+
+        Raises:
+            UploadSessionDoesNotExistError: If the upload session does not exist.
+            FileUploadError: If the temporary file cannot be created.
+        """
+        self.upload_id = upload_id
+        self.session_path = session_path
+        self.part_number = part_number
+        self.part_location = session_path / f"{part_number:05d}{PART_SUFFIX}"
+        self.temp_location = session_path / f"{self.part_location.name}.{uuid4()}.tmp"
+        self.pipeline = IngestPipeline()
+        try:
+            self.file = open(self.temp_location, "wb")
+        except FileNotFoundError:
+            raise UploadSessionDoesNotExistError(f'Upload session with id {upload_id} does not exist')
+        except OSError as e:
+            raise FileUploadError(f'Error occurred while uploading part {part_number}: {e}')
+
+    def write(self, chunk: bytes):
+        """Write the next chunk of the part.
+
+        Args:
+            chunk: Next chunk of the part, in order.
+
+        Raises:
+            FileUploadError: If the chunk cannot be written.
+        """
+        try:
+            self.file.write(chunk)
+        except OSError as e:
+            raise FileUploadError(f'Error occurred while uploading part {self.part_number}: {e}')
+        self.pipeline.update(chunk)
+
+    def commit(self) -> UploadPart:
+        """Move the part into place, replacing any earlier copy, and store its checksum next to it.
+
+        Returns:
+            The part stored, with its size and checksum.
+
+        Raises:
+            UploadSessionDoesNotExistError: If the upload session no longer exists.
+            FileUploadError: If the part cannot be stored.
+        """
+        checksum_location = self.part_location.with_name(f"{self.part_location.name}{CHECKSUM_SUFFIX}")
+        try:
+            self.file.close()
+            # A part is never paired with the checksum of the copy it replaces, only with its own or with none
+            checksum_location.unlink(missing_ok=True)
+            os.replace(self.temp_location, self.part_location)
+            result = self.pipeline.result(self.part_location)
+            with open(self.temp_location, "w") as f:
+                f.write(result.checksum)
+            os.replace(self.temp_location, checksum_location)
+            # The session file's modification time records when the session was last active
+            os.utime(self.session_path / SESSION_FILE_NAME)
+        except FileNotFoundError:
+            raise UploadSessionDoesNotExistError(f'Upload session with id {self.upload_id} does not exist')
+        except OSError as e:
+            raise FileUploadError(f'Error occurred while uploading part {self.part_number}: {e}')
+        return UploadPart(part_number=self.part_number, size=result.size, checksum=result.checksum)
+
+    def close(self):
+        """Close the temporary file, deleting it if the part was not committed."""
+        self.file.close()
+        self.temp_location.unlink(missing_ok=True)
+
+
+def get_shard_path(file_id: str, depth: int, width: int = 2) -> Path:
+    """Get the path of a file relative to the upload directory in a sharded layout.
+
+    Shard directories are named from an MD5 digest of the file ID rather than the ID itself, so files spread evenly
+    over the shards whatever their IDs look like.
+
+    Args:
+        file_id: ID of the file.
+        depth: Number of directory levels, or 0 for a flat layout.
+        width: Number of hex characters naming each directory level. Defaults to 2.
+
+    Returns:
+        The file's relative path, e.g. ab/cd/<file id>.
+    """
+    digest = hashlib.md5(file_id.encode(), usedforsecurity=False).hexdigest()
+    return Path(*[digest[level * width:(level + 1) * width] for level in range(depth)], file_id)
+
+
+def get_blob_name(checksum: str, content_encoding: Optional[str] = None) -> str:
+    """Get the name of the blob holding some content.
+
+    Args:
+        checksum: Checksum of the original content.
+        content_encoding: Encoding the content is stored with. Defaults to None, i.e. not compressed.
+
+    Returns:
+        The blob's file name in the blob store.
+    """
+    return f"{checksum}.{content_encoding}" if content_encoding else checksum
+
+
+def get_storage_stats() -> Dict[str, Union[int, float]]:
+    """Get how much storage the blob store saves by keeping a single copy of identical uploads.
+
+    Sizes are as stored, so for compressed files they are the compressed sizes.
+
+    Returns:
+        The number of blobs and of files referring to them, the bytes those files would take up without
+        deduplication, the bytes actually stored, the bytes saved and the deduplication ratio.
+    """
+    blobs = references = logical_bytes = stored_bytes = 0
+    try:
+        blob_locations = list(blob_path.iterdir())
+    except FileNotFoundError:
+        blob_locations = []
+
+    for blob_location in blob_locations:
+        try:
+            stat_result = blob_location.stat()
+        except FileNotFoundError:
+            continue
+        blobs += 1
+        references += stat_result.st_nlink - 1
+        logical_bytes += stat_result.st_size * (stat_result.st_nlink - 1)
+        stored_bytes += stat_result.st_size
+
+    return {"blobs": blobs, "references": references, "logical_bytes": logical_bytes, "stored_bytes": stored_bytes,
+            "bytes_saved": max(logical_bytes - stored_bytes, 0),
+            "dedup_ratio": logical_bytes / stored_bytes if stored_bytes else 1.0}
@@ -0,0 +1,67 @@
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+upload_session_ttl = float(os.getenv("UPLOAD_SESSION_TTL", default=24 * 60 * 60))  # Seconds since the last part
+upload_session_sweep_interval = float(os.getenv("UPLOAD_SESSION_SWEEP_INTERVAL", default=10 * 60))  # Seconds
+
+# Part numbers a multipart upload may use, as in S3's multipart upload API
+MIN_PART_NUMBER = 1
+MAX_PART_NUMBER = 10000
+
+
+@dataclass
+class UploadPart:
+    """A part of a multipart upload that has been received"""
+    part_number: int
+    size: int
+    checksum: Optional[str] = None  # Only known when the part is uploaded
+
+
+@dataclass
+class UploadSession:
+    """A multipart upload that has been started but not yet completed"""
+    upload_id: str
+    file_name: Optional[str] = None
+    content_type: Optional[str] = None
+    parts: List[UploadPart] = field(default_factory=list)
+
+
+class AbstractPartWriter(ABC):
+    """Writes a part of a multipart upload as its chunks arrive, so that the part is only written to disk once.
+
+    A part is only stored once it is committed. Closing the writer without committing discards what was written.
+    """
+
+    @abstractmethod
+    def write(self, chunk: bytes):
+        """Abstract method to write the next chunk of the part.
+
+        Args:
+            chunk: Next chunk of the part, in order
+        """
+        pass
+
+    @abstractmethod
+    def commit(self) -> UploadPart:
+        """Abstract method to store the part once every chunk has been written, replacing any earlier copy.
+
+        Returns:
+            The part stored.
+        """
+        pass
+
+    @abstractmethod
+    def close(self):
+        """Abstract method to release the writer, discarding the part unless it was committed."""
+        pass
+
+    def __enter__(self) -> "AbstractPartWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
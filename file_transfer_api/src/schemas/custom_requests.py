@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class FileIds:
+    """Request model for operations on many files"""
+    file_ids: List[str]
+
+
+@dataclass
+class NewFileNames:
+    """Request model for renaming many files, with the new name of each file by file id"""
+    new_names: Dict[str, str]
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 
 @dataclass
@@ -10,14 +11,137 @@ class FileIdAndPath:
     file_path: Optional[Path] = None
 
 
+@dataclass
+class FileRecordDetails:
+    """Response model for the metadata of a file"""
+    file_id: str
+    name: str
+    content_type: str
+    size: int
+    checksum: Optional[str]
+    created_timestamp: datetime
+    last_modified_timestamp: datetime
+
+
+@dataclass
+class FileRecords:
+    """Response model for many file records, with the requested file ids that do not exist"""
+    files: List[FileRecordDetails]
+    missing: List[str]
+
+
+@dataclass
+class FileRecordPage:
+    """Response model for a page of the file listing, with the cursor of the next page if there is one"""
+    files: List[FileRecordDetails]
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class BulkOperationResult:
+    """Response model for an operation on many files"""
+    succeeded: int
+    missing: List[str]
+    failed: List[str]
+
+
+@dataclass
+class BatchUploadFileResult:
+    """Response model for one file of a batch upload"""
+    file_name: Optional[str]
+    status_code: int
+    file_id: Optional[str] = None
+    message: Optional[str] = None
+
+
+@dataclass
+class BatchUploadResult:
+    """Response model for a batch upload, with a result for each file in the order they were sent"""
+    uploaded: int
+    failed: int
+    files: List[BatchUploadFileResult]
+
+
+@dataclass
+class UploadId:
+    """Response model for a new multipart upload"""
+    upload_id: str
+
+
+@dataclass
+class UploadPartDetails:
+    """Response model for a part of a multipart upload"""
+    part_number: int
+    size: int
+    checksum: Optional[str] = None
+
+
+@dataclass
+class UploadStatus:
+    """Response model for the parts a multipart upload has received"""
+    upload_id: str
+    parts: List[UploadPartDetails]
+
+
 @dataclass
 class CustomMessage:
     """Response model for standard responses"""
     message: str
 
 
+@dataclass
+class DownloadResult:
+    """Response model for a file streamed to disk or a file object by the client"""
+    file_id: str
+    size: int
+    checksum: str
+    verified: bool  # Whether the checksum was checked against the one the API gave
+
+
 @dataclass
 class ErrorResponse:
     """Response model for standard responses"""
     status_code: int
     message: str
+
+
+@dataclass
+class PoolStatus:
+    """Response model for the status of the database connection pool"""
+    pool_size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiting: int
+
+
+@dataclass
+class BlobCacheStatus:
+    """Response model for the status of the in-memory blob cache"""
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    max_object_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+@dataclass
+class MetadataCacheStatus:
+    """Response model for the status of the file record cache"""
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+
+
+@dataclass
+class StorageStatus:
+    """Response model for the savings made by storing identical uploads once"""
+    blobs: int
+    references: int
+    logical_bytes: int
+    stored_bytes: int
+    bytes_saved: int
+    dedup_ratio: float
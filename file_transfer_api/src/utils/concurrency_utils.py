@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import inspect
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from dotenv import load_dotenv
+
+from src.database_manager.database_connection.local_database import DATABASE_MAX_OVERFLOW, DATABASE_POOL_SIZE
+
+load_dotenv()
+io_thread_pool_size = int(os.getenv("IO_THREAD_POOL_SIZE", default=16))
+
+T = TypeVar("T")
+
+# Bounded pool for blocking file system work so that slow transfers cannot starve the event loop
+io_executor = ThreadPoolExecutor(max_workers=io_thread_pool_size, thread_name_prefix="file-io")
+
+# One thread per pooled connection, as each request's database work holds a connection while it runs
+database_executor = ThreadPoolExecutor(max_workers=DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW,
+                                       thread_name_prefix="database")
+
+
+async def run_in_executor(executor: Executor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function in an executor without blocking the event loop.
+
+    Args:
+        executor: Executor to run the function in.
+        func: Blocking function to run.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_database_operation(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a database manager operation without blocking the event loop.
+
+    Operations of async database managers are awaited directly, while blocking ones run on the database executor.
+
+    Args:
+        func: Database manager method to run.
+        *args: Positional arguments for the method.
+        **kwargs: Keyword arguments for the method.
+
+    Returns:
+        The return value of the method.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await run_in_executor(database_executor, func, *args, **kwargs)
@@ -1,6 +1,23 @@
+import hashlib
+import time
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
 from src.api.api import app
+from src.api.utils.file_responses import ZeroCopyFileResponse
+from src.database_manager.database_connection.local_database import Base, MeteredQueuePool, get_db_session
+from src.database_manager.local_database_manager import LocalDatabaseManager
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.metadata_cache import metadata_cache
+from src.database_manager.write_behind_queue import WriteBehindQueue
+from src.exceptions.database_exceptions import DatabaseWriteError
+from src.exceptions.file_exceptions import FileUploadError
+from src.api.routers.fastapi_router import file_manager
+from src.file_manager.blob_cache import blob_cache
+from src.file_manager.compression import CompressionPolicy
 
 
 class TestAPI:
@@ -10,27 +27,57 @@ class TestAPI:
         data_dir, upload_dir, download_dir = file_system
         monkeypatch.setattr("src.file_manager.local_file_manager.upload_path", upload_dir)
         monkeypatch.setattr("src.file_manager.local_file_manager.download_path", download_dir)
+        monkeypatch.setattr("src.file_manager.local_file_manager.multipart_path", data_dir / "multipart")
+        monkeypatch.setattr("src.file_manager.local_file_manager.blob_path", data_dir / "blobs")
 
         yield
 
         # Unpatch all
         monkeypatch.undo()
+        blob_cache.clear()
 
     @pytest.fixture(autouse=True, scope="function")
-    def setup_database_manager(self, monkeypatch, test_db_session):
-        # monkeypatch.setattr("api.routers.fastapi_router.database_manager", test_db_manager)
-        monkeypatch.setattr("src.api.routers.fastapi_router.database_manager.db", test_db_session)
+    def setup_database_manager(self, monkeypatch, test_engine, test_db_session):
+        # The startup connection check opens its own session rather than going through the dependency
+        monkeypatch.setattr("src.api.routers.fastapi_router.SessionLocal", sessionmaker(bind=test_engine))
+        app.dependency_overrides[get_db_session] = lambda: test_db_session
 
         yield
 
-        # Unpatch all
-        monkeypatch.undo()
+        # Remove the override and forget the records of this test's database
+        app.dependency_overrides.clear()
+        metadata_cache.clear()
 
     @pytest.fixture(scope="function")
     def client(self):
         with TestClient(app) as client:
             yield client
 
+    @pytest.fixture(scope="function")
+    def pooled_engine(self, tmp_path, file_system):
+        # A pool of a single connection, with a file stored and recorded in its database
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool, pool_size=1,
+                               max_overflow=0, pool_timeout=0.1, pool_pre_ping=True,
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            LocalDatabaseManager(db=db).create_file_record(name="pooled.txt", file_id="pooled_id",
+                                                           content_type=ContentEnum.TEXT, size=9)
+        data_dir, upload_dir, download_dir = file_system
+        (upload_dir / "pooled_id").write_bytes(b"test data")
+
+        def get_pooled_db_session():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db_session] = get_pooled_db_session
+        yield engine
+        engine.dispose()
+
     @pytest.fixture(scope="function")
     def uploaded_file(self, client, file_system, test_database_entry):
         # Put a file in upload directory and write it to database and yield the file_id
@@ -45,6 +92,30 @@ class TestAPI:
         assert response.status_code == 200
         assert "message" in response.json()
 
+    # Get files endpoint
+    def test_list_files_endpoint_pages_through_files_with_cursor(self, client):
+        for size in [3, 1, 2]:
+            client.post("/files/", files={"file": (f"{size}.txt", b"x" * size, "text/plain")})
+
+        first_page = client.get("/files/", params={"sort_by": "size", "limit": 2}).json()
+        second_page = client.get("/files/", params={"sort_by": "size", "limit": 2,
+                                                     "cursor": first_page["next_cursor"]}).json()
+
+        assert [file["size"] for file in first_page["files"]] == [1, 2]
+        assert [file["size"] for file in second_page["files"]] == [3]
+        assert second_page["next_cursor"] is None
+
+    def test_list_files_endpoint_filters_by_content_type_and_size(self, client):
+        client.post("/files/", files={"file": ("small.txt", b"x", "text/plain")})
+        client.post("/files/", files={"file": ("large.txt", b"x" * 10, "text/plain")})
+
+        response = client.get("/files/", params={"content_type": "text", "min_size": 5})
+        assert [file["name"] for file in response.json()["files"]] == ["large.txt"]
+        assert client.get("/files/", params={"content_type": "image"}).json()["files"] == []
+
+    def test_list_files_endpoint_returns_400_when_cursor_is_invalid(self, client):
+        assert client.get("/files/", params={"cursor": "not a cursor"}).status_code == 400
+
     # Post file endpoint
     def test_post_file_endpoint_returns_200_and_file_id_and_path(self, client, temp_file, file_system):
         response = client.post(f"/files/", files={"file": open(temp_file, "rb")})
@@ -52,12 +123,128 @@ class TestAPI:
         assert "file_id" in response.json()
         assert "file_path" in response.json()
 
+    def test_post_file_endpoint_records_size_checksum_and_content_type(self, client, temp_file, test_db_session):
+        response = client.post(f"/files/", files={"file": ("test.txt", open(temp_file, "rb"), "text/plain")})
+
+        file_record = test_db_session.query(DatabaseEntry).filter(
+            DatabaseEntry.file_id == response.json()["file_id"]).first()
+        assert file_record.size == len(b"test data")
+        assert file_record.checksum == hashlib.sha256(b"test data").hexdigest()
+        assert file_record.content_type == ContentEnum.TEXT
+
     # Get files/{file_id} endpoint
     def test_get_file_endpoint_returns_200_and_file(self, client, uploaded_file):
         response = client.get(f"/files/{uploaded_file}")
         assert response.status_code == 200
         assert response.content == b"test data"
 
+    def test_get_file_endpoint_returns_connection_to_pool_before_sending_file(self, client, pooled_engine,
+                                                                              monkeypatch):
+        checked_out_while_sending = []
+
+        class RecordingFileResponse(ZeroCopyFileResponse):
+            async def __call__(self, scope, receive, send):
+                checked_out_while_sending.append(pooled_engine.pool.checkedout())
+                await super().__call__(scope, receive, send)
+
+        monkeypatch.setattr("src.api.routers.fastapi_router.ZeroCopyFileResponse", RecordingFileResponse)
+        response = client.get("/files/pooled_id")
+
+        assert response.content == b"test data"
+        assert checked_out_while_sending == [0]
+
+    def test_get_file_endpoint_does_not_check_out_connection_on_metadata_cache_hit(self, client, pooled_engine,
+                                                                                   monkeypatch):
+        # Go through the real session dependency rather than the test's override
+        app.dependency_overrides.pop(get_db_session)
+        monkeypatch.setattr("src.database_manager.database_connection.local_database.SessionLocal",
+                            sessionmaker(bind=pooled_engine))
+        client.get("/files/pooled_id")
+        checkouts = []
+        statements = []
+        event.listen(pooled_engine, "checkout", lambda *args: checkouts.append(args))
+        event.listen(pooled_engine, "before_cursor_execute", lambda *args: statements.append(args))
+
+        responses = [client.get("/files/pooled_id") for _ in range(10)]
+
+        assert [response.content for response in responses] == [b"test data"] * 10
+        assert checkouts == []
+        assert statements == []
+
+    def test_get_file_endpoint_returns_503_when_no_database_connection_is_free(self, client, pooled_engine):
+        with pooled_engine.connect():
+            response = client.get("/files/pooled_id")
+
+        assert response.status_code == 503
+        assert client.get("/files/pooled_id").status_code == 200
+
+    def test_get_file_endpoint_advertises_range_support(self, client, uploaded_file):
+        response = client.get(f"/files/{uploaded_file}")
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_get_file_endpoint_returns_206_and_requested_range(self, client, uploaded_file):
+        response = client.get(f"/files/{uploaded_file}", headers={"Range": "bytes=5-8"})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 5-8/9"
+        assert response.content == b"data"
+
+    def test_get_file_endpoint_returns_multipart_byteranges_for_multiple_ranges(self, client, uploaded_file):
+        response = client.get(f"/files/{uploaded_file}", headers={"Range": "bytes=0-3, -4"})
+        assert response.status_code == 206
+        assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+        assert int(response.headers["content-length"]) == len(response.content)
+        assert b"content-range: bytes 0-3/9\r\n\r\ntest\r\n" in response.content
+        assert b"content-range: bytes 5-8/9\r\n\r\ndata\r\n" in response.content
+
+    def test_get_file_endpoint_returns_416_when_range_is_not_satisfiable(self, client, uploaded_file):
+        response = client.get(f"/files/{uploaded_file}", headers={"Range": "bytes=100-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */9"
+
+    def test_get_file_endpoint_returns_whole_file_when_if_range_does_not_match(self, client, uploaded_file):
+        response = client.get(f"/files/{uploaded_file}", headers={"Range": "bytes=5-8", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert response.content == b"test data"
+
+    def test_get_file_endpoint_returns_checksum_etag_and_immutable_cache_control(self, client, uploaded_file,
+                                                                                 test_database_entry, test_db_session):
+        test_database_entry.checksum = hashlib.sha256(b"test data").hexdigest()
+        test_db_session.commit()
+
+        response = client.get(f"/files/{uploaded_file}")
+        assert response.headers["etag"] == f'"{test_database_entry.checksum}"'
+        assert "last-modified" in response.headers
+        assert "immutable" in response.headers["cache-control"]
+
+    def test_get_file_endpoint_returns_304_when_if_none_match_matches(self, client, uploaded_file):
+        etag = client.get(f"/files/{uploaded_file}").headers["etag"]
+
+        response = client.get(f"/files/{uploaded_file}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    def test_get_file_endpoint_returns_304_when_not_modified_since(self, client, uploaded_file):
+        last_modified = client.get(f"/files/{uploaded_file}").headers["last-modified"]
+
+        response = client.get(f"/files/{uploaded_file}", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+    def test_get_file_endpoint_keeps_last_modified_when_file_is_renamed(self, client, uploaded_file):
+        last_modified = client.get(f"/files/{uploaded_file}").headers["last-modified"]
+        time.sleep(1)  # HTTP dates have a resolution of a second
+        client.put(f"/files/{uploaded_file}", params={"new_file_name": "renamed.txt"})
+
+        response = client.get(f"/files/{uploaded_file}", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+        assert response.headers["last-modified"] == last_modified
+
+    def test_head_file_endpoint_returns_headers_without_body(self, client, uploaded_file):
+        response = client.head(f"/files/{uploaded_file}")
+        assert response.status_code == 200
+        assert response.headers["content-length"] == "9"
+        assert response.content == b""
+
     def test_get_file_endpoint_returns_404_when_file_does_not_exist(self, client):
         response = client.get(f"/files/nonexistent_file")
         assert response.status_code == 404
@@ -82,3 +269,246 @@ class TestAPI:
         response = client.delete(f"/files/nonexistent_file")
         assert response.status_code == 404
         assert "detail" in response.json()
+
+    # Get metrics/database-pool endpoint
+    def test_database_pool_metrics_endpoint_returns_200_and_pool_status(self, client):
+        response = client.get("/metrics/database-pool")
+        assert response.status_code == 200
+        assert set(response.json()) == {"pool_size", "checked_in", "checked_out", "overflow", "waiting"}
+
+    # Get metrics/blob-cache endpoint
+    def test_blob_cache_metrics_endpoint_counts_repeated_downloads_as_hits(self, client, uploaded_file):
+        client.get(f"/files/{uploaded_file}")
+        response = client.get(f"/files/{uploaded_file}")
+        assert response.content == b"test data"
+
+        stats = client.get("/metrics/blob-cache").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size_bytes"] == 9
+
+    def test_delete_file_endpoint_invalidates_blob_cache(self, client, uploaded_file):
+        client.get(f"/files/{uploaded_file}")
+        client.delete(f"/files/{uploaded_file}")
+
+        assert client.get("/metrics/blob-cache").json()["entries"] == 0
+
+    # Get metrics/metadata-cache endpoint
+    def test_repeated_downloads_are_answered_from_metadata_cache(self, client, uploaded_file):
+        client.get(f"/files/{uploaded_file}")
+        client.get(f"/files/{uploaded_file}")
+
+        stats = client.get("/metrics/metadata-cache").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    # Write-behind metadata writes
+    def test_write_behind_upload_is_committed_on_shutdown(self, monkeypatch, test_engine, test_db_session):
+        write_queue = WriteBehindQueue(session_factory=sessionmaker(bind=test_engine), flush_interval=60000)
+        monkeypatch.setattr("src.api.routers.fastapi_router.WRITE_BEHIND", True)
+        monkeypatch.setattr("src.api.routers.fastapi_router.write_behind_queue", write_queue)
+
+        with TestClient(app) as client:
+            file_id = client.post("/files/", files={"file": ("test.txt", b"test data")}).json()["file_id"]
+            assert test_db_session.query(DatabaseEntry).count() == 0
+            download_response = client.get(f"/files/{file_id}")
+
+        assert download_response.content == b"test data"
+        assert test_db_session.query(DatabaseEntry).filter_by(file_id=file_id).one().name == "test.txt"
+
+    def test_write_behind_durable_upload_is_committed_before_response(self, monkeypatch, test_engine,
+                                                                       test_db_session):
+        write_queue = WriteBehindQueue(session_factory=sessionmaker(bind=test_engine), flush_interval=60000)
+        monkeypatch.setattr("src.api.routers.fastapi_router.WRITE_BEHIND", True)
+        monkeypatch.setattr("src.api.routers.fastapi_router.write_behind_queue", write_queue)
+
+        with TestClient(app) as client:
+            response = client.post("/files/", files={"file": ("test.txt", b"test data")},
+                                   headers={"X-Durable-Write": "true"})
+            assert test_db_session.query(DatabaseEntry).filter_by(file_id=response.json()["file_id"]).count() == 1
+
+    # Multipart upload endpoints
+    def test_multipart_upload_endpoints_assemble_parts_and_create_record(self, client, test_db_session):
+        upload_id = client.post("/files/uploads", params={"file_name": "test.txt"}).json()["upload_id"]
+
+        part_response = client.put(f"/files/uploads/{upload_id}/parts/2", content=b" data")
+        client.put(f"/files/uploads/{upload_id}/parts/1", content=b"test")
+        status = client.get(f"/files/uploads/{upload_id}").json()
+        response = client.post(f"/files/uploads/{upload_id}/complete")
+
+        assert part_response.json() == {"part_number": 2, "size": 5,
+                                        "checksum": hashlib.sha256(b" data").hexdigest()}
+        assert status["parts"] == [{"part_number": 1, "size": 4, "checksum": hashlib.sha256(b"test").hexdigest()},
+                                   {"part_number": 2, "size": 5, "checksum": hashlib.sha256(b" data").hexdigest()}]
+        assert response.status_code == 200
+        file_record = test_db_session.query(DatabaseEntry).filter_by(file_id=response.json()["file_id"]).one()
+        assert (file_record.name, file_record.size) == ("test.txt", 9)
+        assert file_record.checksum == hashlib.sha256(b"test data").hexdigest()
+        assert client.get(f"/files/{file_record.file_id}").content == b"test data"
+
+    def test_complete_upload_endpoint_keeps_parts_when_record_cannot_be_created(self, client, file_system,
+                                                                                monkeypatch):
+        upload_id = client.post("/files/uploads", params={"file_name": "test.txt"}).json()["upload_id"]
+        client.put(f"/files/uploads/{upload_id}/parts/1", content=b"test data")
+
+        def failing_create_file_record(*args, **kwargs):
+            raise DatabaseWriteError("Failed to create file record")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(LocalDatabaseManager, "create_file_record", failing_create_file_record)
+            failed_response = client.post(f"/files/uploads/{upload_id}/complete")
+
+        assert failed_response.status_code == 500
+        # The assembled file is discarded, while the parts are kept to retry with
+        assert list(file_system[1].iterdir()) == []
+        assert len(client.get(f"/files/uploads/{upload_id}").json()["parts"]) == 1
+
+        response = client.post(f"/files/uploads/{upload_id}/complete")
+        assert response.status_code == 200
+        assert client.get(f"/files/{response.json()['file_id']}").content == b"test data"
+        assert client.get(f"/files/uploads/{upload_id}").status_code == 404
+
+    def test_complete_upload_endpoint_returns_400_when_parts_are_missing(self, client):
+        upload_id = client.post("/files/uploads").json()["upload_id"]
+        client.put(f"/files/uploads/{upload_id}/parts/2", content=b"test data")
+
+        response = client.post(f"/files/uploads/{upload_id}/complete")
+        assert response.status_code == 400
+
+    def test_upload_endpoints_return_404_when_session_does_not_exist(self, client):
+        assert client.put("/files/uploads/nonexistent_upload/parts/1", content=b"test data").status_code == 404
+        assert client.get("/files/uploads/nonexistent_upload").status_code == 404
+        assert client.delete("/files/uploads/nonexistent_upload").status_code == 404
+
+    def test_abort_upload_endpoint_returns_200(self, client):
+        upload_id = client.post("/files/uploads").json()["upload_id"]
+
+        assert client.delete(f"/files/uploads/{upload_id}").status_code == 200
+        assert client.get(f"/files/uploads/{upload_id}").status_code == 404
+
+    # Post files/bulk endpoints
+    def test_bulk_get_endpoint_returns_existing_records_and_missing_ids(self, client, uploaded_file):
+        response = client.post("/files/bulk/get", json={"file_ids": [uploaded_file, "missing_id"]})
+
+        assert response.status_code == 200
+        assert [file["file_id"] for file in response.json()["files"]] == [uploaded_file]
+        assert response.json()["missing"] == ["missing_id"]
+
+    def test_bulk_rename_endpoint_renames_existing_files(self, client, uploaded_file, test_db_session):
+        response = client.post("/files/bulk/rename",
+                               json={"new_names": {uploaded_file: "new_name", "missing_id": "other_name"}})
+
+        assert response.json() == {"succeeded": 1, "missing": ["missing_id"], "failed": []}
+        assert test_db_session.query(DatabaseEntry).filter_by(file_id=uploaded_file).one().name == "new_name"
+
+    def test_bulk_delete_endpoint_deletes_files_and_records(self, client, uploaded_file, file_system):
+        response = client.post("/files/bulk/delete", json={"file_ids": [uploaded_file, "missing_id"]})
+
+        assert response.json() == {"succeeded": 1, "missing": ["missing_id"], "failed": []}
+        assert list(file_system[1].iterdir()) == []
+        assert client.get(f"/files/{uploaded_file}").status_code == 404
+
+    # Post files/batch endpoint
+    def test_batch_upload_endpoint_stores_every_file_and_creates_records(self, client, test_db_session):
+        files = [("files", ("first.txt", b"first file", "text/plain")),
+                 ("files", ("second.txt", b"second file", "text/plain"))]
+        response = client.post("/files/batch", files=files)
+
+        assert response.status_code == 200
+        assert (response.json()["uploaded"], response.json()["failed"]) == (2, 0)
+        results = response.json()["files"]
+        assert [result["file_name"] for result in results] == ["first.txt", "second.txt"]
+        assert [client.get(f"/files/{result['file_id']}").content for result in results] == [b"first file",
+                                                                                              b"second file"]
+        assert test_db_session.query(DatabaseEntry).count() == 2
+
+    def test_batch_upload_endpoint_returns_400_when_no_files_are_sent(self, client):
+        response = client.post("/files/batch", data={"files": "not a file"})
+        assert response.status_code == 400
+
+    def test_batch_upload_endpoint_discards_files_when_records_cannot_be_created(self, client, file_system,
+                                                                                 monkeypatch):
+        def failing_bulk_create_file_records(*args, **kwargs):
+            raise DatabaseWriteError("Failed to create file records")
+
+        monkeypatch.setattr(LocalDatabaseManager, "bulk_create_file_records", failing_bulk_create_file_records)
+        response = client.post("/files/batch", files=[("files", ("test.txt", b"test data", "text/plain"))])
+
+        assert response.json()["failed"] == 1
+        assert response.json()["files"][0]["status_code"] == 500
+        assert list(file_system[1].iterdir()) == []
+
+    # Get metrics/storage endpoint
+    def test_storage_metrics_endpoint_reports_bytes_saved_by_deduplication(self, client, temp_file):
+        file_ids = []
+        for _ in range(2):
+            with open(temp_file, "rb") as f:
+                file_ids.append(client.post("/files", files={"file": ("test.txt", f)}).json()["file_id"])
+
+        stats = client.get("/metrics/storage").json()
+        assert (stats["blobs"], stats["references"], stats["bytes_saved"]) == (1, 2, 9)
+
+        for file_id in file_ids:
+            client.delete(f"/files/{file_id}")
+        assert client.get("/metrics/storage").json()["blobs"] == 0
+
+    # Compression at rest
+    @pytest.fixture(scope="function")
+    def compressed_file(self, client, monkeypatch):
+        policy = CompressionPolicy(algorithm="gzip", content_types=[ContentEnum.TEXT], min_size=0)
+        monkeypatch.setattr(file_manager.file_manager, "compression_policy", policy)
+        response = client.post("/files", files={"file": ("test.txt", b"test data\n" * 1000, "text/plain")})
+        yield response.json()["file_id"]
+
+    def test_post_file_endpoint_records_original_and_stored_size(self, client, compressed_file, test_db_session):
+        file_record = test_db_session.query(DatabaseEntry).filter_by(file_id=compressed_file).one()
+
+        assert file_record.size == 10000
+        assert file_record.stored_size < file_record.size
+        assert file_record.content_encoding == "gzip"
+
+    def test_get_file_endpoint_sends_compressed_file_as_is_when_client_accepts_encoding(self, client,
+                                                                                        compressed_file):
+        response = client.get(f"/files/{compressed_file}", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < 10000
+        assert response.content == b"test data\n" * 1000
+
+    def test_get_file_endpoint_decompresses_file_when_client_does_not_accept_encoding(self, client,
+                                                                                      compressed_file):
+        response = client.get(f"/files/{compressed_file}", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-length"] == "10000"
+        assert response.content == b"test data\n" * 1000
+
+        etag = response.headers["etag"]
+        response = client.get(f"/files/{compressed_file}", headers={"Accept-Encoding": "identity",
+                                                                     "If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_post_file_endpoint_does_not_compress_already_compressed_file(self, client, monkeypatch,
+                                                                          test_db_session):
+        policy = CompressionPolicy(algorithm="gzip", content_types=[ContentEnum.APPLICATION], min_size=0)
+        monkeypatch.setattr(file_manager.file_manager, "compression_policy", policy)
+
+        # Compressible content, but sniffed as a zip archive
+        response = client.post("/files", files={"file": ("test.zip", b"PK\x03\x04" + b"test data\n" * 1000,
+                                                          "application/zip")})
+
+        file_record = test_db_session.query(DatabaseEntry).filter_by(file_id=response.json()["file_id"]).one()
+        assert file_record.content_encoding is None
+        assert file_record.stored_size == file_record.size
+
+    def test_post_file_endpoint_discards_file_when_compression_fails(self, client, file_system, monkeypatch):
+        def failing_compress_file(*args, **kwargs):
+            raise FileUploadError("Failed to compress file")
+
+        monkeypatch.setattr(file_manager.file_manager, "compress_file", failing_compress_file)
+        response = client.post("/files", files={"file": ("test.txt", b"test data", "text/plain")})
+
+        assert response.status_code == 500
+        assert list(file_system[1].iterdir()) == []
+        assert client.get("/metrics/storage").json()["blobs"] == 0
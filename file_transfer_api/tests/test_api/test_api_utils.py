@@ -0,0 +1,18 @@
+import pytest
+
+from src.api.utils.api_utils import accepts_content_encoding
+
+
+class TestApiUtils:
+
+    @pytest.mark.parametrize("accept_encoding, accepted", [
+        (None, False),
+        ("gzip", True),
+        ("deflate, GZIP;q=0.5", True),
+        ("gzip;q=0", False),
+        ("*", True),
+        ("*, gzip;q=0", False),
+        ("identity", False),
+    ])
+    def test_accepts_content_encoding_honours_quality_values(self, accept_encoding, accepted):
+        assert accepts_content_encoding(accept_encoding, "gzip") == accepted
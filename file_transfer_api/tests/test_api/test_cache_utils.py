@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.api.utils.cache_utils import format_http_date, get_cache_headers, is_not_modified
+from src.database_manager.schemas.database_entry import DatabaseEntry
+
+LAST_MODIFIED = "Fri, 01 Jan 2021 00:00:00 GMT"
+
+
+class TestCacheUtils:
+
+    def test_get_cache_headers_uses_checksum_as_strong_etag(self):
+        file_record = DatabaseEntry(checksum="abc123",
+                                    created_timestamp=datetime(2021, 1, 1, tzinfo=timezone.utc))
+
+        headers = get_cache_headers(file_record)
+
+        assert headers["etag"] == '"abc123"'
+        assert headers["last-modified"] == LAST_MODIFIED
+        assert "immutable" in headers["cache-control"]
+
+    def test_get_cache_headers_takes_last_modified_from_upload_time_not_rename_time(self):
+        file_record = DatabaseEntry(checksum="abc123", created_timestamp=datetime(2021, 1, 1, tzinfo=timezone.utc),
+                                    last_modified_timestamp=datetime(2022, 1, 1, tzinfo=timezone.utc))
+
+        assert get_cache_headers(file_record)["last-modified"] == LAST_MODIFIED
+
+    def test_get_cache_headers_leaves_out_etag_when_checksum_is_unknown(self):
+        file_record = DatabaseEntry(created_timestamp=datetime(2021, 1, 1, tzinfo=timezone.utc))
+        assert "etag" not in get_cache_headers(file_record)
+
+    def test_get_cache_headers_describes_compressed_representation(self):
+        file_record = DatabaseEntry(checksum="abc123", content_encoding="gzip",
+                                    created_timestamp=datetime(2021, 1, 1, tzinfo=timezone.utc))
+
+        encoded_headers = get_cache_headers(file_record, "gzip")
+        decoded_headers = get_cache_headers(file_record)
+
+        assert encoded_headers["etag"] == '"abc123-gzip"'
+        assert encoded_headers["content-encoding"] == "gzip"
+        assert decoded_headers["etag"] == '"abc123"'
+        assert "content-encoding" not in decoded_headers
+        assert encoded_headers["vary"] == decoded_headers["vary"] == "Accept-Encoding"
+
+    def test_format_http_date_drops_microseconds(self):
+        assert format_http_date(datetime(2021, 1, 1, 0, 0, 0, 999, tzinfo=timezone.utc)) == LAST_MODIFIED
+
+    @pytest.mark.parametrize("if_none_match, if_modified_since, not_modified", [
+        (None, None, False),
+        ('"abc123"', None, True),
+        ('"other", W/"abc123"', None, True),
+        ("*", None, True),
+        ('"other"', LAST_MODIFIED, False),
+        (None, LAST_MODIFIED, True),
+        (None, "Sat, 02 Jan 2021 00:00:00 GMT", True),
+        (None, "Thu, 31 Dec 2020 00:00:00 GMT", False),
+        (None, "not a date", False),
+    ])
+    def test_is_not_modified_checks_if_none_match_before_if_modified_since(self, if_none_match, if_modified_since,
+                                                                           not_modified):
+        assert is_not_modified(if_none_match, if_modified_since, '"abc123"', LAST_MODIFIED) == not_modified
@@ -0,0 +1,84 @@
+import asyncio
+import os
+
+import pytest
+
+from src.api.utils.file_responses import PATHSEND_EXTENSION, ZEROCOPYSEND_EXTENSION, ZeroCopyFileResponse
+from src.file_manager.blob_cache import CachedBlob
+
+
+def call_response(response, extensions, headers=None):
+    """Call an ASGI response with the given server extensions and request headers and return the messages it sends"""
+    messages = []
+    scope = {"type": "http", "method": "GET", "extensions": extensions,
+             "headers": [(key.encode(), value.encode()) for key, value in (headers or {}).items()]}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == ZEROCOPYSEND_EXTENSION:
+            # The file is closed once the server has sent it, so read the part to send while it is open
+            message["file"].seek(message.get("offset", 0))
+            message = {**message, "file": message["file"].read(message["count"])}
+        messages.append(message)
+
+    asyncio.run(response(scope, receive, send))
+    return messages
+
+
+class TestZeroCopyFileResponse:
+
+    def test_response_hands_path_to_server_that_supports_pathsend(self, temp_file):
+        messages = call_response(ZeroCopyFileResponse(temp_file), {PATHSEND_EXTENSION: {}})
+
+        assert messages[0]["status"] == 200
+        assert messages[1] == {"type": PATHSEND_EXTENSION, "path": temp_file}
+
+    def test_response_hands_file_to_server_that_supports_zerocopysend(self, temp_file):
+        messages = call_response(ZeroCopyFileResponse(temp_file), {ZEROCOPYSEND_EXTENSION: {}})
+
+        assert messages[1] == {"type": ZEROCOPYSEND_EXTENSION, "file": b"test data", "count": 9}
+
+    @pytest.mark.parametrize("extensions", [{}, None])
+    def test_response_streams_file_when_server_does_not_support_sendfile(self, temp_file, extensions):
+        messages = call_response(ZeroCopyFileResponse(temp_file), extensions)
+
+        assert b"".join(message.get("body", b"") for message in messages[1:]) == b"test data"
+
+    def test_response_hands_range_of_file_to_server_that_supports_zerocopysend(self, temp_file):
+        messages = call_response(ZeroCopyFileResponse(temp_file), {ZEROCOPYSEND_EXTENSION: {}}, {"range": "bytes=5-"})
+
+        assert messages[0]["status"] == 206
+        assert messages[1] == {"type": ZEROCOPYSEND_EXTENSION, "file": b"data", "count": 4, "offset": 5}
+
+    def test_response_marks_its_own_etag_weak(self, temp_file):
+        messages = call_response(ZeroCopyFileResponse(temp_file), {})
+
+        assert dict(messages[0]["headers"])[b"etag"].startswith(b'W/"')
+
+    def test_response_keeps_etag_it_is_given(self, temp_file):
+        messages = call_response(ZeroCopyFileResponse(temp_file, headers={"etag": '"abc123"'}), {})
+
+        assert dict(messages[0]["headers"])[b"etag"] == b'"abc123"'
+
+    def test_response_sends_cached_blob_from_memory(self, temp_file):
+        cached_blob = CachedBlob(content=b"test data", stat_result=os.stat(temp_file))
+        os.remove(temp_file)
+
+        messages = call_response(ZeroCopyFileResponse(temp_file, cached_blob=cached_blob), {PATHSEND_EXTENSION: {}})
+
+        assert messages[0]["status"] == 200
+        assert (b"content-length", b"9") in messages[0]["headers"]
+        assert messages[1] == {"type": "http.response.body", "body": b"test data", "more_body": False}
+
+    def test_response_sends_ranges_of_cached_blob_from_memory(self, temp_file):
+        cached_blob = CachedBlob(content=b"test data", stat_result=os.stat(temp_file))
+        os.remove(temp_file)
+
+        messages = call_response(ZeroCopyFileResponse(temp_file, cached_blob=cached_blob), {},
+                                 {"range": "bytes=0-3,5-8"})
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+
+        assert messages[0]["status"] == 206
+        assert b"\r\n\r\ntest\r\n" in body and b"\r\n\r\ndata\r\n" in body
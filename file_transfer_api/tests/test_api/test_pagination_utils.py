@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from src.api.utils.pagination_utils import decode_cursor, encode_cursor
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.exceptions.database_exceptions import InvalidPageCursorError
+
+
+class TestPaginationUtils:
+
+    @pytest.mark.parametrize("sort_by, value", [("created_timestamp", datetime(2021, 1, 1, 12, 30)),
+                                                ("name", "test_name"),
+                                                ("size", 9)])
+    def test_decode_cursor_returns_position_encoded(self, sort_by, value):
+        file_record = DatabaseEntry(file_id="test_id", **{sort_by: value})
+
+        assert decode_cursor(encode_cursor(file_record, sort_by), sort_by) == (value, "test_id")
+
+    @pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(DatabaseEntry(file_id="id", size=1), "size")])
+    def test_decode_cursor_rejects_invalid_cursor_or_other_sort_column(self, cursor):
+        with pytest.raises(InvalidPageCursorError):
+            decode_cursor(cursor, "name")
@@ -0,0 +1,43 @@
+import pytest
+
+from src.api.utils.range_utils import if_range_matches, parse_range_header
+from src.exceptions.file_exceptions import FileRangeNotSatisfiableError
+
+LAST_MODIFIED = "Fri, 01 Jan 2021 00:00:00 GMT"
+
+
+class TestRangeUtils:
+
+    @pytest.mark.parametrize("range_header, ranges", [
+        ("bytes=0-3", [(0, 3)]),
+        ("bytes=5-", [(5, 8)]),
+        ("bytes=-4", [(5, 8)]),
+        ("bytes=-100", [(0, 8)]),
+        ("bytes=2-100", [(2, 8)]),
+        ("bytes=0-1, 6-7", [(0, 1), (6, 7)]),
+        ("bytes=4-6, 0-2, 2-3", [(0, 6)]),
+        ("bytes=0-1, 20-30", [(0, 1)]),
+    ])
+    def test_parse_range_header_returns_requested_ranges(self, range_header, ranges):
+        assert parse_range_header(range_header, 9) == ranges
+
+    @pytest.mark.parametrize("range_header", [None, "", "items=0-3", "bytes=", "bytes=a-b", "bytes=4-2", "bytes=-"])
+    def test_parse_range_header_ignores_invalid_headers(self, range_header):
+        assert parse_range_header(range_header, 9) is None
+
+    @pytest.mark.parametrize("range_header", ["bytes=9-", "bytes=20-30, 40-", "bytes=-0"])
+    def test_parse_range_header_raises_error_when_no_range_overlaps_file(self, range_header):
+        with pytest.raises(FileRangeNotSatisfiableError):
+            parse_range_header(range_header, 9)
+
+    @pytest.mark.parametrize("if_range_header, matches", [
+        (None, True),
+        ('"etag"', True),
+        ('"other"', False),
+        ('W/"etag"', False),
+        (LAST_MODIFIED, True),
+        ("Sat, 02 Jan 2021 00:00:00 GMT", False),
+        ("not a date", False),
+    ])
+    def test_if_range_matches_compares_etag_and_last_modified(self, if_range_header, matches):
+        assert if_range_matches(if_range_header, '"etag"', LAST_MODIFIED) == matches
@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import httpx
+import pytest
+
+from src.client.async_client import AsyncAPIClient
+from src.client.upload_utils import UploadStream
+from src.schemas.custom_responses import BulkOperationResult, DownloadResult, ErrorResponse, FileIdAndPath
+
+base_url = "http://test_url"
+
+
+class TestAsyncAPIClient:
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.uploads = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.temp_dir = temp_dir
+            self.error_logger_path = os.path.join(temp_dir, "errors.log")
+            yield
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        # Track the transfers in flight, holding each one long enough for the others to start
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        if request.url.path == "/files/" and request.method == "POST":
+            self.uploads.append(request)
+            file_name = request.read().split(b'filename="')[1].split(b'"')[0].decode()
+            return httpx.Response(200, json={"file_id": file_name, "file_path": file_name})
+        if request.url.path == "/files/bulk/delete":
+            file_ids = json.loads(request.read())["file_ids"]
+            return httpx.Response(200, json={"succeeded": len(file_ids), "missing": [], "failed": []})
+        if request.url.path == "/files/unreachable":
+            raise httpx.ConnectError("Connection refused", request=request)
+        if request.url.path == "/files/streamed":
+            content = b"test data " * 1000
+            return httpx.Response(200, content=content, headers={"ETag": f'"{hashlib.sha256(content).hexdigest()}"'})
+        if request.url.path == "/files/unchecked":
+            # Files stored without a checksum are sent an entity tag that is not a digest of their content
+            return httpx.Response(200, content=b"test data", headers={"ETag": 'W/"1700000000.0-9"'})
+        if request.url.path == "/files/missing":
+            return httpx.Response(404, json={"detail": "File Not Found"})
+        return httpx.Response(200, content=request.url.path.encode())
+
+    def get_client(self) -> AsyncAPIClient:
+        return AsyncAPIClient(base_url=base_url, error_logger_path=self.error_logger_path,
+                              transport=httpx.MockTransport(self.handler))
+
+    def test_upload_many_returns_result_for_each_file_in_order(self):
+        file_paths = []
+        for index in range(10):
+            file_paths.append(os.path.join(self.temp_dir, f"{index}.txt"))
+            with open(file_paths[-1], "wb") as f:
+                f.write(b"test data")
+        file_paths.append(os.path.join(self.temp_dir, "missing.txt"))
+
+        async def upload():
+            async with self.get_client() as client:
+                return await client.upload_many(file_paths, concurrency=3)
+
+        results = asyncio.run(upload())
+
+        assert results[:10] == [FileIdAndPath(file_id=f"{index}.txt", file_path=f"{index}.txt") for index in range(10)]
+        assert results[10].status_code == 404
+        assert self.most_in_flight == 3
+
+    def test_download_many_returns_content_or_error_for_each_file(self):
+        async def download():
+            async with self.get_client() as client:
+                return await client.download_many(["file_1", "missing", "unreachable"])
+
+        results = asyncio.run(download())
+
+        assert results[0] == b"/files/file_1"
+        assert results[1] == ErrorResponse(status_code=404, message="File Not Found")
+        assert results[2].status_code == 503
+
+    def test_download_many_to_streams_each_file_to_its_destination(self):
+        destinations = {"streamed": os.path.join(self.temp_dir, "streamed.txt"),
+                        "missing": os.path.join(self.temp_dir, "missing.txt")}
+
+        async def download():
+            async with self.get_client() as client:
+                return await client.download_many_to(destinations)
+
+        results = asyncio.run(download())
+
+        content = b"test data " * 1000
+        assert results[0] == DownloadResult(file_id="streamed", size=len(content),
+                                            checksum=hashlib.sha256(content).hexdigest(), verified=True)
+        assert results[1] == ErrorResponse(status_code=404, message="File Not Found")
+        with open(destinations["streamed"], "rb") as f:
+            assert f.read() == content
+        assert not os.path.exists(destinations["missing"])
+
+    def test_upload_file_streams_form_body_read_off_the_event_loop(self, monkeypatch):
+        file_path = os.path.join(self.temp_dir, "upload.txt")
+        with open(file_path, "wb") as f:
+            f.write(b"test data " * 1000)
+        reading_threads = set()
+        read = UploadStream.read
+
+        def tracking_read(stream, size=-1):
+            reading_threads.add(threading.get_ident())
+            return read(stream, size)
+
+        monkeypatch.setattr(UploadStream, "read", tracking_read)
+
+        async def upload():
+            async with self.get_client() as client:
+                return await client.upload_file(file_path)
+
+        assert asyncio.run(upload()) == FileIdAndPath(file_id="upload.txt", file_path="upload.txt")
+        request = self.uploads[0]
+        assert request.headers["content-length"] == str(len(request.content))
+        assert request.headers["content-type"].startswith("multipart/form-data; boundary=")
+        assert b"test data " * 1000 in request.content
+        assert reading_threads and threading.get_ident() not in reading_threads
+
+    def test_delete_files_returns_bulk_operation_result(self):
+        async def delete():
+            async with self.get_client() as client:
+                return await client.delete_files(["file_1", "file_2"])
+
+        assert asyncio.run(delete()) == BulkOperationResult(succeeded=2, missing=[], failed=[])
+
+    def test_download_file_to_streams_file_to_path_and_verifies_checksum(self):
+        file_path = os.path.join(self.temp_dir, "streamed.txt")
+
+        async def download():
+            async with self.get_client() as client:
+                return await client.download_file_to("streamed", file_path, chunk_size=4096)
+
+        content = b"test data " * 1000
+        assert asyncio.run(download()) == DownloadResult(file_id="streamed", size=len(content),
+                                                         checksum=hashlib.sha256(content).hexdigest(), verified=True)
+        with open(file_path, "rb") as f:
+            assert f.read() == content
+
+    def test_download_file_to_does_not_verify_entity_tag_that_is_not_a_checksum(self):
+        file_path = os.path.join(self.temp_dir, "unchecked.txt")
+
+        async def download():
+            async with self.get_client() as client:
+                return await client.download_file_to("unchecked", file_path)
+
+        assert asyncio.run(download()) == DownloadResult(file_id="unchecked", size=9,
+                                                         checksum=hashlib.sha256(b"test data").hexdigest(),
+                                                         verified=False)
@@ -1,11 +1,16 @@
+import hashlib
+import io
+import json
 import os
 import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 import requests_mock
 
 from src.client.client import APIClient
-from src.schemas.custom_responses import FileIdAndPath, ErrorResponse
+from src.schemas.custom_responses import BulkOperationResult, DownloadResult, FileIdAndPath, ErrorResponse
 
 base_url = "http://test_url"   # "http://127.0.0.1:8000"
 
@@ -35,11 +40,20 @@ class TestAPIClient:
                       json={"file_id": "test_file_id", "file_path": "test_file_path"})
                 m.delete(f"{base_url}/files/test_file_id",
                          json={"file_id": "test_file_id", "file_path": "test_file_path"})
+                m.post(f"{base_url}/files/bulk/get",
+                       json={"files": [{"file_id": "test_file_id", "name": "test_name", "content_type": "text",
+                                        "size": 9, "checksum": None,
+                                        "created_timestamp": "2021-01-01T00:00:00",
+                                        "last_modified_timestamp": "2021-01-01T00:00:00"}],
+                             "missing": ["missing_file_id"]})
+                m.post(f"{base_url}/files/bulk/delete",
+                       json={"succeeded": 1, "missing": ["missing_file_id"], "failed": []})
             else:
                 m.post(f"{base_url}/files", status_code=500, json={"detail": "File Upload Failed"})
                 m.get(f"{base_url}/files/test_file_id", status_code=500, json={"detail": "File Download Failed"})
                 m.put(f"{base_url}/files/test_file_id", status_code=500, json={"detail": "File Rename Failed"})
                 m.delete(f"{base_url}/files/test_file_id", status_code=500, json={"detail": "File Delete Failed"})
+                m.post(f"{base_url}/files/bulk/delete", status_code=500, json={"detail": "Bulk Delete Failed"})
 
             temp_log_file = tempfile.NamedTemporaryFile(delete=False)
             self.error_logger_path = temp_log_file.name
@@ -136,3 +150,387 @@ class TestAPIClient:
 
         assert response == ErrorResponse(status_code=500, message="File Delete Failed")
         assert self.is_content_in_log_file("Error")
+
+    @pytest.mark.parametrize("api_client", ["success"], indirect=True)
+    def test_get_file_records_returns_file_records_when_successful(self, api_client):
+        response = api_client.get_file_records(["test_file_id", "missing_file_id"])
+
+        assert [file.file_id for file in response.files] == ["test_file_id"]
+        assert response.files[0].created_timestamp.year == 2021
+        assert response.missing == ["missing_file_id"]
+
+    @pytest.mark.parametrize("api_client", ["success"], indirect=True)
+    def test_delete_files_returns_bulk_operation_result_when_successful(self, api_client):
+        response = api_client.delete_files(["test_file_id", "missing_file_id"])
+
+        assert response == BulkOperationResult(succeeded=1, missing=["missing_file_id"], failed=[])
+
+    @pytest.mark.parametrize("api_client", ["error"], indirect=True)
+    def test_delete_files_returns_error_response_when_bulk_delete_fails(self, api_client):
+        response = api_client.delete_files(["test_file_id"])
+
+        assert response == ErrorResponse(status_code=500, message="Bulk Delete Failed")
+        assert self.is_content_in_log_file("Error")
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Request handler that answers every other request with a 503, counting the requests and connections it gets."""
+    requests_received = 0
+    connections = set()
+
+    def respond(self):
+        FlakyHandler.requests_received += 1
+        FlakyHandler.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = 503 if FlakyHandler.requests_received % 2 else 200
+        body = b'{"detail": "Service Unavailable"}' if status == 503 else b"test data"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClientSession:
+    @pytest.fixture(scope="function")
+    def server_url(self):
+        FlakyHandler.requests_received = 0
+        FlakyHandler.connections = set()
+        FlakyHandler.protocol_version = "HTTP/1.1"  # Keep connections alive
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_port}"
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture(scope="function")
+    def error_logger_path(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield os.path.join(temp_dir, "errors.log")
+
+    def test_idempotent_requests_are_retried_over_one_connection(self, server_url, error_logger_path):
+        with APIClient(base_url=server_url, error_logger_path=error_logger_path, backoff_factor=0,
+                       backoff_jitter=0) as api_client:
+            responses = [api_client.download_file("test_file_id") for _ in range(3)]
+
+        assert responses == [b"test data"] * 3
+        assert FlakyHandler.requests_received == 6
+        assert len(FlakyHandler.connections) == 1
+
+    def test_uploads_are_not_retried(self, server_url, error_logger_path, monkeypatch):
+        monkeypatch.setattr("builtins.open", lambda *args, **kwargs: MockOpen(b"test_data"))
+        with APIClient(base_url=server_url, error_logger_path=error_logger_path, backoff_factor=0,
+                       backoff_jitter=0) as api_client:
+            response = api_client.upload_file("test_file_path")
+        monkeypatch.undo()
+
+        assert response == ErrorResponse(status_code=503, message="Service Unavailable")
+        assert FlakyHandler.requests_received == 1
+
+
+class TestAPIClientStreamingDownload:
+    content = b"test data " * 1000
+    checksum = hashlib.sha256(content).hexdigest()
+
+    @pytest.fixture(scope="function")
+    def api_client(self, tmp_path):
+        with requests_mock.Mocker() as m:
+            m.get(f"{base_url}/files/test_file_id", content=self.content, headers={"ETag": f'"{self.checksum}"'})
+            m.get(f"{base_url}/files/corrupt_file_id", content=self.content[:-1],
+                  headers={"ETag": f'"{self.checksum}"'})
+            m.get(f"{base_url}/files/missing_file_id", status_code=404, json={"detail": "File Not Found"})
+            # Files stored without a checksum are sent an entity tag that is not a digest of their content
+            m.get(f"{base_url}/files/unchecked_file_id", content=self.content,
+                  headers={"ETag": f'W/"{hashlib.md5(b"1700000000.0-10000").hexdigest()}"'})
+            m.get(f"{base_url}/files/md5_etag_file_id", content=self.content,
+                  headers={"ETag": f'"{hashlib.md5(b"1700000000.0-10000").hexdigest()}"'})
+            yield APIClient(base_url=base_url, error_logger_path=str(tmp_path / "errors.log"))
+
+    def test_download_file_to_writes_file_in_chunks_and_verifies_checksum(self, api_client, tmp_path):
+        progress = []
+        response = api_client.download_file_to("test_file_id", tmp_path / "file.txt", chunk_size=4096,
+                                               progress=lambda written, total: progress.append(written))
+
+        assert response == DownloadResult(file_id="test_file_id", size=len(self.content), checksum=self.checksum,
+                                          verified=True)
+        assert (tmp_path / "file.txt").read_bytes() == self.content
+        assert progress == [4096, 8192, len(self.content)]
+        assert not (tmp_path / "file.txt.part").exists()
+
+    def test_download_file_to_writes_into_file_object(self, api_client):
+        buffer = io.BytesIO()
+        response = api_client.download_file_to("test_file_id", buffer)
+
+        assert response.verified
+        assert buffer.getvalue() == self.content
+
+    def test_download_file_to_discards_file_when_checksum_does_not_match(self, api_client, tmp_path):
+        response = api_client.download_file_to("corrupt_file_id", tmp_path / "file.txt")
+
+        assert response.status_code == 502
+        assert list(tmp_path.glob("file.txt*")) == []
+
+    @pytest.mark.parametrize("file_id", ["unchecked_file_id", "md5_etag_file_id"])
+    def test_download_file_to_does_not_verify_entity_tag_that_is_not_a_checksum(self, api_client, tmp_path, file_id):
+        response = api_client.download_file_to(file_id, tmp_path / "file.txt")
+
+        assert response == DownloadResult(file_id=file_id, size=len(self.content), checksum=self.checksum,
+                                          verified=False)
+        assert (tmp_path / "file.txt").read_bytes() == self.content
+
+    def test_download_file_to_returns_error_response_when_file_download_fails(self, api_client, tmp_path):
+        response = api_client.download_file_to("missing_file_id", tmp_path / "file.txt")
+
+        assert response == ErrorResponse(status_code=404, message="File Not Found")
+        assert list(tmp_path.glob("file.txt*")) == []
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Request handler that serves one file with Range support, recording the ranges requested. The first response to
+    each range in drop_ranges is cut off half way. Ranges are only sent while If-Range matches the strong entity tag
+    or the Last-Modified date."""
+    content = bytes(range(256)) * 16 * 1024
+    etag = f'"{hashlib.sha256(content).hexdigest()}"'
+    last_modified = "Tue, 14 Nov 2023 22:13:20 GMT"
+    accept_ranges = True
+    ranges_requested = []
+    drop_ranges = set()
+
+    def do_HEAD(self):
+        self.send_headers(200, len(self.content))
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if_range_matches = if_range is None or (if_range == self.etag and not if_range.startswith("W/")) or \
+            if_range == self.last_modified
+        if not self.accept_ranges or range_header is None or not if_range_matches:
+            self.send_headers(200, len(self.content))
+            self.wfile.write(self.content)
+            return
+        start, end = (int(bound) for bound in range_header.removeprefix("bytes=").split("-"))
+        RangeHandler.ranges_requested.append((start, end))
+        body = self.content[start:end + 1]
+        self.send_headers(206, len(body))
+        if (start, end) in RangeHandler.drop_ranges:
+            RangeHandler.drop_ranges.discard((start, end))
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def send_headers(self, status, length):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", self.last_modified)
+        self.send_header("Accept-Ranges", "bytes" if self.accept_ranges else "none")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClientParallelDownload:
+    @pytest.fixture(scope="function")
+    def api_client(self, tmp_path):
+        RangeHandler.etag = f'"{hashlib.sha256(RangeHandler.content).hexdigest()}"'
+        RangeHandler.accept_ranges = True
+        RangeHandler.ranges_requested = []
+        RangeHandler.drop_ranges = set()
+        RangeHandler.protocol_version = "HTTP/1.1"
+        server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        with APIClient(base_url=f"http://127.0.0.1:{server.server_port}",
+                       error_logger_path=str(tmp_path / "errors.log")) as api_client:
+            yield api_client
+        server.shutdown()
+        server.server_close()
+
+    def test_download_file_parallel_fetches_ranges_into_place(self, api_client, tmp_path):
+        response = api_client.download_file_parallel("test_file_id", tmp_path / "file.bin", connections=4)
+
+        assert response.verified and response.size == len(RangeHandler.content)
+        assert (tmp_path / "file.bin").read_bytes() == RangeHandler.content
+        assert sorted(RangeHandler.ranges_requested) == [(0, 1048575), (1048576, 2097151), (2097152, 3145727),
+                                                         (3145728, 4194303)]
+
+    def test_download_file_parallel_resumes_failed_range_only(self, api_client, tmp_path):
+        RangeHandler.drop_ranges = {(1048576, 2097151)}
+        response = api_client.download_file_parallel("test_file_id", tmp_path / "file.bin", connections=4,
+                                                     chunk_size=64 * 1024)
+
+        assert response.verified
+        assert (tmp_path / "file.bin").read_bytes() == RangeHandler.content
+        # The failed range resumes after the bytes it already wrote and the others are fetched once
+        assert len(RangeHandler.ranges_requested) == 5
+        assert RangeHandler.ranges_requested.count((0, 1048575)) == 1
+        assert any(start > 1048576 and end == 2097151 for start, end in RangeHandler.ranges_requested)
+
+    def test_download_file_parallel_does_not_verify_entity_tag_that_is_not_a_checksum(self, api_client, tmp_path):
+        # Files stored without a checksum are sent a weak entity tag that is not a digest of their content
+        RangeHandler.etag = f'W/"{hashlib.md5(b"1700000000.0-4194304").hexdigest()}"'
+        response = api_client.download_file_parallel("test_file_id", tmp_path / "file.bin", connections=4)
+
+        assert response == DownloadResult(file_id="test_file_id", size=len(RangeHandler.content),
+                                          checksum=hashlib.sha256(RangeHandler.content).hexdigest(), verified=False)
+        assert (tmp_path / "file.bin").read_bytes() == RangeHandler.content
+        assert len(RangeHandler.ranges_requested) == 4
+
+    def test_download_file_parallel_falls_back_to_single_stream_without_range_support(self, api_client, tmp_path):
+        RangeHandler.accept_ranges = False
+        response = api_client.download_file_parallel("test_file_id", tmp_path / "file.bin", connections=4)
+
+        assert response.verified
+        assert (tmp_path / "file.bin").read_bytes() == RangeHandler.content
+        assert RangeHandler.ranges_requested == []
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """Request handler that emulates the API's resumable uploads, recording the requests it gets. A PUT of a part in
+    fail_parts is answered with a 500 once, and resumable uploads and part checksums can be switched off."""
+    resumable = True
+    report_checksums = True
+    fail_parts = set()
+    parts = {}
+    requests_received = []
+    form_body = b""
+
+    def do_POST(self):
+        body = self.read_body()
+        UploadHandler.requests_received.append(("POST", self.path))
+        if self.path.startswith("/files/uploads?"):
+            if not self.resumable:
+                return self.send_json(404, {"detail": "Not Found"})
+            return self.send_json(200, {"upload_id": "test_upload_id"})
+        if self.path == "/files/uploads/test_upload_id/complete":
+            return self.send_json(200, {"file_id": "test_file_id", "file_path": "test_file_path"})
+        UploadHandler.form_body = body
+        return self.send_json(200, {"file_id": "test_file_id", "file_path": "test_file_path"})
+
+    def do_PUT(self):
+        body = self.read_body()
+        UploadHandler.requests_received.append(("PUT", self.path))
+        part_number = int(self.path.rsplit("/", 1)[1])
+        if part_number in UploadHandler.fail_parts:
+            UploadHandler.fail_parts.discard(part_number)
+            return self.send_json(500, {"detail": "Part Upload Failed"})
+        UploadHandler.parts[part_number] = body
+        return self.send_json(200, self.get_part_details(part_number, body))
+
+    def do_GET(self):
+        UploadHandler.requests_received.append(("GET", self.path))
+        parts = [self.get_part_details(part_number, body) for part_number, body in sorted(UploadHandler.parts.items())]
+        return self.send_json(200, {"upload_id": "test_upload_id", "parts": parts})
+
+    def get_part_details(self, part_number, body):
+        checksum = hashlib.sha256(body).hexdigest() if self.report_checksums else None
+        return {"part_number": part_number, "size": len(body), "checksum": checksum}
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def send_json(self, status, body):
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAPIClientStreamedUpload:
+    content = bytes(range(256)) * 40
+
+    @pytest.fixture(scope="function")
+    def api_client(self, tmp_path):
+        UploadHandler.resumable = True
+        UploadHandler.report_checksums = True
+        UploadHandler.fail_parts = set()
+        UploadHandler.parts = {}
+        UploadHandler.requests_received = []
+        UploadHandler.form_body = b""
+        UploadHandler.protocol_version = "HTTP/1.1"
+        server = ThreadingHTTPServer(("127.0.0.1", 0), UploadHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        (tmp_path / "file.bin").write_bytes(self.content)
+        with APIClient(base_url=f"http://127.0.0.1:{server.server_port}",
+                       error_logger_path=str(tmp_path / "errors.log")) as api_client:
+            yield api_client
+        server.shutdown()
+        server.server_close()
+
+    def test_upload_file_streamed_sends_parts_and_reports_progress(self, api_client, tmp_path):
+        progress = []
+        response = api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096,
+                                                   progress=lambda sent, total: progress.append((sent, total)))
+
+        assert response == FileIdAndPath(file_id="test_file_id", file_path="test_file_path")
+        assert b"".join(body for _, body in sorted(UploadHandler.parts.items())) == self.content
+        assert progress[-1] == (len(self.content), len(self.content))
+        assert api_client.pending_uploads == {}
+
+    def test_upload_file_streamed_resumes_without_sending_received_parts_again(self, api_client, tmp_path):
+        UploadHandler.fail_parts = {2}
+        response = api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+
+        assert response == ErrorResponse(status_code=500, message="Part Upload Failed")
+        assert list(api_client.pending_uploads.values()) == ["test_upload_id"]
+
+        UploadHandler.requests_received = []
+        response = api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+
+        assert response == FileIdAndPath(file_id="test_file_id", file_path="test_file_path")
+        assert b"".join(body for _, body in sorted(UploadHandler.parts.items())) == self.content
+        assert UploadHandler.requests_received == [("GET", "/files/uploads/test_upload_id"),
+                                                   ("PUT", "/files/uploads/test_upload_id/parts/2"),
+                                                   ("PUT", "/files/uploads/test_upload_id/parts/3"),
+                                                   ("POST", "/files/uploads/test_upload_id/complete")]
+
+    def test_upload_file_streamed_sends_parts_of_changed_file_again_on_resume(self, api_client, tmp_path):
+        UploadHandler.fail_parts = {3}
+        api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+        # The first part changes before the upload is resumed, keeping its size
+        changed_content = bytes(reversed(self.content[:4096])) + self.content[4096:]
+        (tmp_path / "file.bin").write_bytes(changed_content)
+
+        UploadHandler.requests_received = []
+        response = api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+
+        assert response == FileIdAndPath(file_id="test_file_id", file_path="test_file_path")
+        assert b"".join(body for _, body in sorted(UploadHandler.parts.items())) == changed_content
+        assert UploadHandler.requests_received == [("GET", "/files/uploads/test_upload_id"),
+                                                   ("PUT", "/files/uploads/test_upload_id/parts/1"),
+                                                   ("PUT", "/files/uploads/test_upload_id/parts/3"),
+                                                   ("POST", "/files/uploads/test_upload_id/complete")]
+
+    def test_upload_file_streamed_sends_parts_without_checksum_again_on_resume(self, api_client, tmp_path):
+        UploadHandler.fail_parts = {3}
+        api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+
+        UploadHandler.report_checksums = False
+        UploadHandler.requests_received = []
+        response = api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+
+        assert response == FileIdAndPath(file_id="test_file_id", file_path="test_file_path")
+        assert b"".join(body for _, body in sorted(UploadHandler.parts.items())) == self.content
+        assert [request for request in UploadHandler.requests_received if request[0] == "PUT"] == [
+            ("PUT", f"/files/uploads/test_upload_id/parts/{part_number}") for part_number in (1, 2, 3)]
+
+    def test_upload_file_streamed_falls_back_to_streamed_form_without_resumable_uploads(self, api_client, tmp_path):
+        UploadHandler.resumable = False
+        response = api_client.upload_file_streamed(tmp_path / "file.bin", part_size=4096)
+
+        assert response == FileIdAndPath(file_id="test_file_id", file_path="test_file_path")
+        assert UploadHandler.parts == {}
+        assert b'filename="file.bin"' in UploadHandler.form_body
+        assert self.content in UploadHandler.form_body
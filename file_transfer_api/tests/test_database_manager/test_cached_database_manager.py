@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from src.database_manager.cached_database_manager import CachedDatabaseManager
+from src.database_manager.local_database_manager import LocalDatabaseManager
+from src.database_manager.metadata_cache import MetadataCache
+from src.exceptions.database_exceptions import FileRecordNotFoundError
+
+
+class TestCachedDatabaseManager:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, monkeypatch, test_db_manager):
+        # Count the lookups that reach the database
+        self.database_reads = 0
+        get_file_record = LocalDatabaseManager.get_file_record
+
+        def counting_get_file_record(database_manager, file_id):
+            self.database_reads += 1
+            return get_file_record(database_manager, file_id)
+
+        monkeypatch.setattr(LocalDatabaseManager, "get_file_record", counting_get_file_record)
+        self.cached_db_manager = CachedDatabaseManager(test_db_manager, cache=MetadataCache(max_entries=10, ttl=60))
+
+    def test_get_file_record_reads_database_once_for_repeated_lookups(self, test_database_entry, test_record_1):
+        async def get_twice():
+            await self.cached_db_manager.get_file_record(test_record_1["file_id"])
+            return await self.cached_db_manager.get_file_record(test_record_1["file_id"])
+
+        file_record = asyncio.run(get_twice())
+
+        assert file_record.equal_to_dict(test_record_1)
+        assert file_record.last_modified_timestamp == test_database_entry.last_modified_timestamp
+        assert self.database_reads == 1
+
+    def test_get_file_record_caches_missing_file_ids(self):
+        async def get_missing():
+            for _ in range(2):
+                with pytest.raises(FileRecordNotFoundError):
+                    await self.cached_db_manager.get_file_record("nonexistent_file")
+
+        asyncio.run(get_missing())
+
+        assert self.database_reads == 1
+
+    def test_create_file_record_replaces_cached_missing_file_id(self, test_record_1):
+        async def create_after_miss():
+            with pytest.raises(FileRecordNotFoundError):
+                await self.cached_db_manager.get_file_record(test_record_1["file_id"])
+            await self.cached_db_manager.create_file_record(**test_record_1)
+            return await self.cached_db_manager.get_file_record(test_record_1["file_id"])
+
+        assert asyncio.run(create_after_miss()).equal_to_dict(test_record_1)
+        assert self.database_reads == 1
+
+    def test_bulk_create_file_records_caches_created_records(self, test_record_1, test_record_2):
+        async def create_then_get():
+            await self.cached_db_manager.bulk_create_file_records([test_record_1, test_record_2])
+            return [await self.cached_db_manager.get_file_record(record["file_id"])
+                    for record in [test_record_1, test_record_2]]
+
+        file_records = asyncio.run(create_then_get())
+
+        assert file_records[0].equal_to_dict(test_record_1)
+        assert file_records[1].equal_to_dict(test_record_2)
+        assert self.database_reads == 0
+
+    def test_bulk_get_file_records_reads_only_uncached_file_ids(self, test_database_entry, test_database_entry_2,
+                                                                monkeypatch):
+        bulk_reads = []
+        bulk_get_file_records = LocalDatabaseManager.bulk_get_file_records
+
+        def recording_bulk_get_file_records(database_manager, file_ids):
+            bulk_reads.append(file_ids)
+            return bulk_get_file_records(database_manager, file_ids)
+
+        monkeypatch.setattr(LocalDatabaseManager, "bulk_get_file_records", recording_bulk_get_file_records)
+
+        async def get_twice():
+            await self.cached_db_manager.get_file_record("test_id_1")
+            await self.cached_db_manager.bulk_get_file_records(["test_id_1", "test_id_2", "missing_id"])
+            return await self.cached_db_manager.bulk_get_file_records(["test_id_1", "test_id_2", "missing_id"])
+
+        file_records = asyncio.run(get_twice())
+
+        assert sorted(record.file_id for record in file_records) == ["test_id_1", "test_id_2"]
+        assert bulk_reads == [["test_id_2", "missing_id"]]
+
+    @pytest.mark.parametrize("operation", ["rename", "update", "delete"])
+    def test_writes_invalidate_cached_record(self, test_database_entry, test_record_1, operation):
+        file_id = test_record_1["file_id"]
+
+        async def write_between_lookups():
+            await self.cached_db_manager.get_file_record(file_id)
+            if operation == "rename":
+                await self.cached_db_manager.rename_file_record(file_id, "new_name")
+            elif operation == "update":
+                await self.cached_db_manager.update_file_record(file_id, "new_name", test_record_1["content_type"], 5)
+            else:
+                await self.cached_db_manager.delete_file_record(file_id)
+            return await self.cached_db_manager.get_file_record(file_id)
+
+        if operation == "delete":
+            with pytest.raises(FileRecordNotFoundError):
+                asyncio.run(write_between_lookups())
+        else:
+            assert asyncio.run(write_between_lookups()).name == "new_name"
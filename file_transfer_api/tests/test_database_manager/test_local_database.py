@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.database_manager.database_connection.local_database import MeteredAsyncAdaptedQueuePool, MeteredQueuePool, \
+    PoolMetrics, apply_sqlite_profile, get_pool_options, pool_metrics
+from src.exceptions.database_exceptions import DatabaseConnectionError
+
+
+class TestLocalDatabase:
+
+    def test_get_pool_options_leaves_in_memory_sqlite_on_default_pool(self):
+        assert get_pool_options("sqlite:///:memory:") == {}
+
+    def test_get_pool_options_configures_queue_pool_for_file_databases(self):
+        pool_options = get_pool_options("sqlite:///./test.db")
+        assert set(pool_options) == {"poolclass", "pool_size", "max_overflow", "pool_timeout", "pool_pre_ping",
+                                     "pool_recycle"}
+        assert pool_options["poolclass"] is MeteredQueuePool
+        assert get_pool_options("sqlite:///./test.db", is_async=True)["poolclass"] is MeteredAsyncAdaptedQueuePool
+
+    def test_metered_pool_raises_database_connection_error_when_no_connection_is_free(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool, pool_size=1,
+                               max_overflow=0, pool_timeout=0.1)
+        with engine.connect():
+            with pytest.raises(DatabaseConnectionError) as e:
+                engine.connect()
+        assert e.value.status_code == 503
+        assert pool_metrics.waiting == 0
+        engine.dispose()
+
+    def test_pool_metrics_counts_waiting_callers(self):
+        pool_metrics = PoolMetrics()
+        with pool_metrics.track_wait():
+            with pool_metrics.track_wait():
+                assert pool_metrics.waiting == 2
+        assert pool_metrics.waiting == 0
+
+    def test_apply_sqlite_profile_sets_pragmas_on_connect(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_sqlite_profile(engine, "balanced")
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert connection.execute(text("PRAGMA cache_size")).scalar() == -64000
+        engine.dispose()
+
+    def test_apply_sqlite_profile_default_leaves_sqlite_settings(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_sqlite_profile(engine, "default")
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        engine.dispose()
+
+    def test_wal_journal_mode_stays_in_database_after_switching_to_default_profile(self, tmp_path):
+        wal_engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_sqlite_profile(wal_engine, "durable")
+        with wal_engine.connect():
+            pass
+        wal_engine.dispose()
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        apply_sqlite_profile(engine, "default")
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        engine.dispose()
+
+    def test_apply_sqlite_profile_rejects_unknown_profile(self):
+        with pytest.raises(ValueError):
+            apply_sqlite_profile(create_engine("sqlite:///:memory:"), "reckless")
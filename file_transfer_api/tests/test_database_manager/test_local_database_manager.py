@@ -1,7 +1,11 @@
 import pytest
+from sqlalchemy import event, text
 from sqlalchemy.exc import SQLAlchemyError
 
+from src.database_manager.schemas.content_enum import ContentEnum
 from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from src.database_manager.utils.record_utils import get_listing_statement
 from src.exceptions.database_exceptions import DatabaseReadError, DatabaseWriteError
 
 
@@ -47,6 +51,74 @@ class TestLocalDatabaseManager:
         with pytest.raises(DatabaseWriteError):
             self.db_manager.create_file_record(**test_record_1)
 
+    def test_bulk_create_file_records_creates_every_file_record(self, test_record_1, test_record_2):
+        # Act
+        created_file_records = self.db_manager.bulk_create_file_records([test_record_1, test_record_2])
+
+        # Assert
+        returned_file_records = self.db_session.query(DatabaseEntry).order_by(DatabaseEntry.file_id).all()
+        assert [record.file_id for record in created_file_records] == ["test_id_1", "test_id_2"]
+        assert returned_file_records[0].equal_to_dict(test_record_1)
+        assert returned_file_records[1].equal_to_dict(test_record_2)
+        assert returned_file_records[1].stored_size == test_record_2["size"]
+
+    def test_bulk_create_file_records_with_existing_file_id_creates_no_file_records(self, test_database_entry,
+                                                                                   test_record_1, test_record_2):
+        with pytest.raises(DatabaseWriteError):
+            self.db_manager.bulk_create_file_records([test_record_2, test_record_1])
+
+        # The whole batch is rolled back
+        assert self.db_manager.get_count() == 1
+
+    def test_bulk_get_file_records_returns_existing_file_records_across_chunks(self, test_database_entry,
+                                                                               test_database_entry_2):
+        # More file ids than fit in one query
+        file_ids = ["test_id_1"] + [f"missing_id_{i}" for i in range(700)] + ["test_id_2"]
+
+        returned_file_records = self.db_manager.bulk_get_file_records(file_ids)
+
+        assert sorted(record.file_id for record in returned_file_records) == ["test_id_1", "test_id_2"]
+
+    def test_bulk_rename_file_records_renames_existing_file_records(self, test_database_entry,
+                                                                    test_database_entry_2):
+        renamed_count = self.db_manager.bulk_rename_file_records(
+            {"test_id_1": "new_name_1", "test_id_2": "new_name_2", "missing_id": "new_name_3"})
+
+        assert renamed_count == 2
+        assert self.db_manager.get_file_record("test_id_1").name == "new_name_1"
+        assert self.db_manager.get_file_record("test_id_2").name == "new_name_2"
+
+    def test_bulk_delete_file_records_deletes_existing_file_records(self, test_database_entry,
+                                                                    test_database_entry_2):
+        deleted_count = self.db_manager.bulk_delete_file_records(["test_id_1", "missing_id"])
+
+        assert deleted_count == 1
+        assert [record.file_id for record in self.db_manager.get_all_file_records()] == ["test_id_2"]
+
+    def test_list_file_records_pages_through_filtered_records_by_keyset(self):
+        for size in [5, 3, 3, 8, 1]:
+            self.db_manager.create_file_record(name=f"name_{size}", file_id=f"id_{size}_{self.db_manager.get_count()}",
+                                               content_type=ContentEnum.TEXT, size=size)
+        self.db_manager.create_file_record(name="image", file_id="image_id", content_type=ContentEnum.IMAGE, size=4)
+
+        pages = []
+        query = FileRecordQuery(sort_by="size", descending=True, limit=2, content_type=ContentEnum.TEXT, min_size=2)
+        while file_records := self.db_manager.list_file_records(query):
+            pages.append([record.file_id for record in file_records])
+            query.after = (file_records[-1].size, file_records[-1].file_id)
+
+        assert pages == [["id_8_3", "id_5_0"], ["id_3_2", "id_3_1"]]
+
+    @pytest.mark.parametrize("sort_by", ["created_timestamp", "name", "size"])
+    def test_listing_statement_seeks_on_index_without_sorting(self, sort_by):
+        statement = get_listing_statement(FileRecordQuery(sort_by=sort_by, after=("value", "file_id")))
+        compiled = statement.compile(self.db_session.get_bind(), compile_kwargs={"literal_binds": True})
+
+        query_plan = " ".join(row[-1] for row in self.db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+        assert f"_{sort_by}_file_id" in query_plan
+        assert "TEMP B-TREE" not in query_plan
+
     def test_rename_file_record_returns_renamed_file_record(self, test_database_entry, test_record_1,
                                                             renamed_test_record_1):
         # Act
@@ -78,15 +150,32 @@ class TestLocalDatabaseManager:
 
     def test_error_while_deleting_file_record_raises_database_write_error(self, test_database_entry, monkeypatch,
                                                                           test_record_1):
-        def mock_delete(*args, **kwargs):
+        def mock_execute(*args, **kwargs):
             raise SQLAlchemyError
 
-        # Apply the mock
-        monkeypatch.setattr("sqlalchemy.orm.session.Session.delete", mock_delete)
+        # Apply the mock. The record is deleted with a single DELETE statement
+        monkeypatch.setattr("sqlalchemy.orm.session.Session.execute", mock_execute)
 
         with pytest.raises(DatabaseWriteError):
             self.db_manager.delete_file_record(test_record_1["file_id"])
 
+    def test_single_record_writes_each_run_one_statement(self, test_record_1, renamed_test_record_1):
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.split()[0])
+
+        event.listen(self.db_session.get_bind(), "before_cursor_execute", record_statement)
+        try:
+            self.db_manager.create_file_record(**test_record_1)
+            self.db_manager.rename_file_record(test_record_1["file_id"], renamed_test_record_1["name"])
+            self.db_manager.update_file_record(**renamed_test_record_1)
+            self.db_manager.delete_file_record(test_record_1["file_id"])
+        finally:
+            event.remove(self.db_session.get_bind(), "before_cursor_execute", record_statement)
+
+        assert statements == ["INSERT", "UPDATE", "UPDATE", "DELETE"]
+
     def test_get_count_returns_count_of_file_records(self, test_database_entry, test_database_entry_2):
         count = self.db_manager.get_count()
         assert count == 2
@@ -0,0 +1,57 @@
+import pytest
+
+from src.database_manager.metadata_cache import MISSING, MetadataCache
+
+
+class TestMetadataCache:
+
+    def test_get_returns_cached_record_and_counts_hits_and_misses(self):
+        cache = MetadataCache(max_entries=10, ttl=60)
+        cache.put("test_id_1", {"name": "test_name_1"})
+
+        assert cache.get("test_id_1") == {"name": "test_name_1"}
+        assert cache.get("test_id_2") is None
+        assert cache.get_stats() == {"entries": 1, "max_entries": 10, "hits": 1, "misses": 1}
+
+    def test_get_drops_expired_records(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("src.database_manager.metadata_cache.time.monotonic", lambda: now[0])
+        cache = MetadataCache(max_entries=10, ttl=60, negative_ttl=5)
+        cache.put("test_id_1", {"name": "test_name_1"})
+        cache.put("test_id_2", MISSING)
+
+        now[0] += 10
+        assert cache.get("test_id_1") is not None
+        assert cache.get("test_id_2") is None
+
+        now[0] += 60
+        assert cache.get("test_id_1") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_put_evicts_least_recently_used_record_when_full(self):
+        cache = MetadataCache(max_entries=2, ttl=60)
+        cache.put("test_id_1", {"name": "test_name_1"})
+        cache.put("test_id_2", {"name": "test_name_2"})
+        cache.get("test_id_1")
+        cache.put("test_id_3", {"name": "test_name_3"})
+
+        assert cache.get("test_id_2") is None
+        assert cache.get("test_id_1") is not None
+
+    def test_put_skips_record_read_before_an_invalidation(self):
+        cache = MetadataCache(max_entries=10, ttl=60)
+        version = cache.version
+        cache.invalidate("test_id_1")
+        cache.put("test_id_1", {"name": "stale_name"}, version=version)
+
+        assert cache.get("test_id_1") is None
+
+    def test_zero_max_entries_disables_cache(self):
+        cache = MetadataCache(max_entries=0)
+        cache.put("test_id_1", {"name": "test_name_1"})
+
+        assert cache.get("test_id_1") is None
+
+    def test_metadata_cache_rejects_negative_settings(self):
+        with pytest.raises(ValueError):
+            MetadataCache(ttl=-1)
@@ -0,0 +1,67 @@
+from sqlalchemy import create_engine, inspect, text
+
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.schemas.file_record_query import FileRecordQuery
+from src.database_manager.utils.record_utils import get_listing_statement
+from src.database_manager.utils.schema_utils import create_indexes, upgrade_table
+
+
+class TestSchemaUtils:
+    def create_original_table(self, database_url: str):
+        # The files table as it was before checksums, compression and sizes in bytes
+        engine = create_engine(database_url)
+        with engine.begin() as connection:
+            connection.execute(text(f'CREATE TABLE {DatabaseEntry.__tablename__} (file_id VARCHAR PRIMARY KEY, '
+                                    f'name VARCHAR NOT NULL, content_type VARCHAR NOT NULL, size INTEGER, '
+                                    f'created_timestamp DATETIME NOT NULL, last_modified_timestamp DATETIME NOT NULL)'))
+            connection.execute(text(f"INSERT INTO {DatabaseEntry.__tablename__} VALUES "
+                                    f"('test_file_id', 'test.txt', 'TEXT', 2, '2021-01-01', '2021-01-01')"))
+        return engine
+
+    def test_upgrade_table_adds_missing_columns_and_converts_sizes_once(self, tmp_path):
+        database_url = f"sqlite:///{tmp_path / 'upgrade.db'}"
+        engine = self.create_original_table(database_url)
+
+        assert upgrade_table(database_url, DatabaseEntry.__table__) == ["checksum", "stored_size",
+                                                                        "content_encoding"]
+        assert upgrade_table(database_url, DatabaseEntry.__table__) == []
+
+        columns = {column["name"] for column in inspect(engine).get_columns(DatabaseEntry.__tablename__)}
+        assert {"checksum", "stored_size", "content_encoding"} <= columns
+        with engine.connect() as connection:
+            assert connection.execute(text(f"SELECT size FROM {DatabaseEntry.__tablename__}")).scalar() == 2048
+        engine.dispose()
+
+    def test_upgrade_table_fills_in_missing_sizes_so_listings_by_size_include_them(self, tmp_path):
+        database_url = f"sqlite:///{tmp_path / 'upgrade.db'}"
+        engine = self.create_original_table(database_url)
+        with engine.begin() as connection:
+            connection.execute(text(f"INSERT INTO {DatabaseEntry.__tablename__} VALUES "
+                                    f"('stored_id', 'a.txt', 'TEXT', NULL, '2021-01-01', '2021-01-01'), "
+                                    f"('missing_id', 'b.txt', 'TEXT', NULL, '2021-01-01', '2021-01-01')"))
+
+        upgrade_table(database_url, DatabaseEntry.__table__, {"stored_id": 4096}.get)
+
+        query = FileRecordQuery(sort_by="size", limit=1)
+        file_ids = []
+        with engine.connect() as connection:
+            while file_records := connection.execute(get_listing_statement(query)).all():
+                file_ids.append(file_records[-1].file_id)
+                query.after = (file_records[-1].size, file_records[-1].file_id)
+        assert file_ids == ["missing_id", "test_file_id", "stored_id"]
+        engine.dispose()
+
+    def test_upgrade_table_ignores_missing_table(self, tmp_path):
+        assert upgrade_table(f"sqlite:///{tmp_path / 'empty.db'}", DatabaseEntry.__table__) == []
+
+    def test_create_indexes_adds_listing_indexes_to_existing_table(self, tmp_path):
+        database_url = f"sqlite:///{tmp_path / 'upgrade.db'}"
+        engine = self.create_original_table(database_url)
+        upgrade_table(database_url, DatabaseEntry.__table__)
+
+        expected_indexes = sorted(index.name for index in DatabaseEntry.__table__.indexes)
+        assert create_indexes(database_url, DatabaseEntry.__table__) == expected_indexes
+        assert create_indexes(database_url, DatabaseEntry.__table__) == expected_indexes
+        assert sorted(index["name"] for index in inspect(engine).get_indexes(DatabaseEntry.__tablename__)) == \
+            expected_indexes
+        engine.dispose()
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from src.database_manager.write_behind_database_manager import WriteBehindDatabaseManager
+from src.database_manager.write_behind_queue import WriteBehindQueue
+from src.exceptions.database_exceptions import DatabaseWriteError, FileRecordNotFoundError
+
+
+class TestWriteBehindDatabaseManager:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, test_engine, test_db_manager, tmp_path):
+        self.test_db_manager = test_db_manager
+        self.write_queue = WriteBehindQueue(session_factory=sessionmaker(bind=test_engine), flush_interval=60000,
+                                            error_logger_path=str(tmp_path / "errors.log"))
+        self.write_behind_db_manager = WriteBehindDatabaseManager(test_db_manager, self.write_queue)
+        yield
+        self.write_queue.stop()
+
+    def test_create_file_record_returns_before_commit_and_is_read_back(self, test_record_1):
+        async def create_and_read():
+            await self.write_behind_db_manager.create_file_record(**test_record_1)
+            assert self.test_db_manager.get_count() == 0
+            return await self.write_behind_db_manager.get_file_record(test_record_1["file_id"])
+
+        file_record = asyncio.run(create_and_read())
+
+        assert file_record.equal_to_dict(test_record_1)
+
+    def test_rename_file_record_raises_when_file_does_not_exist(self):
+        with pytest.raises(FileRecordNotFoundError):
+            asyncio.run(self.write_behind_db_manager.rename_file_record("nonexistent_file", "new_name"))
+
+    def test_durable_create_file_record_raises_when_write_fails(self, test_database_entry, test_record_1):
+        durable_db_manager = WriteBehindDatabaseManager(self.test_db_manager, self.write_queue, durable=True)
+
+        with pytest.raises(DatabaseWriteError):
+            asyncio.run(durable_db_manager.create_file_record(**test_record_1))
+
+    def test_failed_create_file_record_passes_record_to_on_create_failure(self, test_database_entry, test_record_1):
+        discarded_records = []
+        db_manager = WriteBehindDatabaseManager(self.test_db_manager, self.write_queue,
+                                                on_create_failure=discarded_records.append)
+
+        async def create_and_wait():
+            # The caller does not wait for the create, which fails as the record already exists
+            await db_manager.create_file_record(**test_record_1)
+            await db_manager.wait_for_writes()
+
+        asyncio.run(create_and_wait())
+
+        assert [record["file_id"] for record in discarded_records] == [test_record_1["file_id"]]
+
+    def test_bulk_delete_file_records_waits_for_deletes(self, test_database_entry, test_record_1):
+        deleted_count = asyncio.run(self.write_behind_db_manager.bulk_delete_file_records(
+            [test_record_1["file_id"], "nonexistent_file"]))
+
+        assert deleted_count == 1
+        assert self.test_db_manager.get_count() == 0
@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from src.database_manager.schemas.database_entry import DatabaseEntry
+from src.database_manager.utils.record_utils import get_bulk_insert_rows
+from src.database_manager.write_behind_queue import WriteBehindQueue
+from src.exceptions.database_exceptions import DatabaseWriteError
+
+
+class TestWriteBehindQueue:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, test_engine, test_db_session, tmp_path):
+        self.db = test_db_session
+        # A long flush interval, so that writes are only committed when a batch fills up or is flushed
+        self.write_queue = WriteBehindQueue(session_factory=sessionmaker(bind=test_engine), flush_interval=60000,
+                                            max_batch=100, error_logger_path=str(tmp_path / "errors.log"))
+        yield
+        self.write_queue.stop()
+
+    def submit_create(self, record):
+        return self.write_queue.submit("create", [record["file_id"]], rows=get_bulk_insert_rows([record]))
+
+    def test_flush_commits_queued_writes_in_one_batch(self, test_record_1, test_record_2):
+        futures = [self.submit_create(test_record_1), self.submit_create(test_record_2)]
+        assert self.write_queue.is_pending([test_record_1["file_id"]])
+
+        self.write_queue.flush().result(timeout=5)
+
+        assert [future.result() for future in futures] == [1, 1]
+        assert self.db.query(DatabaseEntry).count() == 2
+        assert self.write_queue.batches == 1
+        assert not self.write_queue.is_pending()
+
+    def test_failed_write_does_not_fail_the_rest_of_its_batch(self, test_record_1, test_record_2):
+        futures = [self.submit_create(test_record_1), self.submit_create(test_record_1),
+                   self.submit_create(test_record_2)]
+        self.write_queue.flush().result(timeout=5)
+
+        assert futures[0].result() == 1
+        with pytest.raises(DatabaseWriteError):
+            futures[1].result()
+        assert futures[2].result() == 1
+        assert self.db.query(DatabaseEntry).count() == 2
+
+    def test_rename_and_delete_return_rows_written(self, test_database_entry, test_record_1):
+        file_id = test_record_1["file_id"]
+        renamed = self.write_queue.submit("rename", [file_id, "nonexistent_file"],
+                                          new_names={file_id: "renamed", "nonexistent_file": "renamed"},
+                                          last_modified_timestamp=test_database_entry.last_modified_timestamp)
+        deleted = self.write_queue.submit("delete", [file_id])
+        self.write_queue.flush().result(timeout=5)
+
+        assert renamed.result() == 1
+        assert deleted.result() == 1
+        assert self.db.query(DatabaseEntry).count() == 0
+
+    def test_stop_drains_queued_writes(self, test_record_1):
+        future = self.submit_create(test_record_1)
+        self.write_queue.stop()
+
+        assert future.result(timeout=0) == 1
+        assert self.db.query(DatabaseEntry).count() == 1
+
+    def test_unexpected_error_fails_its_writes_and_keeps_writer_running(self, test_record_1, test_record_2,
+                                                                       monkeypatch):
+        def fail_apply_write(*args, **kwargs):
+            raise TypeError("Unexpected error")
+
+        failed_writes = []
+        monkeypatch.setattr("src.database_manager.write_behind_queue.apply_write", fail_apply_write)
+        future = self.write_queue.submit("create", [test_record_1["file_id"]],
+                                         on_failure=failed_writes.append, rows=get_bulk_insert_rows([test_record_1]))
+        self.write_queue.flush().result(timeout=5)
+
+        with pytest.raises(DatabaseWriteError):
+            future.result(timeout=0)
+        assert [write.file_ids for write in failed_writes] == [[test_record_1["file_id"]]]
+        assert not self.write_queue.is_pending()
+
+        monkeypatch.undo()
+        future = self.submit_create(test_record_2)
+        self.write_queue.flush().result(timeout=5)
+
+        assert future.result(timeout=0) == 1
@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from src.file_manager.async_file_manager import AsyncFileManager
+from src.file_manager.blob_cache import BlobCache
+from src.file_manager.local_file_manager import LocalFileManager
+
+
+class TestAsyncFileManager:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, monkeypatch, file_system):
+        data_dir, upload_dir, download_dir = file_system
+        monkeypatch.setattr("src.file_manager.local_file_manager.upload_path", upload_dir)
+        monkeypatch.setattr("src.file_manager.local_file_manager.download_path", download_dir)
+        monkeypatch.setattr("src.file_manager.local_file_manager.blob_path", data_dir / "blobs")
+        monkeypatch.setattr("src.file_manager.local_file_manager.multipart_path", data_dir / "multipart")
+        self.async_file_manager = AsyncFileManager(LocalFileManager())
+
+    def test_upload_file_runs_on_file_io_thread_pool(self, monkeypatch):
+        thread_names = []
+        upload_file = LocalFileManager.upload_file
+
+        def recording_upload_file(file_manager, file):
+            thread_names.append(threading.current_thread().name)
+            return upload_file(file_manager, file)
+
+        monkeypatch.setattr(LocalFileManager, "upload_file", recording_upload_file)
+        file_path = asyncio.run(self.async_file_manager.upload_file(BytesIO(b"test data")))
+
+        assert file_path.read_bytes() == b"test data"
+        assert thread_names[0].startswith("file-io")
+
+    def test_ingest_file_then_delete_file_removes_file(self, file_system):
+        async def ingest_then_delete():
+            result = await self.async_file_manager.ingest_file(BytesIO(b"test data"))
+            await self.async_file_manager.delete_file(result.file_path.name)
+            return result
+
+        result = asyncio.run(ingest_then_delete())
+
+        assert result.size == 9
+        assert not result.file_path.exists()
+
+    def test_read_cached_file_answers_hits_without_file_io_thread_pool(self, temp_upload_file, monkeypatch):
+        async_file_manager = AsyncFileManager(LocalFileManager(blob_cache=BlobCache()))
+        file_id = Path(temp_upload_file).name
+        cached_blob = asyncio.run(async_file_manager.read_cached_file(file_id))
+
+        def fail_cache_file(*args, **kwargs):
+            raise AssertionError("Cache hit should not read the file")
+
+        monkeypatch.setattr(LocalFileManager, "cache_file", fail_cache_file)
+
+        assert cached_blob.content == b"test data"
+        assert asyncio.run(async_file_manager.read_cached_file(file_id)) is cached_blob
+
+    def test_read_cached_file_skips_files_too_large_to_cache_without_reading_them(self, temp_upload_file,
+                                                                                   monkeypatch):
+        async_file_manager = AsyncFileManager(LocalFileManager(blob_cache=BlobCache(max_object_bytes=4)))
+
+        def fail_cache_file(*args, **kwargs):
+            raise AssertionError("File too large to cache should not be read")
+
+        monkeypatch.setattr(LocalFileManager, "cache_file", fail_cache_file)
+
+        assert asyncio.run(async_file_manager.read_cached_file(Path(temp_upload_file).name, stored_size=9)) is None
+
+    def test_upload_part_stream_writes_chunks_straight_into_upload_session(self, file_system):
+        async def chunks():
+            yield b"test "
+            yield b"data"
+
+        async def upload():
+            upload_id = await self.async_file_manager.create_upload_session(None, None)
+            part = await self.async_file_manager.upload_part_stream(upload_id, 1, chunks())
+            return upload_id, part
+
+        upload_id, part = asyncio.run(upload())
+
+        session_path = file_system[0] / "multipart" / upload_id
+        assert (part.size, part.checksum) == (9, hashlib.sha256(b"test data").hexdigest())
+        assert (session_path / "00001.part").read_bytes() == b"test data"
+        assert not list(session_path.glob("*.tmp"))
+
+    def test_upload_part_stream_discards_part_when_stream_fails(self, file_system):
+        async def chunks():
+            yield b"test "
+            raise ConnectionError("Client disconnected")
+
+        async def upload():
+            upload_id = await self.async_file_manager.create_upload_session(None, None)
+            with pytest.raises(ConnectionError):
+                await self.async_file_manager.upload_part_stream(upload_id, 1, chunks())
+            return await self.async_file_manager.get_upload_session(upload_id)
+
+        session = asyncio.run(upload())
+
+        assert session.parts == []
+        assert not list((file_system[0] / "multipart" / session.upload_id).glob("*.tmp"))
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from src.file_manager.blob_cache import BlobCache, CachedBlob
+
+
+def make_blob(content: bytes) -> CachedBlob:
+    """Create a cached blob with a placeholder stat result"""
+    return CachedBlob(content=content, stat_result=os.stat_result((0,) * 10))
+
+
+class TestBlobCache:
+
+    def test_get_returns_cached_blob_and_counts_hits_and_misses(self):
+        blob_cache = BlobCache(max_bytes=100, max_object_bytes=10)
+        blob = make_blob(b"test data")
+        blob_cache.put("test_id_1", blob)
+
+        assert blob_cache.get("test_id_1") is blob
+        assert blob_cache.get("test_id_2") is None
+        assert blob_cache.get_stats() == {"entries": 1, "size_bytes": 9, "max_bytes": 100, "max_object_bytes": 10,
+                                          "hits": 1, "misses": 1, "evictions": 0}
+
+    def test_put_evicts_least_recently_used_blobs_to_stay_within_budget(self):
+        blob_cache = BlobCache(max_bytes=20, max_object_bytes=10)
+        blob_cache.put("test_id_1", make_blob(b"a" * 10))
+        blob_cache.put("test_id_2", make_blob(b"b" * 10))
+        blob_cache.get("test_id_1")  # test_id_2 is now the least recently used
+        blob_cache.put("test_id_3", make_blob(b"c" * 5))
+
+        assert blob_cache.get("test_id_2") is None
+        assert blob_cache.get("test_id_1") is not None
+        assert blob_cache.get_stats()["size_bytes"] == 15
+        assert blob_cache.get_stats()["evictions"] == 1
+
+    def test_put_replaces_existing_blob_without_double_counting_its_size(self):
+        blob_cache = BlobCache(max_bytes=20, max_object_bytes=10)
+        blob_cache.put("test_id_1", make_blob(b"a" * 10))
+        blob_cache.put("test_id_1", make_blob(b"b" * 5))
+
+        assert blob_cache.get("test_id_1").content == b"b" * 5
+        assert blob_cache.get_stats()["size_bytes"] == 5
+
+    @pytest.mark.parametrize("max_bytes, max_object_bytes", [(100, 5), (5, 100), (0, 100)])
+    def test_put_refuses_blobs_over_the_object_cap_or_budget(self, max_bytes, max_object_bytes):
+        blob_cache = BlobCache(max_bytes=max_bytes, max_object_bytes=max_object_bytes)
+
+        assert not blob_cache.put("test_id_1", make_blob(b"test data"))
+        assert blob_cache.get("test_id_1") is None
+
+    def test_invalidate_removes_blob(self):
+        blob_cache = BlobCache(max_bytes=100, max_object_bytes=10)
+        blob_cache.put("test_id_1", make_blob(b"test data"))
+        blob_cache.invalidate("test_id_1")
+        blob_cache.invalidate("test_id_2")
+
+        assert blob_cache.get("test_id_1") is None
+        assert blob_cache.get_stats()["size_bytes"] == 0
+
+    def test_blob_cache_rejects_negative_sizes(self):
+        with pytest.raises(ValueError):
+            BlobCache(max_bytes=-1)
@@ -0,0 +1,71 @@
+import gzip
+from io import BytesIO
+
+import pytest
+
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.file_manager.compression import CompressionPolicy, compress_file, iter_decompressed
+
+
+class TestCompression:
+
+    @pytest.mark.parametrize("content_type, size, encoding", [
+        (ContentEnum.TEXT, 1024, "gzip"),
+        (ContentEnum.APPLICATION, 4096, "gzip"),
+        (ContentEnum.TEXT, 1023, None),
+        (ContentEnum.IMAGE, 4096, None),
+    ])
+    def test_policy_chooses_encoding_by_content_type_and_size(self, content_type, size, encoding):
+        policy = CompressionPolicy(algorithm="gzip", content_types=[ContentEnum.TEXT, ContentEnum.APPLICATION],
+                                   min_size=1024)
+        assert policy.choose_encoding(content_type, size) == encoding
+
+    @pytest.mark.parametrize("media_type, encoding", [
+        ("application/json", "gzip"),
+        ("application/zip", None),
+        ("application/gzip", None),
+        ("application/zstd", None),
+        ("Application/X-7z-Compressed; charset=binary", None),
+    ])
+    def test_policy_skips_already_compressed_media_types(self, media_type, encoding):
+        policy = CompressionPolicy(algorithm="gzip", content_types=[ContentEnum.APPLICATION], min_size=0)
+        assert policy.choose_encoding(ContentEnum.APPLICATION, 4096, media_type) == encoding
+
+    def test_policy_reads_content_types_from_environment(self, monkeypatch):
+        monkeypatch.setattr("src.file_manager.compression.compressed_content_types", "text, audio")
+        policy = CompressionPolicy(algorithm="zstd")
+
+        assert policy.content_types == {ContentEnum.TEXT, ContentEnum.AUDIO}
+
+    def test_policy_compresses_nothing_when_algorithm_is_none(self):
+        assert CompressionPolicy(algorithm="none", min_size=0).choose_encoding(ContentEnum.TEXT, 4096) is None
+
+    def test_policy_rejects_unknown_algorithm(self):
+        with pytest.raises(ValueError):
+            CompressionPolicy(algorithm="brotli")
+
+    def test_policy_rejects_zstd_without_zstandard(self, monkeypatch):
+        monkeypatch.setattr("src.file_manager.compression.zstandard", None)
+        with pytest.raises(ValueError):
+            CompressionPolicy(algorithm="zstd")
+
+    @pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+    def test_compress_file_then_iter_decompressed_returns_original_content(self, encoding, tmp_path):
+        if encoding == "zstd":
+            pytest.importorskip("zstandard")
+        content = b"test data\n" * 1000
+        with open(tmp_path / "compressed", "wb") as f:
+            compress_file(BytesIO(content), f, encoding)
+
+        assert (tmp_path / "compressed").stat().st_size < len(content)
+        assert b"".join(iter_decompressed(tmp_path / "compressed", encoding, chunk_size=100)) == content
+
+    def test_gzip_compression_is_deterministic(self):
+        compressed = []
+        for _ in range(2):
+            destination = BytesIO()
+            compress_file(BytesIO(b"test data"), destination, "gzip")
+            compressed.append(destination.getvalue())
+
+        assert compressed[0] == compressed[1]
+        assert gzip.decompress(compressed[0]) == b"test data"
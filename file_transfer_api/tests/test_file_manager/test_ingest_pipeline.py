@@ -0,0 +1,47 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from src.file_manager.ingest_pipeline import IngestPipeline, sniff_content_type
+
+
+class TestIngestPipeline:
+
+    def test_result_reports_size_and_checksum_of_all_chunks(self):
+        pipeline = IngestPipeline(algorithm="sha256")
+        for chunk in [b"test ", b"da", b"ta"]:
+            pipeline.update(chunk)
+
+        result = pipeline.result(Path("test_file"))
+
+        assert result.size == 9
+        assert result.checksum == hashlib.sha256(b"test data").hexdigest()
+
+    def test_result_supports_blake2b_checksums(self):
+        pipeline = IngestPipeline(algorithm="blake2b")
+        pipeline.update(b"test data")
+
+        assert pipeline.result(Path("test_file")).checksum == hashlib.blake2b(b"test data").hexdigest()
+
+    def test_unknown_algorithm_raises_value_error(self):
+        with pytest.raises(ValueError):
+            IngestPipeline(algorithm="not_an_algorithm")
+
+    def test_result_sniffs_content_type_across_small_chunks(self):
+        pipeline = IngestPipeline()
+        png_file = b"\x89PNG\r\n\x1a\n" + b"\x00" * 16
+        for i in range(0, len(png_file), 3):
+            pipeline.update(png_file[i:i + 3])
+
+        assert pipeline.result(Path("test_file")).sniffed_content_type == "image/png"
+
+    @pytest.mark.parametrize("head, content_type", [
+        (b"%PDF-1.7", "application/pdf"),
+        (b"RIFF\x00\x00\x00\x00WAVEfmt ", "audio/wav"),
+        (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+        (b"\x00\x00\x00\x18ftypmp42", "video/mp4"),
+        (b"test data", None),
+    ])
+    def test_sniff_content_type_identifies_magic_numbers(self, head, content_type):
+        assert sniff_content_type(head) == content_type
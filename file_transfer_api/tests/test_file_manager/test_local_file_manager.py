@@ -1,10 +1,30 @@
+import gzip
+import hashlib
+import os
+import time
 from io import BytesIO
 from pathlib import Path
 
 import pytest
 
 from src.exceptions.file_exceptions import FileUploadError, FileDoesNotExistError, FileDownloadError, FileUpdateError, \
-    FileDeleteError
+    FileDeleteError, InvalidUploadPartError, UploadSessionDoesNotExistError
+from src.database_manager.schemas.content_enum import ContentEnum
+from src.file_manager.blob_cache import BlobCache
+from src.file_manager.compression import CompressionPolicy
+from src.file_manager.local_file_manager import LocalFileManager, get_shard_path, get_storage_stats
+
+
+class RecordingBytesIO(BytesIO):
+    """BytesIO that records the size requested by every read call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
 
 
 class TestLocalFileManager:
@@ -14,6 +34,8 @@ class TestLocalFileManager:
         data_dir, upload_dir, download_dir = file_system
         monkeypatch.setattr("src.file_manager.local_file_manager.upload_path", upload_dir)
         monkeypatch.setattr("src.file_manager.local_file_manager.download_path", download_dir)
+        monkeypatch.setattr("src.file_manager.local_file_manager.multipart_path", data_dir / "multipart")
+        monkeypatch.setattr("src.file_manager.local_file_manager.blob_path", data_dir / "blobs")
 
     def mock_function_failure(self, monkeypatch, function, exception):
         def mock_function(*args, **kwargs):
@@ -29,29 +51,99 @@ class TestLocalFileManager:
         # Check that the file has been moved to the upload directory
         assert temp_path.name in [file.name for file in upload_dir.iterdir()]
 
+    def test_upload_file_copies_file_in_bounded_chunks(self, file_system):
+        file_manager = LocalFileManager(chunk_size=4)
+        file = RecordingBytesIO(b"test data that spans several chunks")
+
+        file_location = file_manager.upload_file(file)
+
+        # Check that no read was unbounded and that the contents were copied intact
+        assert all(0 < size <= 4 for size in file.read_sizes)
+        assert file_location.read_bytes() == b"test data that spans several chunks"
+
+    def test_ingest_file_returns_details_gathered_while_uploading(self, file_manager, file_system):
+        result = file_manager.ingest_file(BytesIO(b"%PDF-1.7 test data"))
+
+        assert result.file_path.read_bytes() == b"%PDF-1.7 test data"
+        assert result.size == 18
+        assert result.sniffed_content_type == "application/pdf"
+
+    def test_file_manager_rejects_non_positive_chunk_size(self):
+        with pytest.raises(ValueError):
+            LocalFileManager(chunk_size=0)
+
     def test_upload_file_raises_error_when_file_upload_fails(self, file_manager, file_system, monkeypatch):
 
         self.mock_function_failure(monkeypatch, "builtins.open", IOError("Failed to open"))
         with pytest.raises(FileUploadError):
             file_manager.upload_file(BytesIO(b"test data"))
 
-    def test_download_file_moves_file_to_download_directory(self, file_manager, temp_upload_file, file_system):
+    def test_download_file_returns_stored_file_without_copying_it(self, file_manager, temp_upload_file, file_system):
+        download_dir = file_system[2]
+        file_id = Path(temp_upload_file).name
+        file_path = file_manager.download_file(file_id)
+
+        assert file_path == Path(temp_upload_file)
+        assert list(download_dir.iterdir()) == []
+
+    def test_download_file_in_copy_mode_moves_file_to_download_directory(self, temp_upload_file, file_system):
         download_dir = file_system[2]
         file_id = Path(temp_upload_file).name
-        file_manager.download_file(file_id)
+        LocalFileManager(download_mode="copy").download_file(file_id)
 
         assert file_id in [file.name for file in download_dir.iterdir()]
 
-    def test_download_file_raises_error_when_file_does_not_exist(self, file_manager, file_system):
+    def test_file_manager_rejects_unknown_download_mode(self):
+        with pytest.raises(ValueError):
+            LocalFileManager(download_mode="unknown")
+
+    @pytest.mark.parametrize("download_mode", ["direct", "copy"])
+    def test_download_file_raises_error_when_file_does_not_exist(self, download_mode, file_system):
         with pytest.raises(FileDoesNotExistError):
             # Check that it raises a FileDoesNotExistError when the file does not exist
-            file_manager.download_file("nonexistent_file")
+            LocalFileManager(download_mode=download_mode).download_file("nonexistent_file")
 
-    def test_download_file_raises_error_when_file_download_fails(self, file_manager, temp_upload_file, monkeypatch):
+    def test_download_file_raises_error_when_file_download_fails(self, temp_upload_file, monkeypatch):
         file_id = Path(temp_upload_file).name
         self.mock_function_failure(monkeypatch, "builtins.open", IOError("Failed to open"))
         with pytest.raises(FileDownloadError):
-            file_manager.download_file(file_id)
+            LocalFileManager(download_mode="copy").download_file(file_id)
+
+    def test_cache_file_reads_small_file_into_blob_cache(self, temp_upload_file):
+        blob_cache = BlobCache(max_bytes=100, max_object_bytes=10)
+        file_manager = LocalFileManager(blob_cache=blob_cache)
+        file_id = Path(temp_upload_file).name
+
+        assert file_manager.get_cached_file(file_id) is None
+        cached_blob = file_manager.cache_file(file_id)
+
+        assert cached_blob.content == b"test data"
+        assert cached_blob.stat_result.st_size == 9
+        assert file_manager.get_cached_file(file_id) is cached_blob
+
+    def test_cache_file_skips_file_over_object_cap(self, temp_upload_file):
+        file_manager = LocalFileManager(blob_cache=BlobCache(max_bytes=100, max_object_bytes=5))
+        file_id = Path(temp_upload_file).name
+
+        assert file_manager.cache_file(file_id) is None
+        assert file_manager.get_cached_file(file_id) is None
+
+    def test_cache_file_raises_error_when_file_does_not_exist(self):
+        with pytest.raises(FileDoesNotExistError):
+            LocalFileManager(blob_cache=BlobCache()).cache_file("nonexistent_file")
+
+    @pytest.mark.parametrize("operation", ["rename", "delete"])
+    def test_rename_and_delete_file_invalidate_blob_cache(self, temp_upload_file, operation):
+        file_manager = LocalFileManager(blob_cache=BlobCache(max_bytes=100, max_object_bytes=10))
+        file_id = Path(temp_upload_file).name
+        file_manager.cache_file(file_id)
+
+        if operation == "rename":
+            file_manager.rename_file(file_id, "new_file_id")
+        else:
+            file_manager.delete_file(file_id)
+
+        assert file_manager.get_cached_file(file_id) is None
 
     def test_rename_file_renames_file_in_upload_directory(self, file_manager, temp_rename_file, file_system):
         upload_dir = file_system[1]
@@ -94,3 +186,158 @@ class TestLocalFileManager:
         finally:
             # Undo the patch to prevent the teardown from failing
             monkeypatch.undo()
+
+    def test_sharded_file_manager_stores_files_in_shard_directories(self, file_system):
+        upload_dir = file_system[1]
+        file_manager = LocalFileManager(shard_depth=2)
+        file_id = file_manager.upload_file(BytesIO(b"test data")).name
+
+        # Check that upload, download, rename and delete all use the sharded path
+        assert file_manager.download_file(file_id) == upload_dir / get_shard_path(file_id, 2)
+        assert len(get_shard_path(file_id, 2).parts) == 3
+        file_manager.rename_file(file_id, "new_file_id")
+        assert (upload_dir / get_shard_path("new_file_id", 2)).read_bytes() == b"test data"
+        file_manager.delete_file("new_file_id")
+        assert not file_manager.get_file_location("new_file_id").exists()
+
+    def test_sharded_file_manager_finds_files_stored_before_sharding(self, temp_upload_file):
+        file_manager = LocalFileManager(shard_depth=2)
+        file_id = Path(temp_upload_file).name
+
+        assert file_manager.download_file(file_id) == Path(temp_upload_file)
+        file_manager.delete_file(file_id)
+        assert not Path(temp_upload_file).exists()
+
+    @pytest.mark.parametrize("shard_depth, shard_width", [(-1, 2), (1, 0), (17, 2)])
+    def test_file_manager_rejects_invalid_shard_layout(self, shard_depth, shard_width):
+        with pytest.raises(ValueError):
+            LocalFileManager(shard_depth=shard_depth, shard_width=shard_width)
+
+    def test_complete_upload_assembles_parts_in_part_number_order(self, file_manager, file_system):
+        upload_dir = file_system[1]
+        upload_id = file_manager.create_upload_session("test.txt", "text/plain")
+        # Parts may arrive in any order, and a part uploaded again replaces the earlier copy
+        file_manager.upload_part(upload_id, 2, BytesIO(b" data"))
+        file_manager.upload_part(upload_id, 1, BytesIO(b"stale"))
+        part = file_manager.upload_part(upload_id, 1, BytesIO(b"test"))
+
+        session = file_manager.get_upload_session(upload_id)
+        result = file_manager.complete_upload(upload_id)
+
+        assert part.size == 4
+        assert (session.file_name, session.content_type) == ("test.txt", "text/plain")
+        assert [(part.part_number, part.size) for part in session.parts] == [(1, 4), (2, 5)]
+        assert [part.checksum for part in session.parts] == [hashlib.sha256(b"test").hexdigest(),
+                                                             hashlib.sha256(b" data").hexdigest()]
+        assert result.file_path.parent == upload_dir
+        assert result.file_path.read_bytes() == b"test data"
+        assert result.size == 9
+        # The parts are kept until the upload is ended, once its file is recorded
+        assert file_manager.get_upload_session(upload_id).parts == session.parts
+        file_manager.end_upload(upload_id)
+        with pytest.raises(UploadSessionDoesNotExistError):
+            file_manager.get_upload_session(upload_id)
+
+    def test_complete_upload_raises_error_when_parts_are_missing(self, file_manager):
+        upload_id = file_manager.create_upload_session(None, None)
+        with pytest.raises(InvalidUploadPartError):
+            file_manager.complete_upload(upload_id)
+
+        file_manager.upload_part(upload_id, 2, BytesIO(b"test data"))
+        with pytest.raises(InvalidUploadPartError):
+            file_manager.complete_upload(upload_id)
+
+    @pytest.mark.parametrize("part_number", [0, 10001])
+    def test_upload_part_rejects_out_of_range_part_number(self, file_manager, part_number):
+        upload_id = file_manager.create_upload_session(None, None)
+        with pytest.raises(InvalidUploadPartError):
+            file_manager.upload_part(upload_id, part_number, BytesIO(b"test data"))
+
+    @pytest.mark.parametrize("upload_id", ["nonexistent_upload", "..", ""])
+    def test_upload_part_raises_error_when_session_does_not_exist(self, file_manager, upload_id):
+        with pytest.raises(UploadSessionDoesNotExistError):
+            file_manager.upload_part(upload_id, 1, BytesIO(b"test data"))
+
+    def test_abort_upload_deletes_session(self, file_manager, file_system):
+        upload_id = file_manager.create_upload_session(None, None)
+        file_manager.upload_part(upload_id, 1, BytesIO(b"test data"))
+        file_manager.abort_upload(upload_id)
+
+        assert not (file_system[0] / "multipart" / upload_id).exists()
+
+    def test_expire_upload_sessions_deletes_only_inactive_sessions(self, file_manager, file_system):
+        stale_upload_id = file_manager.create_upload_session(None, None)
+        active_upload_id = file_manager.create_upload_session(None, None)
+        an_hour_ago = time.time() - 60 * 60
+        os.utime(file_system[0] / "multipart" / stale_upload_id / "session.json", (an_hour_ago, an_hour_ago))
+
+        assert file_manager.expire_upload_sessions(max_age=60) == 1
+        assert file_manager.get_upload_session(active_upload_id).parts == []
+        with pytest.raises(UploadSessionDoesNotExistError):
+            file_manager.get_upload_session(stale_upload_id)
+
+    def test_ingest_file_stores_identical_content_once(self, file_manager, file_system):
+        first = file_manager.ingest_file(BytesIO(b"test data"))
+        second = file_manager.ingest_file(BytesIO(b"test data"))
+        other = file_manager.ingest_file(BytesIO(b"other data"))
+
+        assert first.file_path != second.file_path
+        assert os.path.samefile(first.file_path, second.file_path)
+        assert not os.path.samefile(first.file_path, other.file_path)
+        assert get_storage_stats() == {"blobs": 2, "references": 3, "logical_bytes": 28, "stored_bytes": 19,
+                                       "bytes_saved": 9, "dedup_ratio": 28 / 19}
+
+    def test_delete_file_deletes_blob_with_its_last_reference(self, file_manager, file_system):
+        blob_location = file_system[0] / "blobs" / file_manager.ingest_file(BytesIO(b"test data")).checksum
+        results = [file_manager.ingest_file(BytesIO(b"test data")) for _ in range(2)]
+
+        file_manager.delete_file(results[0].file_path.name, results[0].checksum)
+        assert blob_location.stat().st_nlink == 3
+
+        for file_location in file_system[1].iterdir():
+            file_manager.delete_file(file_location.name, results[0].checksum)
+        assert not blob_location.exists()
+        assert get_storage_stats()["blobs"] == 0
+
+    def test_ingest_file_keeps_separate_copies_when_deduplication_is_off(self, file_system):
+        file_manager = LocalFileManager(deduplicate=False)
+        first = file_manager.ingest_file(BytesIO(b"test data"))
+        second = file_manager.ingest_file(BytesIO(b"test data"))
+
+        assert not os.path.samefile(first.file_path, second.file_path)
+        assert not (file_system[0] / "blobs").exists()
+
+    def test_compress_file_compresses_file_covered_by_policy(self, file_system):
+        policy = CompressionPolicy(algorithm="gzip", content_types=[ContentEnum.TEXT], min_size=0)
+        file_manager = LocalFileManager(compression_policy=policy)
+        content = b"test data\n" * 1000
+        first, second = [file_manager.ingest_file(BytesIO(content)) for _ in range(2)]
+
+        results = [file_manager.compress_file(result.file_path.name, result.checksum, ContentEnum.TEXT, len(content))
+                   for result in (first, second)]
+
+        assert results[0].content_encoding == "gzip"
+        assert results[0].stored_size == first.file_path.stat().st_size < len(content)
+        assert gzip.decompress(first.file_path.read_bytes()) == content
+        # Identical content shares the compressed blob, and the blob of the original content is released
+        assert os.path.samefile(first.file_path, second.file_path)
+        assert [blob.name for blob in (file_system[0] / "blobs").iterdir()] == [f"{first.checksum}.gzip"]
+
+        for result in (first, second):
+            file_manager.delete_file(result.file_path.name, result.checksum, "gzip")
+        assert list((file_system[0] / "blobs").iterdir()) == []
+
+    @pytest.mark.parametrize("content_type, content", [(ContentEnum.IMAGE, b"test data\n" * 1000),
+                                                       (ContentEnum.TEXT, os.urandom(10000))])
+    def test_compress_file_keeps_original_when_not_covered_by_policy_or_incompressible(self, content_type,
+                                                                                       content):
+        policy = CompressionPolicy(algorithm="gzip", content_types=[ContentEnum.TEXT], min_size=0)
+        file_manager = LocalFileManager(compression_policy=policy)
+        result = file_manager.ingest_file(BytesIO(content))
+
+        compression_result = file_manager.compress_file(result.file_path.name, result.checksum, content_type,
+                                                        len(content))
+
+        assert compression_result.content_encoding is None
+        assert compression_result.stored_size == len(content)
+        assert result.file_path.read_bytes() == content